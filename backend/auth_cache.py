@@ -0,0 +1,134 @@
+"""Per-worker state that keeps authenticated reads off the database.
+
+``VerifiedTokenCache`` remembers tokens that passed the full check (JWT decode
+plus the session's revocation version) for a short TTL; with a shared cache,
+logout revokes them in every worker. ``ActivityBuffer``
+coalesces ``last_active`` bumps and writes them with one ``bulk_write`` per
+interval, so each wallet is written at most once per interval.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+AUTH_CACHE_NAMESPACE = "auth"
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of token -> wallet.
+
+    Entries live for ``ttl`` seconds or until the JWT expires, whichever is
+    first. Logout evicts the wallet's entries on this worker; with a
+    ``shared`` cache (see shared_cache.py) it also bumps the auth generation,
+    and an entry verified under an older generation is never served, so other
+    workers drop their entries within the shared cache's ``sync_interval``.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 30.0, clock: Callable[[], float] = time.time, shared=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str) -> Optional[str]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        wallet, valid_until, generation = entry
+        if self._clock() >= valid_until or generation != self.generation():
+            del self._entries[token]
+            return None
+        self._entries.move_to_end(token)
+        return wallet
+
+    def generation(self) -> int:
+        return self.shared.generation(AUTH_CACHE_NAMESPACE) if self.shared is not None else 0
+
+    def put(self, token: str, wallet: str, expires_at: float, generation: Optional[int] = None):
+        """Remember a verified token; ``expires_at`` is the JWT exp (epoch seconds).
+
+        Pass the ``generation()`` read before the session lookup, so a logout
+        that lands during the lookup still revokes the entry.
+        """
+        if self.maxsize <= 0:
+            return
+        if generation is None:
+            generation = self.generation()
+        self._entries[token] = (wallet, min(expires_at, self._clock() + self.ttl), generation)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def evict_wallet(self, wallet: str):
+        for token in [token for token, (owner, _, _) in self._entries.items() if owner == wallet]:
+            del self._entries[token]
+
+    async def revoke(self, wallet: str):
+        """Evict the wallet's tokens here and have every worker re-check its cached tokens"""
+        self.evict_wallet(wallet)
+        if self.shared is not None:
+            await self.shared.invalidate(AUTH_CACHE_NAMESPACE)
+
+
+class ActivityBuffer:
+    """Coalesces ``last_active`` updates for ``wallet_sessions``"""
+
+    def __init__(self, collection, interval: float = 60.0):
+        self.collection = collection
+        self.interval = interval
+        self._pending: Dict[str, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def touch(self, wallet: str, when: Optional[datetime] = None):
+        self._pending[wallet] = when or datetime.now(timezone.utc)
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        # $max: workers flush independently, so never move last_active backwards
+        requests = [
+            UpdateOne({"wallet_address": wallet}, {"$max": {"last_active": when}})
+            for wallet, when in pending.items()
+        ]
+        try:
+            await self.collection.bulk_write(requests, ordered=False)
+        except PyMongoError as e:
+            logger.warning(f"last_active flush failed for {len(requests)} wallets: {e}")
+            for wallet, when in pending.items():
+                self._pending.setdefault(wallet, when)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
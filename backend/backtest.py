@@ -0,0 +1,207 @@
+"""Replay the transactions collection into a daily strategy time-series.
+
+Events are streamed oldest-first. ``buy`` spends ``price * amount`` from the
+treasury and adds ``amount`` to the owned supply, ``sell`` does the reverse,
+``burn`` adds ``amount`` to the burned supply. One row per day with events is
+upserted into ``strategy_history`` (keyed by date, same fields as the
+strategy state's ``history`` entries plus balances).
+
+Progress is checkpointed in ``backtest_checkpoints`` so later runs only read
+events after the last one processed. Events inserted with an older timestamp
+than the checkpoint (e.g. a backfill) need ``--rebuild``, as does a checkpoint
+written before ``migrate_datetimes.py`` converted timestamps to dates.
+
+Run ``python backtest.py`` from the backend directory; ``--rebuild`` starts
+over from the first transaction.
+"""
+import asyncio
+import logging
+import os
+import sys
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, List, Optional
+
+from pymongo import ASCENDING, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_EVERY = 10000
+DEFAULT_CHECKPOINT_ID = "strategy"
+
+
+@dataclass
+class BacktestState:
+    """Running balances plus the open day's counters; stored as the checkpoint"""
+    last_timestamp: Any = None  # as stored, so the resume filter compares like with like
+    last_id: Optional[str] = None
+    events: int = 0
+    treasury_eth: float = 0.0
+    owned: float = 0.0
+    burned: float = 0.0
+    floor: Optional[float] = None  # last NFT trade price
+    day: Optional[str] = None
+    day_events: int = 0
+    day_bought: float = 0.0
+    day_sold: float = 0.0
+    day_burned: float = 0.0
+    day_buy_eth: float = 0.0
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "BacktestState":
+        names = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in doc.items() if key in names})
+
+    def history_row(self) -> dict:
+        """The open day in the strategy state's history shape"""
+        return {
+            "date": self.day,
+            "floor": self.floor,
+            "strategy_buy": round(self.day_buy_eth / self.day_bought, 6) if self.day_bought else None,
+            "burned_total": self.burned,
+            "buyback_event": self.day_bought > 0,
+            "treasury_eth": round(self.treasury_eth, 6),
+            "owned": self.owned,
+            "bought": self.day_bought,
+            "sold": self.day_sold,
+            "burned": self.day_burned,
+            "events": self.day_events,
+        }
+
+
+def _day(timestamp) -> str:
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc).date().isoformat()
+
+
+def apply_event(state: BacktestState, tx: dict) -> Optional[dict]:
+    """Apply one transaction; returns the previous day's row when ``tx`` opens a new day"""
+    closed = None
+    day = _day(tx["timestamp"])
+    if day != state.day:
+        if state.day is not None:
+            closed = state.history_row()
+        state.day = day
+        state.day_events = 0
+        state.day_bought = state.day_sold = state.day_burned = state.day_buy_eth = 0.0
+
+    amount = float(tx.get("amount") or 0)
+    price = float(tx.get("price") or 0)
+    kind = tx.get("type")
+    if kind == "buy":
+        state.treasury_eth -= price * amount
+        state.owned += amount
+        state.day_bought += amount
+        state.day_buy_eth += price * amount
+        state.floor = price
+    elif kind == "sell":
+        state.treasury_eth += price * amount
+        state.owned -= amount
+        state.day_sold += amount
+        state.floor = price
+    elif kind == "burn":
+        state.burned += amount
+        state.day_burned += amount
+
+    state.events += 1
+    state.day_events += 1
+    state.last_timestamp = tx["timestamp"]
+    state.last_id = tx["id"]
+    return closed
+
+
+class Backtester:
+    """Incremental replay of ``db.transactions`` into ``db.strategy_history``"""
+
+    def __init__(self, db, checkpoint_id: str = DEFAULT_CHECKPOINT_ID, checkpoint_every: int = CHECKPOINT_EVERY):
+        self.db = db
+        self.checkpoint_id = checkpoint_id
+        self.checkpoint_every = checkpoint_every
+
+    async def load_state(self) -> BacktestState:
+        doc = await self.db.backtest_checkpoints.find_one({"_id": self.checkpoint_id})
+        return BacktestState.from_doc(doc) if doc else BacktestState()
+
+    async def reset(self):
+        await self.db.backtest_checkpoints.delete_one({"_id": self.checkpoint_id})
+        await self.db.strategy_history.delete_many({})
+
+    async def run(self, initial_treasury: float = 0.0) -> BacktestState:
+        """Process events after the checkpoint; returns the new checkpoint state"""
+        state = await self.load_state()
+        if state.last_id is None:
+            state.treasury_eth = initial_treasury
+
+        query = {}
+        if state.last_id is not None:
+            query = {"$or": [
+                {"timestamp": {"$gt": state.last_timestamp}},
+                {"timestamp": state.last_timestamp, "id": {"$gt": state.last_id}},
+            ]}
+        cursor = (
+            self.db.transactions.find(query, {"_id": 0, "id": 1, "type": 1, "amount": 1, "price": 1, "timestamp": 1})
+            .sort([("timestamp", ASCENDING), ("id", ASCENDING)])
+            .batch_size(self.checkpoint_every)
+        )
+
+        rows: List[dict] = []
+        pending = 0
+        async for tx in cursor:
+            closed = apply_event(state, tx)
+            if closed is not None:
+                rows.append(closed)
+            pending += 1
+            if pending >= self.checkpoint_every:
+                await self._checkpoint(state, rows)
+                rows = []
+                pending = 0
+        if pending:
+            await self._checkpoint(state, rows)
+        return state
+
+    async def _checkpoint(self, state: BacktestState, rows: List[dict]):
+        # History first: a crash before the checkpoint replays these events and re-upserts the same rows
+        if state.day is not None:
+            rows = rows + [state.history_row()]
+        if rows:
+            await self.db.strategy_history.bulk_write(
+                [UpdateOne({"_id": row["date"]}, {"$set": row}, upsert=True) for row in rows],
+                ordered=False,
+            )
+        doc = asdict(state)
+        doc["updated_at"] = datetime.now(timezone.utc)
+        await self.db.backtest_checkpoints.replace_one({"_id": self.checkpoint_id}, doc, upsert=True)
+        logger.info(f"Backtest checkpoint: {state.events} events, last day {state.day}")
+
+
+async def _main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Replay transactions into strategy_history")
+    parser.add_argument("--rebuild", action="store_true", help="drop the checkpoint and history and start over")
+    parser.add_argument("--initial-treasury", type=float, default=0.0, help="treasury ETH before the first event")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    backtester = Backtester(client[os.environ['DB_NAME']])
+    try:
+        if args.rebuild:
+            await backtester.reset()
+        state = await backtester.run(initial_treasury=args.initial_treasury)
+        print(f"Processed {state.events} events; treasury {state.treasury_eth:.4f} ETH, "
+              f"owned {state.owned:g}, burned {state.burned:g}")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main()))
@@ -0,0 +1,116 @@
+"""Vectorized yield calculator for batches and parameter sweeps.
+
+The formulas mirror the scalar /api/calculator endpoint. Arithmetic is done
+in float64 with NumPy; rounding reproduces Python's round() exactly, and the
+power-law price scenarios fall back to the scalar expression for the few
+values that sit on a rounding boundary (NumPy's pow can differ from Python's
+in the last bit).
+"""
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+MAX_SCENARIOS = 100_000
+INT_FIELDS = ("time_horizon", "current_supply")
+INPUT_FIELDS = (
+    "nft_price", "time_horizon", "daily_volume", "fee_percentage",
+    "buyback_nft_percentage", "buyback_token_percentage", "lp_percentage",
+    "dev_percentage", "current_supply", "burn_percentage", "impact_strength",
+)
+
+
+def _round(values: np.ndarray, ndigits: int, exact: Optional[Callable[[int], float]] = None) -> List[float]:
+    """round(value, ndigits) for every element, without a Python loop in the common case"""
+    rounded = np.round(values, ndigits).tolist()
+    scaled = values * 10.0 ** ndigits
+    distance = np.abs(scaled - np.floor(scaled) - 0.5)
+    # np.round only disagrees with round() within a few ulps of a .5 boundary
+    near_tie = np.flatnonzero(distance <= 64 * np.spacing(np.abs(scaled)))
+    for i in near_tie.tolist():
+        value = exact(i) if exact is not None else float(values[i])
+        rounded[i] = round(value, ndigits)
+    return rounded
+
+
+def evaluate(columns: Dict[str, np.ndarray]) -> Dict[str, list]:
+    """Evaluate every scenario; ``columns`` maps each INPUT_FIELDS name to an array"""
+    nft_price = columns["nft_price"].astype(np.float64)
+    time_horizon = columns["time_horizon"].astype(np.int64)
+    current_supply = columns["current_supply"].astype(np.int64)
+    k = columns["impact_strength"].astype(np.float64)
+
+    total_volume = columns["daily_volume"] * time_horizon
+    treasury_inflow = total_volume * (columns["fee_percentage"] / 100)
+
+    buyback_nft_budget = treasury_inflow * (columns["buyback_nft_percentage"] / 100)
+    buyback_token_budget = treasury_inflow * (columns["buyback_token_percentage"] / 100)
+
+    nfts_buyable = buyback_nft_budget / nft_price
+    nfts_burned = nfts_buyable * (columns["burn_percentage"] / 100)
+    supply_after = current_supply - np.trunc(nfts_burned).astype(np.int64)
+    supply_reduction = (nfts_burned / current_supply) * 100
+
+    value_per_nft = treasury_inflow / current_supply
+
+    # Same guard as the scalar endpoint: no supply left means no price impact
+    positive = supply_after > 0
+    ratio = np.divide(current_supply, supply_after, out=np.ones_like(nft_price), where=positive)
+    base_multiplier = np.where(positive, ratio ** 0.5, 1.0)
+    price_multiplier = np.where(positive, ratio ** k, 1.0)
+
+    # Python-evaluated fallbacks for values on a rounding boundary
+    nft_price_list = nft_price.tolist()
+    supply_list = current_supply.tolist()
+    after_list = supply_after.tolist()
+    k_list = k.tolist()
+
+    def exact_price(i: int, exponent: float) -> float:
+        if after_list[i] <= 0:
+            return nft_price_list[i]
+        return nft_price_list[i] * ((supply_list[i] / after_list[i]) ** exponent)
+
+    return {
+        "treasury_inflow": _round(treasury_inflow, 2),
+        "buyback_nft_budget": _round(buyback_nft_budget, 2),
+        "buyback_token_budget": _round(buyback_token_budget, 2),
+        "nfts_buyable": _round(nfts_buyable, 2),
+        "nfts_burned": _round(nfts_burned, 2),
+        "supply_after": after_list,
+        "supply_reduction_percent": _round(supply_reduction, 2),
+        "value_per_nft": _round(value_per_nft, 4),
+        "price_conservative": _round(nft_price, 2),
+        "price_base": _round(nft_price * base_multiplier, 2, lambda i: exact_price(i, 0.5)),
+        "price_aggressive": _round(nft_price * price_multiplier, 2, lambda i: exact_price(i, k_list[i])),
+    }
+
+
+def columns_from_scenarios(scenarios: list) -> Dict[str, np.ndarray]:
+    """Columnar arrays from a list of CalculatorInput models"""
+    return {
+        field: np.array([getattr(s, field) for s in scenarios], dtype=np.int64 if field in INT_FIELDS else np.float64)
+        for field in INPUT_FIELDS
+    }
+
+
+def sweep_columns(base, axes: Dict[str, List[float]]) -> Dict[str, np.ndarray]:
+    """Cartesian grid over ``axes``; every other field is taken from ``base``"""
+    count = 1
+    for values in axes.values():
+        count *= len(values)
+    if count > MAX_SCENARIOS:
+        raise ValueError(f"Sweep would evaluate {count} scenarios (max {MAX_SCENARIOS})")
+    for field in INT_FIELDS:
+        # Same inputs as /calculator, whose model rejects a fractional time_horizon or supply
+        if field in axes and not np.all(np.mod(np.asarray(axes[field], dtype=np.float64), 1) == 0):
+            raise ValueError(f"Axis {field} takes whole numbers only")
+
+    grids = np.meshgrid(*(np.asarray(values, dtype=np.float64) for values in axes.values()), indexing="ij")
+    columns = {}
+    for field in INPUT_FIELDS:
+        dtype = np.int64 if field in INT_FIELDS else np.float64
+        if field in axes:
+            grid = grids[list(axes).index(field)].ravel()
+            columns[field] = grid.astype(dtype)
+        else:
+            columns[field] = np.full(count, getattr(base, field), dtype=dtype)
+    return columns
@@ -0,0 +1,110 @@
+"""Incrementally maintained counters behind GET /api/statistics"""
+import asyncio
+import logging
+from typing import Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+STATISTICS_COUNTERS_ID = "statistics"
+STATISTICS_CACHE_NAMESPACE = "statistics"
+COUNTER_FIELDS = ("nfts_owned", "buybacks", "burns")
+# Recounts retried when increments keep landing mid-rebuild, before writing regardless
+REBUILD_ATTEMPTS = 5
+
+
+def transaction_counter_inc(tx_type: str) -> dict:
+    """$inc fields for a newly recorded transaction"""
+    if tx_type == "buy":
+        return {"buybacks": 1}
+    if tx_type == "burn":
+        return {"burns": 1}
+    return {}
+
+
+def nft_status_counter_inc(old_status: Optional[str], new_status: Optional[str]) -> dict:
+    """$inc fields for an NFT created with, or moved between, statuses"""
+    delta = (new_status == "owned") - (old_status == "owned")
+    return {"nfts_owned": delta} if delta else {}
+
+
+class StatisticsCounters:
+    """Single counters document in ``db.counters``.
+
+    Writers apply ``$inc`` as they insert, bumping ``seq`` with every
+    increment. A read rebuilds the counters with a grouped aggregation over
+    transactions and a count over nfts while the document is missing or has
+    never been rebuilt (``built``). A rebuild only stores its recount if
+    ``seq`` did not move while it ran, and recounts otherwise, so increments
+    that land mid-rebuild are not overwritten.
+
+    With a ``cache`` (see shared_cache.py), reads are cached for ``ttl``
+    seconds and every increment invalidates them in all workers.
+    """
+
+    def __init__(self, db, cache=None, ttl: float = 30.0):
+        self.db = db
+        self.cache = cache
+        self.ttl = ttl
+
+    async def get(self) -> dict:
+        if self.cache is not None:
+            return await self.cache.get_or_load(STATISTICS_CACHE_NAMESPACE, "counters", self._read, self.ttl)
+        return await self._read()
+
+    async def _read(self) -> dict:
+        doc = await self.db.counters.find_one({"_id": STATISTICS_COUNTERS_ID})
+        if doc is None or not doc.get("built"):
+            doc = await self._rebuild()
+        return {field: doc.get(field, 0) for field in COUNTER_FIELDS}
+
+    async def increment(self, inc: dict):
+        inc = {field: value for field, value in inc.items() if value}
+        if inc:
+            # Upsert so increments racing a first rebuild are not dropped; the rebuild sets built
+            await self.db.counters.update_one({"_id": STATISTICS_COUNTERS_ID}, {"$inc": {**inc, "seq": 1}}, upsert=True)
+            if self.cache is not None:
+                await self.cache.invalidate(STATISTICS_CACHE_NAMESPACE)
+
+    async def rebuild(self) -> dict:
+        """Recount everything from the collections and store the result"""
+        doc = await self._rebuild()
+        if self.cache is not None:
+            await self.cache.invalidate(STATISTICS_CACHE_NAMESPACE)
+        return doc
+
+    async def _rebuild(self) -> dict:
+        for attempt in range(1, REBUILD_ATTEMPTS + 1):
+            current = await self.db.counters.find_one_and_update(
+                {"_id": STATISTICS_COUNTERS_ID},
+                {"$setOnInsert": {"seq": 0}},
+                projection={"seq": 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            doc = await self._count()
+            query = {"_id": STATISTICS_COUNTERS_ID}
+            if attempt < REBUILD_ATTEMPTS:
+                query["seq"] = current["seq"]
+            else:
+                logger.warning(f"Increments kept landing during {REBUILD_ATTEMPTS} statistics recounts; storing the last one")
+            result = await self.db.counters.update_one(query, {"$set": {**doc, "built": True}})
+            if result.matched_count:
+                return doc
+
+    async def _count(self) -> dict:
+        pipeline = [
+            {"$match": {"type": {"$in": ["buy", "burn"]}}},
+            {"$group": {"_id": "$type", "count": {"$sum": 1}}}
+        ]
+        tx_rows, nfts_owned = await asyncio.gather(
+            self.db.transactions.aggregate(pipeline).to_list(None),
+            self.db.nfts.count_documents({"status": "owned"}),
+        )
+        tx_counts = {row["_id"]: row["count"] for row in tx_rows}
+        return {
+            "nfts_owned": nfts_owned,
+            "buybacks": tx_counts.get("buy", 0),
+            "burns": tx_counts.get("burn", 0),
+        }
@@ -0,0 +1,85 @@
+"""Constant-memory NDJSON/CSV export of whole collections"""
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional
+
+from ingest import COUNTERS_PENDING
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = {
+    "transactions": ["id", "type", "nft_token_id", "amount", "price", "timestamp", "description", "wallet_address"],
+    "nfts": ["id", "token_id", "name", "image_url", "purchase_price", "current_price", "purchase_date", "status", "owner_address"],
+}
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return "" if value is None else value
+
+
+def time_range_filter(field: str, start: Optional[datetime], end: Optional[datetime]) -> dict:
+    """[start, end) on ``field``; naive bounds are taken as UTC"""
+    bounds = {}
+    if start is not None:
+        bounds["$gte"] = _as_stored(start)
+    if end is not None:
+        bounds["$lt"] = _as_stored(end)
+    return {field: bounds} if bounds else {}
+
+
+def _as_stored(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def export_cursor(collection, query: dict, field: str, batch_size: int = EXPORT_BATCH_SIZE):
+    """Oldest-first cursor that pulls ``batch_size`` documents per round-trip"""
+    return (
+        collection.find(query, {"_id": 0, COUNTERS_PENDING: 0})
+        .sort([(field, 1), ("id", 1)])
+        .batch_size(batch_size)
+    )
+
+
+async def stream_ndjson(cursor, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    lines: List[str] = []
+    async for doc in cursor:
+        lines.append(json.dumps(doc, default=_json_default, separators=(",", ":")))
+        if len(lines) >= batch_size:
+            yield ("\n".join(lines) + "\n").encode()
+            lines.clear()
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+async def stream_csv(cursor, columns: List[str], batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    rows = 0
+    async for doc in cursor:
+        writer.writerow([_csv_value(doc.get(column)) for column in columns])
+        rows += 1
+        if rows >= batch_size:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    if buffer.tell():
+        yield buffer.getvalue().encode()
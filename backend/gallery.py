@@ -0,0 +1,290 @@
+"""In-memory index behind the NFT gallery.
+
+Every NFT is kept as a compact row. Each sort key (price, token id, purchase
+date) has a SortedList over all NFTs and one per status, so status, price
+range and sort queries are bisects plus a merge of the lists involved, and
+totals are counted from list positions without visiting the matches. Owner
+and token id filters are posting sets and search is a token id prefix
+lookup; their matches are either sorted directly or found by walking the
+sort order, whichever touches fewer entries. NFT writes update the index in
+O(log n).
+
+``burn_candidate`` is not stored: an NFT is a burn candidate while its price
+is below the collection floor, which is passed in per query.
+``GalleryLoader`` loads the index once and resyncs it to pick up writes made
+by other workers.
+"""
+import asyncio
+import heapq
+import logging
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sortedcontainers import SortedList
+
+logger = logging.getLogger(__name__)
+
+GALLERY_FIELDS = ("id", "token_id", "name", "image_url", "current_price", "status", "owner_address", "purchase_date")
+ORDERS = ("price", "token_id", "purchase_date")
+# sort -> (order, descending)
+SORT_ORDERS = {
+    "price": ("price", False),
+    "-price": ("price", True),
+    "token_id": ("token_id", False),
+    "-token_id": ("token_id", True),
+    "newest": ("purchase_date", True),
+    "oldest": ("purchase_date", False),
+}
+# Sorts after every id, so (price, _MAX_ID) bounds all NFTs at that price
+_MAX_ID = chr(0x10FFFF)
+
+
+def _row(nft: dict) -> dict:
+    """Compact gallery projection, in the strategy state's ``nfts`` shape"""
+    return {
+        "id": nft["id"],
+        "token_id": nft.get("token_id"),
+        "name": nft.get("name"),
+        "image": nft.get("image_url"),
+        "price_eth": float(nft.get("current_price") or 0.0),
+        "status": nft.get("status"),
+        "owner": nft.get("owner_address"),
+    }
+
+
+def _timestamp(value) -> float:
+    return value.timestamp() if isinstance(value, datetime) else 0.0
+
+
+class GalleryIndex:
+    """All NFTs, filterable by status, owner, token id and price, in three sort orders"""
+
+    def __init__(self):
+        self._rows: Dict[str, dict] = {}
+        self._keys: Dict[str, Tuple[tuple, ...]] = {}  # id -> its entry in each order, as in ORDERS
+        # (status or None for every NFT, order) -> SortedList of (key, id)
+        self._orders: Dict[Tuple[Optional[str], str], SortedList] = defaultdict(SortedList)
+        self._by_owner: Dict[str, Set[str]] = {}
+        self._by_token: Dict[int, Set[str]] = {}
+        self._by_text = SortedList()  # (token_id as text, id) for prefix search
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def apply(self, nft: dict):
+        """Insert or replace one NFT"""
+        self._remove(nft["id"])
+        self._add(nft)
+        self.version += 1
+
+    def remove(self, nft_id: str):
+        if self._remove(nft_id):
+            self.version += 1
+
+    def load(self, nfts: Iterable[dict]):
+        """Replace the whole index"""
+        self._rows.clear()
+        self._keys.clear()
+        self._orders.clear()
+        self._by_owner.clear()
+        self._by_token.clear()
+        self._by_text.clear()
+        entries = defaultdict(list)
+        texts = []
+        for nft in nfts:
+            row, keys = self._index_row(nft)
+            for name, key in zip(ORDERS, keys):
+                entries[(None, name)].append(key)
+                entries[(row["status"], name)].append(key)
+            texts.append((str(row["token_id"]), row["id"]))
+        # One sort per list instead of an insort per NFT
+        for list_key, sort_keys in entries.items():
+            self._orders[list_key].update(sort_keys)
+        self._by_text.update(texts)
+        self.version += 1
+
+    def query(
+        self,
+        floor: Optional[float] = None,
+        status: Optional[Iterable[str]] = None,
+        owner: Optional[str] = None,
+        token_ids: Optional[Iterable[int]] = None,
+        search: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        burn_candidate: Optional[bool] = None,
+        sort: str = "price",
+        offset: int = 0,
+        limit: int = 24,
+    ) -> Tuple[int, List[dict]]:
+        """(number of matching NFTs, the requested page of rows with ``burn_candidate``)"""
+        # burn_candidate is a price bound: below the floor, or at or above it
+        lower, upper, upper_inclusive = min_price, max_price, True
+        if burn_candidate is not None and floor is not None:
+            if burn_candidate and (upper is None or floor <= upper):
+                upper, upper_inclusive = floor, False
+            elif not burn_candidate and (lower is None or floor > lower):
+                lower = floor
+        elif burn_candidate:
+            return 0, []  # no floor, so nothing is below it
+        low_key = (lower,) if lower is not None else None
+        high_key = ((upper, _MAX_ID) if upper_inclusive else (upper,)) if upper is not None else None
+        statuses: List[Optional[str]] = list(dict.fromkeys(status)) if status is not None else [None]
+        order_name, descending = SORT_ORDERS[sort]
+        wanted = offset + limit
+
+        candidates = self._candidates(owner, token_ids, search)
+        if candidates is not None:
+            # Already narrowed down: check status and price on each candidate
+            accepted = set(status) if status is not None else None
+            matches = [
+                nft_id for nft_id in candidates
+                if (accepted is None or self._rows[nft_id]["status"] in accepted)
+                and (low_key is None or self._keys[nft_id][0] >= low_key)
+                and (high_key is None or self._keys[nft_id][0] < high_key)
+            ]
+            total = len(matches)
+            walked = len(self._orders.get((None, order_name), ()))
+            sources: List[Tuple[Optional[str], str]] = [(None, order_name)]
+            accept: Optional[Callable[[str], bool]] = set(matches).__contains__
+        else:
+            prices = [self._orders.get((s, "price")) for s in statuses]
+            total = sum(self._count(order, low_key, high_key) for order in prices if order is not None)
+            if order_name == "price":
+                ranges = [order.irange(low_key, high_key, (True, False), reverse=descending) for order in prices if order is not None]
+                return total, self._page(heapq.merge(*ranges, reverse=descending), offset, limit, floor)
+            walked = sum(len(self._orders.get((s, order_name), ())) for s in statuses)
+            sources = [(s, order_name) for s in statuses]
+            matches = None
+
+            def in_price_range(nft_id):
+                key = self._keys[nft_id][0]
+                return (low_key is None or key >= low_key) and (high_key is None or key < high_key)
+
+            accept = in_price_range if low_key is not None or high_key is not None else None
+
+        if total == 0 or offset >= total:
+            return total, []
+        index = ORDERS.index(order_name)
+        if total * total <= wanted * walked:
+            # Few matches: order them directly rather than walk past everything else
+            if matches is None:
+                matches = [key[-1] for order in prices if order is not None for key in order.irange(low_key, high_key, (True, False))]
+            select = heapq.nlargest if descending else heapq.nsmallest
+            ordered = select(wanted, (self._keys[nft_id][index] for nft_id in matches))
+            return total, self._page(ordered, offset, limit, floor)
+        lists = [self._orders[source] for source in sources if source in self._orders]
+        merged = heapq.merge(*(reversed(order) if descending else iter(order) for order in lists), reverse=descending)
+        if accept is not None:
+            merged = (key for key in merged if accept(key[-1]))
+        return total, self._page(merged, offset, limit, floor)
+
+    def _page(self, keys: Iterable[tuple], offset: int, limit: int, floor: Optional[float]) -> List[dict]:
+        page = []
+        for key in islice(keys, offset, offset + limit):
+            row = dict(self._rows[key[-1]])
+            row["burn_candidate"] = floor is not None and row["price_eth"] < floor
+            page.append(row)
+        return page
+
+    @staticmethod
+    def _count(order: SortedList, low_key, high_key) -> int:
+        start = order.bisect_left(low_key) if low_key is not None else 0
+        stop = order.bisect_left(high_key) if high_key is not None else len(order)
+        return max(0, stop - start)
+
+    def _candidates(self, owner, token_ids, search) -> Optional[Set[str]]:
+        """Ids passing the owner, token id and search filters; None means none was given"""
+        postings = []
+        if owner is not None:
+            postings.append(self._by_owner.get(owner, set()))
+        if token_ids is not None:
+            postings.append(set().union(*(self._by_token.get(t, ()) for t in token_ids)))
+        if search:
+            postings.append({nft_id for _, nft_id in self._by_text.irange((search,), (search + _MAX_ID,))})
+        if not postings:
+            return None
+        postings.sort(key=len)
+        return postings[0].intersection(*postings[1:])
+
+    def _index_row(self, nft: dict) -> Tuple[dict, Tuple[tuple, ...]]:
+        row = _row(nft)
+        nft_id = row["id"]
+        keys = (
+            (row["price_eth"], nft_id),
+            (row["token_id"] or 0, nft_id),
+            (_timestamp(nft.get("purchase_date")), nft_id),
+        )
+        self._rows[nft_id] = row
+        self._keys[nft_id] = keys
+        if row["owner"]:
+            self._by_owner.setdefault(row["owner"], set()).add(nft_id)
+        if row["token_id"] is not None:
+            self._by_token.setdefault(row["token_id"], set()).add(nft_id)
+        return row, keys
+
+    def _add(self, nft: dict):
+        row, keys = self._index_row(nft)
+        for name, key in zip(ORDERS, keys):
+            self._orders[(None, name)].add(key)
+            self._orders[(row["status"], name)].add(key)
+        self._by_text.add((str(row["token_id"]), row["id"]))
+
+    def _remove(self, nft_id: str) -> bool:
+        row = self._rows.pop(nft_id, None)
+        if row is None:
+            return False
+        keys = self._keys.pop(nft_id)
+        for name, key in zip(ORDERS, keys):
+            self._orders[(None, name)].remove(key)
+            self._orders[(row["status"], name)].remove(key)
+        self._by_text.remove((str(row["token_id"]), nft_id))
+        self._discard(self._by_owner, row["owner"], nft_id)
+        self._discard(self._by_token, row["token_id"], nft_id)
+        return True
+
+    @staticmethod
+    def _discard(postings: dict, value, nft_id: str):
+        ids = postings.get(value)
+        if ids is not None:
+            ids.discard(nft_id)
+            if not ids:
+                del postings[value]
+
+
+class GalleryLoader:
+    """Loads the index from ``db.nfts`` and periodically resyncs it"""
+
+    def __init__(self, collection, index: GalleryIndex, interval: float = 60.0):
+        self.collection = collection
+        self.index = index
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def resync(self):
+        projection = {"_id": 0, **{field: 1 for field in GALLERY_FIELDS}}
+        self.index.load(await self.collection.find({}, projection).to_list(None))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.resync()
+            except Exception as e:
+                logger.error(f"Gallery index resync failed: {e}")
+            await asyncio.sleep(self.interval)
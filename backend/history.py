@@ -0,0 +1,325 @@
+"""Strategy history as a time series with hourly/daily/weekly rollups.
+
+Raw points live in the ``strategy_metrics`` time-series collection. Rollups
+are regular collections (``strategy_history_hourly`` etc.) keyed by bucket
+start and rebuilt with ``$dateTrunc`` + ``$merge``, so a rollup pass only
+touches the buckets that received new points. Rollups need MongoDB 5.0+.
+
+Days before the first sampled point are served from ``strategy_history``,
+the per-day rows ``backtest.py`` replays from the transactions, grouped into
+the same buckets as the rollups. A backtest therefore backfills the chart
+for the period before sampling started.
+
+Every worker runs a ``HistorySampler``, but only the holder of the lease
+document in ``leases`` samples, so each tick writes one point and one
+rollup pass. The lease outlives a few ticks; another worker takes over once
+the holder stops renewing it.
+
+Run ``python history.py --migrate-state`` from the backend directory once to
+move the history embedded in the strategy state document into the time
+series; ``python history.py --rollup`` recomputes every rollup.
+"""
+import asyncio
+import logging
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+from pymongo.errors import CollectionInvalid, DuplicateKeyError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+METRICS_COLLECTION = "strategy_metrics"
+BACKTEST_COLLECTION = "strategy_history"
+ROLLUPS = {
+    "hourly": ("strategy_history_hourly", timedelta(hours=1)),
+    "daily": ("strategy_history_daily", timedelta(days=1)),
+    "weekly": ("strategy_history_weekly", timedelta(weeks=1)),
+}
+MAX_RAW_POINTS = 100000
+DEFAULT_MAX_POINTS = 500
+DEFAULT_SAMPLE_INTERVAL = 300
+SAMPLER_LEASE_ID = "history_sampler"
+# Ticks a lease outlasts, so a holder that is late by less than that keeps it
+SAMPLER_LEASE_TICKS = 3
+
+
+async def ensure_collections(db):
+    """Create the time-series collection; a no-op if it already exists"""
+    try:
+        await db.create_collection(METRICS_COLLECTION, timeseries={"timeField": "ts", "granularity": "minutes"})
+    except CollectionInvalid:
+        pass
+    except PyMongoError as e:
+        logger.error(f"Could not create time-series collection {METRICS_COLLECTION}: {e}")
+
+
+def point_from_state(data: dict, ts: datetime) -> dict:
+    """One time-series point from a validated strategy state"""
+    return {
+        "ts": ts,
+        "floor": data["market"]["floor_price_eth"],
+        "strategy_buy": data["market"]["strategy_avg_buy_price"],
+        "burned_total": data["nft_supply"]["burned"],
+        "owned": data["nft_supply"]["strategy_owned"],
+        "treasury_eth": data["treasury"]["eth_balance"],
+    }
+
+
+def point_from_history_entry(entry: dict) -> dict:
+    """Time-series point from an embedded ``history`` entry (dated at midnight UTC)"""
+    ts = datetime.fromisoformat(entry["date"])
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return {
+        "ts": ts,
+        "floor": entry.get("floor"),
+        "strategy_buy": entry.get("strategy_buy"),
+        "burned_total": entry.get("burned_total"),
+        "buyback_event": bool(entry.get("buyback_event")),
+        # Backtest rows also carry balances
+        **{field: entry[field] for field in ("owned", "treasury_eth") if field in entry},
+    }
+
+
+def bucket_start(ts: datetime, resolution: str) -> datetime:
+    ts = ts.astimezone(timezone.utc)
+    if resolution == "hourly":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    day = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == "weekly":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def _rollup_pipeline(resolution: str, since: Optional[datetime]) -> List[dict]:
+    collection, _ = ROLLUPS[resolution]
+    unit = {"hourly": "hour", "daily": "day", "weekly": "week"}[resolution]
+    trunc = {"date": "$ts", "unit": unit}
+    if unit == "week":
+        trunc["startOfWeek"] = "monday"
+    pipeline = []
+    if since is not None:
+        pipeline.append({"$match": {"ts": {"$gte": bucket_start(since, resolution)}}})
+    pipeline += [
+        {"$sort": {"ts": 1}},
+        {"$group": {
+            "_id": {"$dateTrunc": trunc},
+            "floor": {"$last": "$floor"},
+            "floor_min": {"$min": "$floor"},
+            "floor_max": {"$max": "$floor"},
+            "strategy_buy": {"$avg": "$strategy_buy"},
+            "burned_total": {"$last": "$burned_total"},
+            "owned": {"$last": "$owned"},
+            "treasury_eth": {"$last": "$treasury_eth"},
+            "buyback_event": {"$max": "$buyback_event"},
+            "samples": {"$sum": 1},
+        }},
+        {"$set": {"ts": "$_id"}},
+        {"$merge": {"into": collection, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+    return pipeline
+
+
+def bucket_points(points: List[dict], resolution: str) -> List[dict]:
+    """Group time-ordered points into rollup buckets, as the rollup pipeline does"""
+    buckets: List[dict] = []
+    for point in points:
+        ts = bucket_start(point["ts"], resolution)
+        if not buckets or buckets[-1]["ts"] != ts:
+            buckets.append({"ts": ts, "floor_min": None, "floor_max": None, "buyback_event": False, "samples": 0, "_buys": []})
+        bucket = buckets[-1]
+        floor = point.get("floor")
+        bucket["floor"] = floor
+        if floor is not None:
+            bucket["floor_min"] = floor if bucket["floor_min"] is None else min(bucket["floor_min"], floor)
+            bucket["floor_max"] = floor if bucket["floor_max"] is None else max(bucket["floor_max"], floor)
+        if point.get("strategy_buy") is not None:
+            bucket["_buys"].append(point["strategy_buy"])
+        for field in ("burned_total", "owned", "treasury_eth"):
+            bucket[field] = point.get(field)
+        bucket["buyback_event"] = bucket["buyback_event"] or bool(point.get("buyback_event"))
+        bucket["samples"] += 1
+    for bucket in buckets:
+        buys = bucket.pop("_buys")
+        bucket["strategy_buy"] = sum(buys) / len(buys) if buys else None
+    return buckets
+
+
+async def backtest_points(db, start: datetime, end: datetime, resolution: str) -> List[dict]:
+    """Backtest days in [start, end) as points at ``resolution``"""
+    if resolution != "raw":
+        start = bucket_start(start, resolution)
+    first_day, last_day = bucket_start(start, "daily"), bucket_start(end, "daily")
+    query = {"_id": {"$gte": first_day.date().isoformat(), "$lte": last_day.date().isoformat()}}
+    rows = await db[BACKTEST_COLLECTION].find(query).sort("_id", 1).to_list(None)
+    points = [point for point in map(point_from_history_entry, rows) if start <= point["ts"] < end]
+    return points if resolution == "raw" else bucket_points(points, resolution)
+
+
+async def rollup(db, since: Optional[datetime] = None):
+    """Recompute rollup buckets that contain points at or after ``since`` (all when None)"""
+    for resolution in ROLLUPS:
+        await db[METRICS_COLLECTION].aggregate(_rollup_pipeline(resolution, since)).to_list(None)
+
+
+def pick_resolution(start: datetime, end: datetime, max_points: int) -> str:
+    """Finest rollup with at most ten times ``max_points`` buckets in the range"""
+    span = end - start
+    for resolution, (_, width) in ROLLUPS.items():
+        if span / width <= max_points * 10:
+            return resolution
+    return "weekly"
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]:
+    """Largest-Triangle-Three-Buckets: indexes of ``threshold`` points that keep the shape"""
+    n = len(xs)
+    if threshold >= n:
+        return list(range(n))
+    if threshold < 3:
+        return [0, n - 1][:threshold]
+    x = np.asarray(xs, dtype=np.float64)
+    y = np.asarray(ys, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        # Average of the next bucket (the last point for the final bucket)
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = int(start + np.argmax(area))
+        selected.append(a)
+    selected.append(n - 1)
+    return selected
+
+
+async def query_history(db, start: datetime, end: datetime, resolution: str, max_points: int) -> List[dict]:
+    """Points in [start, end) at ``resolution``, downsampled to at most ``max_points``"""
+    if resolution == "raw":
+        cursor = db[METRICS_COLLECTION].find({"ts": {"$gte": start, "$lt": end}}, {"_id": 0}).sort("ts", 1)
+        points = await cursor.to_list(MAX_RAW_POINTS)
+    else:
+        collection, _ = ROLLUPS[resolution]
+        query = {"_id": {"$gte": bucket_start(start, resolution), "$lt": end}}
+        points = await db[collection].find(query, {"_id": 0}).sort("_id", 1).to_list(None)
+    # Whole days before the first sampled one come from the backtest
+    first = points[0]["ts"] if points else end
+    if start < first:
+        cutoff = bucket_start(first, "weekly" if resolution == "weekly" else "daily") if points else end
+        points = await backtest_points(db, start, cutoff, resolution) + points
+    if len(points) <= max_points:
+        return points
+    # Gaps in the floor series fall back to the previous value so the triangle areas stay defined
+    xs, ys, last = [], [], 0.0
+    for point in points:
+        last = point.get("floor") if point.get("floor") is not None else last
+        xs.append(point["ts"].timestamp())
+        ys.append(last)
+    return [points[i] for i in lttb(xs, ys, max_points)]
+
+
+class HistorySampler:
+    """Background task that records the current state as a point and rolls it up, on one worker at a time"""
+
+    def __init__(self, db, state_cache, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.db = db
+        self.state_cache = state_cache
+        self.interval = interval
+        self.holder = uuid.uuid4().hex
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            try:
+                # Let another worker take over at its next tick rather than when the lease expires
+                await self.db.leases.delete_one({"_id": SAMPLER_LEASE_ID, "holder": self.holder})
+            except PyMongoError as e:
+                logger.warning(f"Could not release the history sampler lease: {e}")
+
+    async def acquire_lease(self, now: datetime) -> bool:
+        """Take or renew the sampling lease; False while another worker holds it"""
+        try:
+            await self.db.leases.update_one(
+                {"_id": SAMPLER_LEASE_ID, "$or": [{"holder": self.holder}, {"expires_at": {"$lte": now}}]},
+                {"$set": {"holder": self.holder, "expires_at": now + timedelta(seconds=self.interval * SAMPLER_LEASE_TICKS)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False  # held by another worker: the filter missed and the upsert hit its _id
+        return True
+
+    async def sample_once(self):
+        now = datetime.now(timezone.utc)
+        try:
+            if not await self.acquire_lease(now):
+                return
+            snapshot = await self.state_cache.get()
+            await self.db[METRICS_COLLECTION].insert_one(point_from_state(snapshot.data, now))
+            await rollup(self.db, since=now)
+        except Exception as e:
+            logger.warning(f"History sample failed: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.sample_once()
+
+
+async def migrate_state_history(db, tail: int) -> int:
+    """Copy the embedded history into the time series and trim the document to ``tail`` entries"""
+    doc = await db.strategy_state.find_one({}, {"history": 1})
+    entries = (doc or {}).get("history") or []
+    if entries:
+        await db[METRICS_COLLECTION].insert_many([point_from_history_entry(entry) for entry in entries])
+        await db.strategy_state.update_one({"_id": doc["_id"]}, {"$push": {"history": {"$each": [], "$slice": -tail}}})
+    return len(entries)
+
+
+async def _main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Strategy history time series maintenance")
+    parser.add_argument("--migrate-state", action="store_true", help="move the state's embedded history into the time series")
+    parser.add_argument("--tail", type=int, default=int(os.environ.get('STRATEGY_HISTORY_TAIL', 30)),
+                        help="history entries to keep in the state document")
+    parser.add_argument("--rollup", action="store_true", help="recompute all rollups")
+    args = parser.parse_args(argv)
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    db = client[os.environ['DB_NAME']]
+    try:
+        await ensure_collections(db)
+        if args.migrate_state:
+            moved = await migrate_state_history(db, args.tail)
+            print(f"Moved {moved} history entries into {METRICS_COLLECTION}")
+        if args.migrate_state or args.rollup:
+            await rollup(db)
+            print("Rollups are up to date")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main()))
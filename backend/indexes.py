@@ -0,0 +1,158 @@
+"""Mongo index declarations and query-plan diagnostics.
+
+Run ``python indexes.py`` from the backend directory to create the indexes,
+or ``python indexes.py --check`` to also explain every route query and exit
+non-zero if any of them plans a COLLSCAN.
+"""
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "nfts": [
+        IndexModel([("id", ASCENDING)], name="id", unique=True),
+        IndexModel([("purchase_date", DESCENDING), ("id", DESCENDING)], name="purchase_date_id"),
+        IndexModel([("status", ASCENDING), ("purchase_date", DESCENDING), ("id", DESCENDING)], name="status_purchase_date_id"),
+        IndexModel([("owner_address", ASCENDING)], name="owner_address"),
+        IndexModel(
+            [("idempotency_key", ASCENDING)], name="idempotency_key", unique=True,
+            partialFilterExpression={"idempotency_key": {"$exists": True}},
+        ),
+    ],
+    "transactions": [
+        IndexModel([("timestamp", DESCENDING), ("id", DESCENDING)], name="timestamp_id"),
+        IndexModel([("type", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)], name="type_timestamp_id"),
+        IndexModel([("nft_token_id", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)], name="nft_token_id_timestamp_id"),
+        IndexModel([("wallet_address", ASCENDING)], name="wallet_address"),
+        IndexModel(
+            [("idempotency_key", ASCENDING)], name="idempotency_key", unique=True,
+            partialFilterExpression={"idempotency_key": {"$exists": True}},
+        ),
+    ],
+    "wallet_nonces": [
+        IndexModel([("wallet_address", ASCENDING)], name="wallet_address", unique=True),
+        # Mongo drops nonces once expires_at (a BSON date) has passed
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "wallet_sessions": [
+        IndexModel([("wallet_address", ASCENDING)], name="wallet_address", unique=True),
+    ],
+}
+
+_SINCE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+# (route, collection, filter, sort) for every query a route issues.
+# strategy_state is a single-document collection and is deliberately absent.
+ROUTE_QUERIES = [
+    ("GET /api/nfts", "nfts", {}, [("purchase_date", DESCENDING), ("id", DESCENDING)]),
+    ("GET /api/nfts?status", "nfts", {"status": "owned"}, [("purchase_date", DESCENDING), ("id", DESCENDING)]),
+    ("GET /api/transactions", "transactions", {}, [("timestamp", DESCENDING), ("id", DESCENDING)]),
+    ("GET /api/transactions?type", "transactions", {"type": "buy"}, [("timestamp", DESCENDING), ("id", DESCENDING)]),
+    ("GET /api/transactions?nft_token_id", "transactions", {"nft_token_id": 1}, [("timestamp", DESCENDING), ("id", DESCENDING)]),
+    ("GET /api/export/transactions", "transactions", {"timestamp": {"$gte": _SINCE}}, [("timestamp", ASCENDING), ("id", ASCENDING)]),
+    ("GET /api/export/nfts", "nfts", {"purchase_date": {"$gte": _SINCE}}, [("purchase_date", ASCENDING), ("id", ASCENDING)]),
+    ("PATCH /api/nfts/{id}", "nfts", {"id": "nft-1"}, None),
+    ("order book resync", "nfts", {"status": "listed"}, None),
+    ("GET /api/strategy/history", "strategy_history_hourly", {"_id": {"$gte": _SINCE}}, [("_id", ASCENDING)]),
+    ("GET /api/strategy/history (backtest days)", "strategy_history", {"_id": {"$gte": "2024-01-01", "$lte": "2024-12-31"}}, [("_id", ASCENDING)]),
+    ("backtest.py (resume)", "transactions", {"timestamp": {"$gt": _SINCE}}, [("timestamp", ASCENDING), ("id", ASCENDING)]),
+    ("GET /api/statistics (rebuild)", "nfts", {"status": "owned"}, None),
+    ("GET /api/statistics (rebuild)", "transactions", {"type": {"$in": ["buy", "burn"]}}, None),
+    ("GET /api/auth/me", "wallet_sessions", {"wallet_address": "0x0"}, None),
+    ("wallet_counters.py --wallet", "transactions", {"wallet_address": {"$in": ["0x0"]}}, None),
+    ("wallet_counters.py --wallet", "nfts", {"owner_address": {"$in": ["0x0"]}}, None),
+    ("POST /api/transactions/bulk (counters)", "transactions", {"$or": [{"_id": {"$in": [ObjectId()]}}, {"idempotency_key": {"$in": ["k"]}}], "counters_pending": True}, None),
+    ("POST /api/nfts/bulk (counters)", "nfts", {"$or": [{"_id": {"$in": [ObjectId()]}}, {"idempotency_key": {"$in": ["k"]}}], "counters_pending": True}, None),
+    ("POST /api/auth/verify", "wallet_nonces", {"wallet_address": "0x0", "message": "m", "expires_at": {"$gt": _SINCE}}, None),
+]
+
+
+async def ensure_indexes(db, strict: bool = False):
+    """Create all declared indexes; create_indexes is a no-op for existing ones"""
+    for collection, models in INDEXES.items():
+        try:
+            await db[collection].create_indexes(models)
+        except PyMongoError as e:
+            if strict:
+                raise
+            logger.error(f"Could not create indexes on {collection}: {e}")
+
+
+def _plan_stages(plan) -> List[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+async def explain_route_queries(db) -> List[dict]:
+    """Explain every ROUTE_QUERIES entry and report its winning plan stages"""
+    report = []
+    for route, collection, query, sort in ROUTE_QUERIES:
+        command = {"find": collection, "filter": query, "limit": 50}
+        if sort:
+            command["sort"] = dict(sort)
+        explained = await db.command("explain", command, verbosity="queryPlanner")
+        stages = _plan_stages(explained["queryPlanner"]["winningPlan"])
+        report.append({
+            "route": route,
+            "collection": collection,
+            "filter": query,
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+        })
+    return report
+
+
+async def check_query_plans(db) -> List[dict]:
+    """Raise if any route query plans a collection scan"""
+    report = await explain_route_queries(db)
+    scans = [row for row in report if row["collscan"]]
+    for row in scans:
+        logger.error(f"{row['route']}: COLLSCAN on {row['collection']} for filter {row['filter']}")
+    if scans:
+        raise RuntimeError(f"{len(scans)} route queries plan a COLLSCAN")
+    return report
+
+
+async def _main(argv: Optional[List[str]] = None) -> int:
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    argv = sys.argv[1:] if argv is None else argv
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        await ensure_indexes(db, strict=True)
+        print("Indexes are in place")
+        if "--check" in argv:
+            report = await explain_route_queries(db)
+            for row in report:
+                flag = "COLLSCAN" if row["collscan"] else "ok"
+                print(f"{flag:9} {row['route']:32} {row['collection']:16} {' > '.join(row['stages'])}")
+            if any(row["collscan"] for row in report):
+                return 1
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main()))
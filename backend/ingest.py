@@ -0,0 +1,116 @@
+"""Bulk ingestion helpers: parse, batch-validate and insert unordered.
+
+Bulk rows are stored with ``counters_pending`` set. After inserting, a request
+claims its own rows and the stored copies of its duplicates that are still
+pending, applies their counter updates and clears the marker; if the update
+fails the rows go back to pending. A retry of a request that failed between
+inserting and counting therefore still counts the rows it skips as
+duplicates, and each row is counted once.
+"""
+import json
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Tuple, Type
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from pymongo.errors import BulkWriteError
+
+MAX_BULK_ROWS = 50000
+BULK_BATCH_SIZE = 1000
+DUPLICATE_KEY_ERROR = 11000
+COUNTERS_PENDING = "counters_pending"
+
+
+class BulkBodyError(ValueError):
+    """The request body isn't a JSON array or NDJSON"""
+
+
+def parse_bulk_body(body: bytes, content_type: str) -> Tuple[List[Tuple[int, Any]], List[dict]]:
+    """Split a JSON array or NDJSON body into (index, row) pairs plus per-line parse errors"""
+    rows: List[Tuple[int, Any]] = []
+    errors: List[dict] = []
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        for index, line in enumerate(body.splitlines()):
+            if not line.strip():
+                continue
+            try:
+                rows.append((index, json.loads(line)))
+            except ValueError as e:
+                errors.append({"index": index, "error": f"Invalid JSON: {e}"})
+    else:
+        try:
+            data = json.loads(body)
+        except ValueError as e:
+            raise BulkBodyError(f"Invalid JSON: {e}")
+        if not isinstance(data, list):
+            raise BulkBodyError("Expected a JSON array or NDJSON body")
+        rows = list(enumerate(data))
+    if len(rows) + len(errors) > MAX_BULK_ROWS:
+        raise BulkBodyError(f"At most {MAX_BULK_ROWS} rows per request")
+    return rows, errors
+
+
+def validate_rows(rows: List[Tuple[int, Any]], model: Type[BaseModel]) -> Tuple[List[Tuple[int, BaseModel]], List[dict]]:
+    """Validate rows a batch at a time; only batches with bad rows are revalidated"""
+    adapter = TypeAdapter(List[model])
+    valid: List[Tuple[int, BaseModel]] = []
+    errors: List[dict] = []
+    for start in range(0, len(rows), BULK_BATCH_SIZE):
+        batch = rows[start:start + BULK_BATCH_SIZE]
+        try:
+            items = adapter.validate_python([row for _, row in batch])
+        except ValidationError as e:
+            bad: Dict[int, str] = {}
+            for error in e.errors():
+                position = error["loc"][0]
+                field = ".".join(str(part) for part in error["loc"][1:])
+                bad.setdefault(position, f"{field}: {error['msg']}" if field else error["msg"])
+            errors.extend({"index": batch[position][0], "error": message} for position, message in bad.items())
+            batch = [row for position, row in enumerate(batch) if position not in bad]
+            items = adapter.validate_python([row for _, row in batch])
+        valid.extend((index, item) for (index, _), item in zip(batch, items))
+    return valid, errors
+
+
+async def insert_unordered(collection, docs: List[Tuple[int, dict]]) -> Tuple[List[int], List[int], List[dict]]:
+    """insert_many(ordered=False) in batches; returns (inserted, duplicates, errors) by row index"""
+    inserted: List[int] = []
+    duplicates: List[int] = []
+    errors: List[dict] = []
+    for start in range(0, len(docs), BULK_BATCH_SIZE):
+        batch = docs[start:start + BULK_BATCH_SIZE]
+        failed = set()
+        try:
+            await collection.insert_many([doc for _, doc in batch], ordered=False)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                index = batch[write_error["index"]][0]
+                failed.add(write_error["index"])
+                if write_error.get("code") == DUPLICATE_KEY_ERROR:
+                    duplicates.append(index)
+                else:
+                    errors.append({"index": index, "error": write_error.get("errmsg", "Write failed")})
+        inserted.extend(index for position, (index, _) in enumerate(batch) if position not in failed)
+    return inserted, duplicates, errors
+
+
+async def count_once(collection, docs: List[Tuple[int, dict]], inserted: Iterable[int], duplicates: Iterable[int],
+                     fields: Iterable[str], update: Callable[[List[dict]], Awaitable[None]]):
+    """Claim the stored rows still owed counter updates, ``await update(rows)``, then clear their marker"""
+    by_index = dict(docs)
+    ids = [by_index[index]["_id"] for index in inserted]
+    keys = [by_index[index]["idempotency_key"] for index in duplicates]
+    if not ids and not keys:
+        return
+    token = str(uuid.uuid4())
+    claim = {"$or": [{"_id": {"$in": ids}}, {"idempotency_key": {"$in": keys}}]}
+    # Per document atomic: a row pending for two requests is claimed by one of them
+    await collection.update_many({**claim, COUNTERS_PENDING: True}, {"$set": {COUNTERS_PENDING: token}})
+    claim[COUNTERS_PENDING] = token
+    rows = await collection.find(claim, {"_id": 0, **{field: 1 for field in fields}}).to_list(None)
+    try:
+        await update(rows)
+    except BaseException:
+        # Back to pending, so the client's retry counts them
+        await collection.update_many(claim, {"$set": {COUNTERS_PENDING: True}})
+        raise
+    await collection.update_many(claim, {"$unset": {COUNTERS_PENDING: ""}})
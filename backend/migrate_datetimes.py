@@ -0,0 +1,50 @@
+"""Convert ISO-string timestamps to native BSON dates.
+
+Earlier versions stored ``purchase_date``, ``timestamp``, ``created_at`` and
+``last_active`` as ISO strings. Each field is converted server-side with one
+``update_many`` over the documents that still hold a string, so the script is
+safe to re-run and to run while the API is serving.
+
+Run ``python migrate_datetimes.py`` from the backend directory (MongoDB 4.2+).
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+DATETIME_FIELDS = {
+    "nfts": ["purchase_date"],
+    "transactions": ["timestamp"],
+    "wallet_sessions": ["created_at", "last_active"],
+}
+
+
+async def migrate(db) -> dict:
+    """Convert every string-typed datetime field; returns modified counts per collection.field"""
+    modified = {}
+    for collection, fields in DATETIME_FIELDS.items():
+        for field in fields:
+            result = await db[collection].update_many(
+                {field: {"$type": "string"}},
+                [{"$set": {field: {"$dateFromString": {"dateString": f"${field}", "timezone": "UTC"}}}}],
+            )
+            modified[f"{collection}.{field}"] = result.modified_count
+    return modified
+
+
+async def _main() -> int:
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    try:
+        for name, count in (await migrate(client[os.environ['DB_NAME']])).items():
+            print(f"{name:32} {count} converted")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main()))
@@ -0,0 +1,79 @@
+"""Login nonces: one write to issue, one atomic read-and-delete to consume.
+
+A wallet has at most one outstanding nonce; issuing a new one replaces it.
+Consuming requires the exact message that was issued and an unexpired nonce,
+so a nonce can be used once, by one request, before it expires.
+"""
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Tuple
+
+DEFAULT_NONCE_TTL = 600
+
+
+class MongoNonceStore:
+    """Nonces in ``wallet_nonces``; the TTL index on ``expires_at`` reaps leftovers"""
+
+    def __init__(self, collection, ttl: float = DEFAULT_NONCE_TTL):
+        self.collection = collection
+        self.ttl = ttl
+
+    async def issue(self, wallet_address: str, nonce: str, message: str):
+        now = datetime.now(timezone.utc)
+        await self.collection.update_one(
+            {"wallet_address": wallet_address},
+            {"$set": {
+                "nonce": nonce,
+                "message": message,
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=self.ttl),
+            }},
+            upsert=True,
+        )
+
+    async def consume(self, wallet_address: str, message: str) -> bool:
+        doc = await self.collection.find_one_and_delete(
+            {"wallet_address": wallet_address, "message": message, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+            projection={"_id": 1},
+        )
+        return doc is not None
+
+
+class MemoryNonceStore:
+    """Process-local nonces for single-worker deployments and tests"""
+
+    def __init__(self, ttl: float = DEFAULT_NONCE_TTL, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._nonces: Dict[str, Tuple[str, float]] = {}
+        self._purge_at = 1024
+
+    def __len__(self) -> int:
+        return len(self._nonces)
+
+    async def issue(self, wallet_address: str, nonce: str, message: str):
+        self._nonces[wallet_address] = (message, self._clock() + self.ttl)
+        if len(self._nonces) >= self._purge_at:
+            self._purge()
+
+    async def consume(self, wallet_address: str, message: str) -> bool:
+        entry = self._nonces.get(wallet_address)
+        if entry is None or entry[0] != message:
+            return False
+        del self._nonces[wallet_address]
+        return self._clock() < entry[1]
+
+    def _purge(self):
+        now = self._clock()
+        self._nonces = {wallet: entry for wallet, entry in self._nonces.items() if entry[1] > now}
+        # Amortized: the next sweep waits until the dict has doubled again
+        self._purge_at = max(1024, 2 * len(self._nonces))
+
+
+def create_nonce_store(backend: str, db=None, ttl: float = DEFAULT_NONCE_TTL):
+    """``mongo`` (shared by all workers) or ``memory`` (single process only)"""
+    if backend == "memory":
+        return MemoryNonceStore(ttl=ttl)
+    if backend == "mongo":
+        return MongoNonceStore(db.wallet_nonces, ttl=ttl)
+    raise ValueError(f"Unknown nonce backend: {backend}")
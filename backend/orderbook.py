@@ -0,0 +1,144 @@
+"""In-memory order book of listed NFTs.
+
+Listings are kept in a SortedList ordered by (price, id) and aggregated into
+price buckets in a SortedDict, so listing, delisting, floor, best-N and depth
+queries are all O(log n). The book is loaded from Mongo once and then updated
+from NFT writes; ``resync()`` reloads it to pick up writes made by other
+workers.
+"""
+import asyncio
+import logging
+import math
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sortedcontainers import SortedDict, SortedList
+
+logger = logging.getLogger(__name__)
+
+LISTED = "listed"
+# Sorts after every id, so (price, _MAX_ID) bounds all listings at that price
+_MAX_ID = chr(0x10FFFF)
+LISTING_FIELDS = ("id", "token_id", "name", "image_url", "current_price", "owner_address")
+
+
+class OrderBook:
+    """Listed NFTs by price, bucketed to ``tick`` for depth queries"""
+
+    def __init__(self, tick: float = 0.01):
+        self.tick = tick
+        self._places = max(0, -Decimal(str(tick)).as_tuple().exponent)
+        self._sorted: SortedList = SortedList()
+        self._listings: Dict[str, dict] = {}
+        self._buckets: SortedDict = SortedDict()
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._listings)
+
+    def bucket(self, price: float) -> float:
+        """Lower edge of the price level ``price`` falls into"""
+        return round(math.floor(round(price / self.tick, 9)) * self.tick, self._places)
+
+    def apply(self, nft: dict):
+        """Reflect an NFT's current status and price; only ``listed`` NFTs are in the book"""
+        self._remove(nft["id"])
+        if nft.get("status") == LISTED and nft.get("current_price") is not None:
+            self._add(nft)
+        self.version += 1
+
+    def remove(self, nft_id: str):
+        if self._remove(nft_id):
+            self.version += 1
+
+    def load(self, nfts):
+        """Replace the whole book"""
+        self._sorted.clear()
+        self._listings.clear()
+        self._buckets.clear()
+        for nft in nfts:
+            if nft.get("status") == LISTED and nft.get("current_price") is not None:
+                self._add(nft)
+        self.version += 1
+
+    def floor(self) -> Optional[float]:
+        return self._sorted[0][0] if self._sorted else None
+
+    def best(self, n: int, below: Optional[float] = None) -> List[dict]:
+        """Cheapest ``n`` listings, optionally only those priced under ``below``"""
+        keys = self._sorted.irange(maximum=(below,), inclusive=(True, False)) if below is not None else iter(self._sorted)
+        listings = []
+        for _, nft_id in keys:
+            if len(listings) >= n:
+                break
+            listings.append(self._listings[nft_id])
+        return listings
+
+    def levels(self, n: int) -> List[dict]:
+        """Lowest ``n`` price levels in the strategy state's ``{price, count}`` shape"""
+        return [{"price": price, "count": self._buckets[price]} for price in self._buckets.islice(stop=n)]
+
+    def depth_at(self, price: float) -> Tuple[int, int]:
+        """(listings in the level containing ``price``, listings priced at or below ``price``)"""
+        at_level = self._buckets.get(self.bucket(price), 0)
+        cumulative = self._sorted.bisect_right((price, _MAX_ID))
+        return at_level, cumulative
+
+    def _add(self, nft: dict):
+        price = float(nft["current_price"])
+        listing = {field: nft.get(field) for field in LISTING_FIELDS}
+        listing["current_price"] = price
+        self._listings[nft["id"]] = listing
+        self._sorted.add((price, nft["id"]))
+        level = self.bucket(price)
+        self._buckets[level] = self._buckets.get(level, 0) + 1
+
+    def _remove(self, nft_id: str) -> bool:
+        listing = self._listings.pop(nft_id, None)
+        if listing is None:
+            return False
+        price = listing["current_price"]
+        self._sorted.remove((price, nft_id))
+        level = self.bucket(price)
+        if self._buckets[level] == 1:
+            del self._buckets[level]
+        else:
+            self._buckets[level] -= 1
+        return True
+
+
+class OrderBookLoader:
+    """Loads the book from ``db.nfts`` and periodically resyncs it"""
+
+    def __init__(self, collection, book: OrderBook, interval: float = 60.0):
+        self.collection = collection
+        self.book = book
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def resync(self):
+        projection = {"_id": 0, "status": 1, **{field: 1 for field in LISTING_FIELDS}}
+        self.book.load(await self.collection.find({"status": LISTED}, projection).to_list(None))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.resync()
+            except Exception as e:
+                logger.warning(f"Order book resync failed: {e}")
+            if self.interval <= 0:
+                return
+            await asyncio.sleep(self.interval)
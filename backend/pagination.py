@@ -0,0 +1,67 @@
+"""Opaque keyset cursors for the newest-first list routes"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we didn't issue"""
+
+
+def clamp_page_size(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def encode_cursor(sort_value: Any, doc_id: str) -> str:
+    """Encode the (sort value, id) of the last row on a page"""
+    if isinstance(sort_value, datetime):
+        key = ["d", sort_value.isoformat(), doc_id]
+    else:
+        key = ["v", sort_value, doc_id]
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        kind, sort_value, doc_id = json.loads(raw)
+        if kind == "d":
+            sort_value = datetime.fromisoformat(sort_value)
+        elif kind != "v":
+            raise ValueError(kind)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+    return sort_value, doc_id
+
+
+def keyset_filter(field: str, cursor: str) -> dict:
+    """Rows strictly after the cursor in (field desc, id desc) order"""
+    sort_value, doc_id = decode_cursor(cursor)
+    return {"$or": [
+        {field: {"$lt": sort_value}},
+        {field: sort_value, "id": {"$lt": doc_id}},
+    ]}
+
+
+async def fetch_page(collection, query: dict, field: str, cursor: Optional[str], limit: int,
+                     projection: Optional[dict] = None) -> Tuple[List[dict], Optional[str]]:
+    """One newest-first page as an index range scan; returns (rows, next_cursor)"""
+    limit = clamp_page_size(limit)
+    if cursor:
+        query = {"$and": [query, keyset_filter(field, cursor)]} if query else keyset_filter(field, cursor)
+    rows = await (
+        collection.find(query, projection or {"_id": 0})
+        .sort([(field, -1), ("id", -1)])
+        .limit(limit + 1)
+        .to_list(limit + 1)
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][field], rows[-1]["id"])
+    return rows, next_cursor
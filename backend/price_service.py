@@ -0,0 +1,280 @@
+"""Async CoinGecko price service with a per-coin TTL cache"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+import httpx
+
+COINGECKO_API_URL = "https://api.coingecko.com/api/v3"
+PRICE_CACHE_NAMESPACE = "prices"
+
+logger = logging.getLogger(__name__)
+
+
+class PriceServiceError(Exception):
+    """Raised when the upstream CoinGecko request fails"""
+
+
+@dataclass
+class _Entry:
+    quote: Optional[dict]  # None caches "coin not found"
+    fetched_at: float
+
+
+class PriceService:
+    """Non-blocking CoinGecko client.
+
+    Quotes are cached per coin for ``ttl`` seconds. For a further ``stale_ttl``
+    seconds the cached quote is still served while a background refresh runs
+    (stale-while-revalidate). Concurrent misses for the same coin share one
+    upstream request.
+
+    With a ``shared`` cache (see shared_cache.py), quotes another worker
+    fetched less than ``shared_max_age`` seconds ago (default ``ttl / 2``) are
+    adopted instead of calling CoinGecko, so the workers' refreshers share
+    one upstream call per refresh interval.
+    """
+
+    def __init__(
+        self,
+        base_url: str = COINGECKO_API_URL,
+        ttl: float = 60.0,
+        stale_ttl: float = 300.0,
+        timeout: float = 10.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        clock: Callable[[], float] = time.monotonic,
+        on_fetch: Optional[Callable[[float, bool], None]] = None,
+        shared=None,
+        shared_max_age: Optional[float] = None,
+    ):
+        self.base_url = base_url
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+        self._transport = transport
+        self._clock = clock
+        self._on_fetch = on_fetch  # called with (seconds, ok) after every upstream request
+        self.shared = shared
+        self.shared_max_age = shared_max_age if shared_max_age is not None else ttl / 2
+        self._client: Optional[httpx.AsyncClient] = None
+        self._cache: Dict[str, _Entry] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                transport=self._transport,
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get_price(self, coin_id: str) -> Optional[dict]:
+        """Return the quote for ``coin_id``, or None if CoinGecko doesn't know it"""
+        quotes = await self.get_prices([coin_id])
+        return quotes[coin_id]
+
+    async def get_prices(self, coin_ids: Iterable[str]) -> Dict[str, Optional[dict]]:
+        """Return quotes for ``coin_ids``; all cache misses share one upstream call"""
+        coin_ids = list(dict.fromkeys(coin_ids))
+        quotes: Dict[str, Optional[dict]] = {}
+        missing: List[str] = []
+        stale: List[str] = []
+        now = self._clock()
+        for coin_id in coin_ids:
+            entry = self._cache.get(coin_id)
+            if entry is not None:
+                age = now - entry.fetched_at
+                if age < self.ttl + self.stale_ttl:
+                    quotes[coin_id] = entry.quote
+                    if age >= self.ttl:
+                        stale.append(coin_id)
+                    continue
+            missing.append(coin_id)
+
+        if stale:
+            self._load(stale)
+        if missing:
+            # Shield so a cancelled caller doesn't cancel the fetch other callers share
+            await asyncio.shield(asyncio.gather(*self._load(missing)))
+            for coin_id in missing:
+                quotes[coin_id] = self._cache[coin_id].quote
+        return {coin_id: quotes[coin_id] for coin_id in coin_ids}
+
+    async def refresh(self, coin_ids: Iterable[str]):
+        """Re-fetch ``coin_ids`` now, in one batched upstream call"""
+        await asyncio.gather(*self._load(list(coin_ids)))
+
+    def _load(self, coin_ids: List[str]) -> List[asyncio.Future]:
+        """Start (or join) upstream fetches covering ``coin_ids``"""
+        missing = [coin_id for coin_id in coin_ids if coin_id not in self._inflight]
+        if missing:
+            future = asyncio.ensure_future(self._fetch_and_store(missing))
+            for coin_id in missing:
+                self._inflight[coin_id] = future
+            future.add_done_callback(lambda f: self._on_load_done(missing, f))
+        futures = {id(self._inflight[coin_id]): self._inflight[coin_id] for coin_id in coin_ids}
+        return list(futures.values())
+
+    def _on_load_done(self, coin_ids: List[str], future: asyncio.Future):
+        for coin_id in coin_ids:
+            if self._inflight.get(coin_id) is future:
+                del self._inflight[coin_id]
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"CoinGecko refresh for {','.join(coin_ids)} failed: {future.exception()}")
+
+    async def _fetch_and_store(self, coin_ids: List[str]):
+        if self.shared is not None:
+            coin_ids = await self._adopt_shared(coin_ids)
+            if not coin_ids:
+                return
+        quotes = await self._fetch(coin_ids)
+        fetched_at = self._clock()
+        for coin_id in coin_ids:
+            self._cache[coin_id] = _Entry(quote=quotes.get(coin_id), fetched_at=fetched_at)
+        if self.shared is not None:
+            entries = {coin_id: {"quote": quotes.get(coin_id), "fetched_at": time.time()} for coin_id in coin_ids}
+            await self.shared.set_many(PRICE_CACHE_NAMESPACE, entries, self.ttl + self.stale_ttl)
+
+    async def _adopt_shared(self, coin_ids: List[str]) -> List[str]:
+        """Take recent quotes from other workers; returns the coins still to fetch"""
+        entries = await self.shared.get_many(PRICE_CACHE_NAMESPACE, coin_ids)
+        now, wall = self._clock(), time.time()
+        remaining = []
+        for coin_id in coin_ids:
+            entry = entries.get(coin_id)
+            age = wall - entry["fetched_at"] if entry is not None else None
+            if age is not None and age < self.shared_max_age:
+                self._cache[coin_id] = _Entry(quote=entry["quote"], fetched_at=now - max(age, 0.0))
+            else:
+                remaining.append(coin_id)
+        return remaining
+
+    async def _fetch(self, coin_ids: Iterable[str]) -> Dict[str, dict]:
+        """Fetch quotes for ``coin_ids`` in a single upstream call"""
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = await self._get_client().get(
+                "/simple/price",
+                params={
+                    "ids": ",".join(coin_ids),
+                    "vs_currencies": "usd",
+                    "include_24hr_change": "true",
+                    "include_market_cap": "true",
+                    "include_24hr_vol": "true",
+                },
+            )
+            response.raise_for_status()
+            data = response.json()
+            ok = True
+        except (httpx.HTTPError, ValueError) as e:
+            raise PriceServiceError(str(e)) from e
+        finally:
+            if self._on_fetch is not None:
+                self._on_fetch(time.perf_counter() - started, ok)
+
+        last_updated = datetime.now(timezone.utc).isoformat()
+        return {
+            coin_id: {
+                "coin_id": coin_id,
+                "price_usd": values['usd'],
+                "price_change_24h": values.get('usd_24h_change', 0),
+                "market_cap": values.get('usd_market_cap', 0),
+                "volume_24h": values.get('usd_24h_vol', 0),
+                "last_updated": last_updated,
+            }
+            for coin_id, values in data.items()
+            if 'usd' in values
+        }
+
+
+class PriceRefresher:
+    """Background task that keeps tracked coins fresh in the price service.
+
+    All tracked coins are re-fetched in one batched upstream call every
+    ``interval`` seconds, so requests for them are served from the snapshot
+    without waiting on CoinGecko.
+    """
+
+    def __init__(self, service: PriceService, coin_ids: Iterable[str], interval: float = 30.0, max_tracked: int = 50):
+        self.service = service
+        self.interval = interval
+        self.max_tracked = max_tracked
+        self._tracked: Dict[str, None] = dict.fromkeys(coin_ids)
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[Dict[str, Optional[dict]]], None]] = []
+        self.last_refresh_at: Optional[datetime] = None
+        self.refresh_count = 0
+        self.error_count = 0
+        self.consecutive_errors = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def tracked(self) -> List[str]:
+        return list(self._tracked)
+
+    def track(self, coin_ids: Iterable[str]):
+        """Add coins to the refresh set, up to ``max_tracked`` coins"""
+        for coin_id in coin_ids:
+            if len(self._tracked) >= self.max_tracked:
+                break
+            self._tracked.setdefault(coin_id, None)
+
+    def add_listener(self, callback: Callable[[Dict[str, Optional[dict]]], None]):
+        """Call ``callback`` with the tracked quotes after every successful refresh"""
+        self._listeners.append(callback)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def refresh_once(self):
+        try:
+            await self.service.refresh(self.tracked)
+        except PriceServiceError as e:
+            self.error_count += 1
+            self.consecutive_errors += 1
+            self.last_error = str(e)
+            logger.warning(f"Price refresh failed ({self.consecutive_errors} in a row): {e}")
+        else:
+            self.refresh_count += 1
+            self.consecutive_errors = 0
+            self.last_refresh_at = datetime.now(timezone.utc)
+            if self._listeners:
+                quotes = await self.service.get_prices(self.tracked)
+                for callback in self._listeners:
+                    callback(quotes)
+
+    async def _run(self):
+        while True:
+            await self.refresh_once()
+            await asyncio.sleep(self.interval)
+
+    def status(self) -> dict:
+        return {
+            "tracked": self.tracked,
+            "interval_seconds": self.interval,
+            "last_refresh_at": self.last_refresh_at.isoformat() if self.last_refresh_at else None,
+            "refresh_count": self.refresh_count,
+            "error_count": self.error_count,
+            "consecutive_errors": self.consecutive_errors,
+            "last_error": self.last_error,
+        }
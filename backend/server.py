@@ -1,19 +1,47 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+import asyncio
+import multiprocessing
 import os
 import logging
+import time
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional, Union
+import numpy as np
 import uuid
 from datetime import datetime, timezone, timedelta
-from pycoingecko import CoinGeckoAPI
 import httpx
 import secrets
 from jose import jwt, JWTError
+from price_service import PriceService, PriceRefresher, PriceServiceError, COINGECKO_API_URL
+from shared_cache import SharedCache, SqliteStore
+from strategy_state import StrategyStateCache, columnar_state, encode_state
+from strategy_stream import ChangeStreamNotifier, StrategyStreamHub
+from counters import StatisticsCounters, nft_status_counter_inc, transaction_counter_inc
+from indexes import check_query_plans, ensure_indexes
+from pagination import InvalidCursor, fetch_page
+from ingest import (
+    COUNTERS_PENDING, BulkBodyError, count_once, insert_unordered, parse_bulk_body, validate_rows,
+)
+from calculator import INPUT_FIELDS, MAX_SCENARIOS, columns_from_scenarios, evaluate, sweep_columns
+from simulation import MAX_PATHS, SimulationParams, band_days, new_seed, simulate
+from history import DEFAULT_MAX_POINTS, HistorySampler, ensure_collections, pick_resolution, query_history
+from orderbook import OrderBook, OrderBookLoader
+from gallery import GalleryIndex, GalleryLoader
+from auth_cache import ActivityBuffer, VerifiedTokenCache
+from signatures import SignatureVerifier, VerifierOverloaded
+from nonce_store import create_nonce_store
+from wallet_counters import WalletCounters, add_wallet_inc, nft_owner_inc
+from compression import CompressionMiddleware, choose_encoding, compress
+from metrics import CONTENT_TYPE, MetricsMiddleware, MetricsRegistry, MongoCommandTimer, Profiler, ProfilerMiddleware
+from export import EXPORT_COLUMNS, MEDIA_TYPES, export_cursor, stream_csv, stream_ndjson, time_range_filter
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -23,19 +51,182 @@ JWT_SECRET = os.environ.get('JWT_SECRET', secrets.token_urlsafe(32))
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
 
+# Negotiated gzip/brotli for responses of at least COMPRESSION_MIN_SIZE bytes
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', '1').lower() in ('1', 'true', 'yes')
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+
+# Prometheus metrics served at /metrics; ?profile=1 profiling is off unless enabled
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1').lower() in ('1', 'true', 'yes')
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '').lower() in ('1', 'true', 'yes')
+metrics = MetricsRegistry()
+http_request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ["method", "route", "status"])
+mongo_command_seconds = metrics.histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency", ["collection", "command", "outcome"])
+coingecko_request_seconds = metrics.histogram(
+    "coingecko_request_duration_seconds", "CoinGecko request latency", ["outcome"])
+auth_check_seconds = metrics.histogram(
+    "auth_token_check_duration_seconds", "Bearer token check latency by result", ["result"])
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    tz_aware=True,
+    event_listeners=[MongoCommandTimer(mongo_command_seconds)] if METRICS_ENABLED else []
+)
 db = client[os.environ['DB_NAME']]
 
-# CoinGecko client
-cg = CoinGeckoAPI()
+# Cache for the state, statistics and prices; with SHARED_CACHE_PATH set, every
+# worker on the host shares it through that SQLite file, otherwise it is per worker
+SHARED_CACHE_PATH = os.environ.get('SHARED_CACHE_PATH', '')
+shared_cache = SharedCache(
+    SqliteStore(SHARED_CACHE_PATH) if SHARED_CACHE_PATH else None,
+    max_entries=int(os.environ.get('SHARED_CACHE_SIZE', 1024)),
+    sync_interval=float(os.environ.get('SHARED_CACHE_SYNC_INTERVAL', 1)),
+)
+
+# CoinGecko price service (async, cached per coin)
+PRICE_REFRESH_INTERVAL = float(os.environ.get('PRICE_REFRESH_INTERVAL', 30))
+price_service = PriceService(
+    base_url=os.environ.get('COINGECKO_API_URL', COINGECKO_API_URL),
+    ttl=float(os.environ.get('PRICE_CACHE_TTL', 60)),
+    stale_ttl=float(os.environ.get('PRICE_STALE_TTL', 300)),
+    on_fetch=lambda seconds, ok: coingecko_request_seconds.observe(seconds, outcome="ok" if ok else "error"),
+    shared=shared_cache,
+    shared_max_age=PRICE_REFRESH_INTERVAL,
+)
+TRACKED_COIN_IDS = os.environ.get('CRYPTO_TRACKED_IDS', 'bitcoin,ethereum,solana').split(',')
+MAX_PRICE_IDS = 50
+price_refresher = PriceRefresher(
+    price_service,
+    TRACKED_COIN_IDS,
+    interval=PRICE_REFRESH_INTERVAL,
+    max_tracked=MAX_PRICE_IDS,
+)
+
+# Statistics counters maintained with $inc on write, read through the shared cache
+statistics_counters = StatisticsCounters(
+    db,
+    cache=shared_cache,
+    ttl=float(os.environ.get('STATISTICS_CACHE_TTL', 30)),
+)
+
+# Per-wallet profile counters on wallet_sessions, also maintained on write
+wallet_counters = WalletCounters(db.wallet_sessions)
 
 # Security
 security = HTTPBearer(auto_error=False)
 
+# Authenticated reads skip the JWT decode and session lookup for recently verified
+# tokens (logout revokes them in every worker through the shared cache), and
+# last_active bumps are written in one batch per interval
+token_cache = VerifiedTokenCache(
+    maxsize=int(os.environ.get('AUTH_CACHE_SIZE', 4096)),
+    ttl=float(os.environ.get('AUTH_CACHE_TTL', 30)),
+    shared=shared_cache,
+)
+activity_buffer = ActivityBuffer(
+    db.wallet_sessions,
+    interval=float(os.environ.get('LAST_ACTIVE_FLUSH_INTERVAL', 60)),
+)
+
+# Login nonces: Mongo by default; "memory" only for a single worker
+nonce_store = create_nonce_store(
+    os.environ.get('NONCE_BACKEND', 'mongo'),
+    db,
+    ttl=float(os.environ.get('NONCE_TTL_SECONDS', 600)),
+)
+
+# secp256k1 recovery for /auth/verify runs in a bounded pool, never on the event loop
+signature_verifier = SignatureVerifier(
+    max_workers=int(os.environ.get('SIGNATURE_WORKERS', 2)),
+    max_pending=int(os.environ.get('SIGNATURE_MAX_PENDING', 64)),
+    use_processes=os.environ.get('SIGNATURE_POOL', 'process') == 'process',
+)
+
+# Full history lives in the strategy_metrics time series; the state only carries its tail
+STRATEGY_HISTORY_TAIL = int(os.environ.get('STRATEGY_HISTORY_TAIL', 30))
+
+def validate_strategy_state(doc: dict) -> dict:
+    data = StrategyState(**doc).model_dump()
+    data["history"] = data["history"][-STRATEGY_HISTORY_TAIL:]
+    return data
+
+# Strategy state snapshot; validated once per reload instead of per request
+strategy_state_cache = StrategyStateCache(
+    db.strategy_state,
+    validate=validate_strategy_state,
+    max_age=float(os.environ.get('STRATEGY_STATE_TTL', 5)),
+    shared=shared_cache,
+)
+
+# Push fan-out of state versions and price snapshots to streaming clients
+state_notifier = ChangeStreamNotifier(
+    db.strategy_state,
+    interval=float(os.environ.get('STRATEGY_STREAM_POLL_INTERVAL', 2)),
+)
+strategy_state_cache.add_listener(state_notifier.notify)
+stream_hub = StrategyStreamHub(strategy_state_cache, state_notifier)
+price_refresher.add_listener(stream_hub.publish_prices)
+STREAM_KEEPALIVE_SECONDS = 15
+
+# Periodic state samples feeding the history time series and its rollups
+history_sampler = HistorySampler(
+    db,
+    strategy_state_cache,
+    interval=float(os.environ.get('HISTORY_SAMPLE_INTERVAL', 300)),
+)
+MAX_HISTORY_POINTS = 5000
+
+# Listed NFTs by price, updated on NFT writes and resynced for other workers' writes
+order_book = OrderBook(tick=float(os.environ.get('ORDERBOOK_TICK', 0.01)))
+order_book_loader = OrderBookLoader(
+    db.nfts,
+    order_book,
+    interval=float(os.environ.get('ORDERBOOK_RESYNC_INTERVAL', 60)),
+)
+MAX_ORDERBOOK_LEVELS = 500
+
+# Every NFT, indexed for the mini-app gallery; updated on NFT writes like the order book
+gallery_index = GalleryIndex()
+gallery_loader = GalleryLoader(
+    db.nfts,
+    gallery_index,
+    interval=float(os.environ.get('GALLERY_RESYNC_INTERVAL', 60)),
+)
+MAX_GALLERY_PAGE = 100
+MAX_GALLERY_TOKEN_IDS = 500
+
+# Monte Carlo chunks run in this many worker processes; 0 keeps them in a thread
+SIMULATION_WORKERS = int(os.environ.get('SIMULATION_WORKERS', 0))
+simulation_executor: Optional[ProcessPoolExecutor] = None
+
+def use_database(database):
+    """Point the routes and every background component at ``database`` (benchmarks, tests)"""
+    global db
+    db = database
+    statistics_counters.db = database
+    wallet_counters.collection = database.wallet_sessions
+    strategy_state_cache.collection = database.strategy_state
+    state_notifier.collection = database.strategy_state
+    activity_buffer.collection = database.wallet_sessions
+    history_sampler.db = database
+    order_book_loader.collection = database.nfts
+    gallery_loader.collection = database.nfts
+    shared_cache.clear()
+    if hasattr(nonce_store, "collection"):
+        nonce_store.collection = database.wallet_nonces
+
+# Opt-in fast path: orjson for every response, and trusted DB documents skip
+# response_model validation (see trusted_response)
+FAST_RESPONSES = os.environ.get('FAST_RESPONSES', '').lower() in ('1', 'true', 'yes')
+
 # Create the main app without a prefix
-app = FastAPI(title="Forma Strategy API")
+app = FastAPI(
+    title="Forma Strategy API",
+    **({"default_response_class": ORJSONResponse} if FAST_RESPONSES else {})
+)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -51,6 +242,7 @@ class NFT(BaseModel):
     current_price: float
     purchase_date: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     status: str = "owned"  # owned, listed, sold
+    owner_address: Optional[str] = None
 
 class NFTCreate(BaseModel):
     token_id: int
@@ -58,6 +250,7 @@ class NFTCreate(BaseModel):
     image_url: str
     purchase_price: float
     current_price: float
+    owner_address: Optional[str] = None
 
 class Transaction(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -68,6 +261,7 @@ class Transaction(BaseModel):
     price: float
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     description: str
+    wallet_address: Optional[str] = None
 
 class TransactionCreate(BaseModel):
     type: str
@@ -75,6 +269,44 @@ class TransactionCreate(BaseModel):
     amount: float
     price: float
     description: str
+    wallet_address: Optional[str] = None  # counted in that wallet's profile
+
+class NFTUpdate(BaseModel):
+    """List, delist, sell, reprice or transfer an NFT"""
+    status: Optional[Literal["owned", "listed", "sold"]] = None
+    current_price: Optional[float] = Field(default=None, gt=0)
+    owner_address: Optional[str] = None
+
+class OrderBookResponse(BaseModel):
+    version: int
+    floor: Optional[float]
+    listed: int
+    levels: List[dict]  # {"price", "count"} per price level, cheapest first
+    best: List[dict]
+    depth: Optional[dict] = None  # {"price", "at_level", "at_or_below"} when ?price= is given
+
+class GalleryResponse(BaseModel):
+    version: int
+    floor: Optional[float]
+    total: int  # NFTs matching the filters, across all pages
+    offset: int
+    items: List[dict]  # {"id", "token_id", "name", "image", "price_eth", "status", "owner", "burn_candidate"}
+
+class TransactionBulkItem(TransactionCreate):
+    """Bulk row; backfills carry their on-chain time and a retry-safe key"""
+    timestamp: Optional[datetime] = None
+    idempotency_key: Optional[str] = None
+
+class NFTBulkItem(NFTCreate):
+    purchase_date: Optional[datetime] = None
+    status: Literal["owned", "listed", "sold"] = "owned"
+    idempotency_key: Optional[str] = None
+
+class BulkInsertResult(BaseModel):
+    received: int
+    inserted: int
+    duplicates: List[int] = []  # row indexes whose idempotency_key was already ingested
+    errors: List[dict] = []  # {"index", "error"}
 
 class Statistics(BaseModel):
     nft_floor_price: float
@@ -139,7 +371,7 @@ class StrategyState(BaseModel):
     nfts: List[dict]
 
 class CalculatorInput(BaseModel):
-    nft_price: float
+    nft_price: float = Field(gt=0)
     time_horizon: int  # days
     daily_volume: float  # in ETH/USDT
     fee_percentage: float = 1.0
@@ -147,7 +379,7 @@ class CalculatorInput(BaseModel):
     buyback_token_percentage: float = 30.0
     lp_percentage: float = 20.0
     dev_percentage: float = 10.0
-    current_supply: int = 10000
+    current_supply: int = Field(default=10000, gt=0)
     burn_percentage: float = 70.0
     impact_strength: float = 0.5  # 0 to 1
 
@@ -162,42 +394,119 @@ class CalculatorResult(BaseModel):
     value_per_nft: float
     price_scenarios: dict
 
+class CalculatorBatchInput(BaseModel):
+    scenarios: List[CalculatorInput] = Field(min_length=1, max_length=MAX_SCENARIOS)
+
+class SweepRange(BaseModel):
+    """Evenly spaced axis values, stop inclusive"""
+    start: float
+    stop: float
+    num: int = Field(ge=1, le=10000)
+
+class CalculatorSweepInput(BaseModel):
+    base: CalculatorInput
+    axes: Dict[str, Union[List[float], SweepRange]] = Field(min_length=1)
+
+class CalculatorColumns(BaseModel):
+    """Column-oriented results: columns[name][i] belongs to scenario i"""
+    count: int
+    inputs: Dict[str, list] = {}
+    columns: Dict[str, list]
+
+class SimulationInput(BaseModel):
+    """Stochastic inputs; nft_price and current_supply default to the strategy state"""
+    nft_price: Optional[float] = Field(default=None, gt=0)
+    current_supply: Optional[int] = Field(default=None, gt=0)
+    time_horizon: int = Field(ge=1, le=3650)  # days
+    daily_volume: float = Field(ge=0)  # in ETH/USDT
+    volume_volatility: float = Field(default=0.5, ge=0)  # lognormal sigma of daily volume
+    price_drift: float = 0.0  # expected daily floor return
+    price_volatility: float = Field(default=0.05, ge=0)  # daily floor volatility
+    execution_probability: float = Field(default=1.0, ge=0, le=1)  # chance a day's buyback executes
+    fee_percentage: float = 1.0
+    burn_percentage: float = 70.0
+    impact_strength: float = 0.5
+    paths: int = Field(default=10000, ge=1, le=MAX_PATHS)
+    seed: Optional[int] = Field(default=None, ge=0)
+    percentiles: List[float] = Field(default=[5, 25, 50, 75, 95], min_length=1, max_length=20)
+
+class SimulationResult(BaseModel):
+    paths: int
+    seed: int
+    distribution: dict
+    days: List[int]
+    bands: Dict[str, Dict[str, List[float]]]  # metric -> "p50" -> value per day
+
+# Fast response helpers
+def model_projection(model) -> dict:
+    """Fetch only the model's fields, so documents can be served without re-validation"""
+    return {"_id": 0, **{field: 1 for field in model.model_fields}}
+
+def trusted_response(content, response: Optional[Response] = None):
+    """Documents we wrote ourselves: orjson-encode directly in fast mode, otherwise validate via response_model"""
+    if not FAST_RESPONSES:
+        return content
+    headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"} if response else None
+    return ORJSONResponse(content, headers=headers)
+
 # API Routes
 @api_router.get("/")
 async def root():
     return {"message": "Forma Strategy API"}
 
 # ============ JWT Helper Functions ============
-def create_jwt_token(wallet_address: str) -> str:
+def create_jwt_token(wallet_address: str, token_version: int = 0) -> str:
     """Create JWT token for authenticated wallet"""
     expires = datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION_HOURS)
     payload = {
         "sub": wallet_address.lower(),
         "exp": expires,
         "iat": datetime.now(timezone.utc),
-        "type": "access"
+        "type": "access",
+        "ver": token_version  # logout bumps the session's token_version, revoking older tokens
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-def verify_jwt_token(token: str) -> Optional[str]:
-    """Verify JWT token and return wallet address"""
+def verify_jwt_token(token: str) -> Optional[dict]:
+    """Verify JWT token and return its claims"""
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return payload.get("sub")
+        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
     except JWTError:
         return None
 
+async def check_token(token: str) -> tuple:
+    """(wallet or None, how it was decided) for a bearer token"""
+    wallet_address = token_cache.get(token)
+    if wallet_address:
+        return wallet_address, "cached"
+    claims = verify_jwt_token(token)
+    if not claims or not claims.get("sub"):
+        return None, "invalid"
+    wallet_address = claims["sub"]
+    generation = token_cache.generation()
+    session = await db.wallet_sessions.find_one(
+        {"wallet_address": wallet_address},
+        {"_id": 0, "is_active": 1, "token_version": 1}
+    )
+    if not session or not session.get("is_active", True) or claims.get("ver", 0) != session.get("token_version", 0):
+        return None, "revoked"
+    token_cache.put(token, wallet_address, claims["exp"], generation)
+    return wallet_address, "verified"
+
+async def authenticate_token(token: str) -> Optional[str]:
+    """Wallet for a valid, unrevoked token; cached for AUTH_CACHE_TTL seconds"""
+    started = time.perf_counter()
+    wallet_address, result = await check_token(token)
+    auth_check_seconds.observe(time.perf_counter() - started, result=result)
+    return wallet_address
+
 async def get_current_wallet(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Optional[str]:
     """Dependency to get current authenticated wallet"""
     if not credentials:
         return None
-    wallet_address = verify_jwt_token(credentials.credentials)
+    wallet_address = await authenticate_token(credentials.credentials)
     if wallet_address:
-        # Update last_active
-        await db.wallet_sessions.update_one(
-            {"wallet_address": wallet_address},
-            {"$set": {"last_active": datetime.now(timezone.utc).isoformat()}}
-        )
+        activity_buffer.touch(wallet_address)
     return wallet_address
 
 async def require_wallet(wallet: str = Depends(get_current_wallet)) -> str:
@@ -222,65 +531,50 @@ async def get_auth_nonce(request: WalletConnectRequest):
     nonce = generate_nonce()
     message = create_sign_message(wallet_address, nonce)
     
-    # Store nonce in DB (expires in 10 min)
-    await db.wallet_nonces.delete_many({"wallet_address": wallet_address})
-    await db.wallet_nonces.insert_one({
-        "wallet_address": wallet_address,
-        "nonce": nonce,
-        "message": message,
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "expires_at": (datetime.now(timezone.utc) + timedelta(minutes=10)).isoformat()
-    })
+    # Replaces any outstanding nonce for this wallet
+    await nonce_store.issue(wallet_address, nonce, message)
     
     return {"nonce": nonce, "message": message}
 
 @api_router.post("/auth/verify", response_model=WalletAuthResponse)
 async def verify_wallet_signature(request: WalletVerifyRequest):
     """Verify wallet signature and return JWT token"""
-    from eth_account.messages import encode_defunct
-    from eth_account import Account
-    
     wallet_address = request.wallet_address.lower()
     
-    # Get stored nonce
-    nonce_doc = await db.wallet_nonces.find_one({"wallet_address": wallet_address}, {"_id": 0})
-    
-    if not nonce_doc:
-        raise HTTPException(status_code=400, detail="No pending authentication. Request nonce first.")
-    
-    # Check expiration
-    expires_at = datetime.fromisoformat(nonce_doc["expires_at"])
-    if datetime.now(timezone.utc) > expires_at:
-        await db.wallet_nonces.delete_one({"wallet_address": wallet_address})
-        raise HTTPException(status_code=400, detail="Nonce expired. Request a new one.")
-    
-    # Verify signature
+    # Recover first: it needs no nonce state, so a 503 or a bad signature leaves the nonce for a retry
     try:
-        message = encode_defunct(text=request.message)
-        recovered_address = Account.recover_message(message, signature=request.signature)
-        
-        if recovered_address.lower() != wallet_address:
-            raise HTTPException(status_code=401, detail="Invalid signature")
+        recovered_address = await signature_verifier.recover(request.message, request.signature)
+    except VerifierOverloaded as e:
+        logger.warning(f"Rejecting login for {wallet_address}: {e}")
+        raise HTTPException(status_code=503, detail="Too many logins in progress. Retry shortly.", headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Signature verification error: {e}")
         raise HTTPException(status_code=401, detail="Invalid signature format")
     
-    # Delete used nonce
-    await db.wallet_nonces.delete_one({"wallet_address": wallet_address})
+    if recovered_address.lower() != wallet_address:
+        raise HTTPException(status_code=401, detail="Invalid signature")
+    
+    # Consume the nonce atomically: it must exist, match the signed message and be unexpired;
+    # of concurrent logins with the same nonce only one gets past this
+    if not await nonce_store.consume(wallet_address, request.message):
+        raise HTTPException(status_code=400, detail="No pending authentication for this message or nonce expired. Request a new nonce.")
     
     # Create or update wallet session
-    now = datetime.now(timezone.utc).isoformat()
-    await db.wallet_sessions.update_one(
+    now = datetime.now(timezone.utc)
+    session = await db.wallet_sessions.find_one_and_update(
         {"wallet_address": wallet_address},
         {
             "$set": {"last_active": now, "is_active": True},
-            "$setOnInsert": {"created_at": now}
+            # $min rather than $setOnInsert: counter updates may have created the document already
+            "$min": {"created_at": now}
         },
-        upsert=True
+        projection={"_id": 0, "token_version": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
     )
     
     # Generate JWT token
-    token = create_jwt_token(wallet_address)
+    token = create_jwt_token(wallet_address, session.get("token_version", 0))
     
     return WalletAuthResponse(
         token=token,
@@ -288,87 +582,305 @@ async def verify_wallet_signature(request: WalletVerifyRequest):
         expires_in=JWT_EXPIRATION_HOURS * 3600
     )
 
+@api_router.get("/auth/verify/status")
+async def get_signature_verifier_status():
+    """Signature pool load: running and queued recoveries, rejections"""
+    return signature_verifier.status()
+
 @api_router.get("/auth/me", response_model=WalletProfile)
 async def get_wallet_profile(wallet: str = Depends(require_wallet)):
     """Get current wallet profile"""
+    # Wallet stats are counters kept on the session, so this is the only read
     session = await db.wallet_sessions.find_one({"wallet_address": wallet}, {"_id": 0})
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Get wallet stats
-    tx_count = await db.transactions.count_documents({"wallet_address": wallet})
-    nft_count = await db.nfts.count_documents({"owner_address": wallet})
-    
     return WalletProfile(
         wallet_address=wallet,
-        created_at=datetime.fromisoformat(session["created_at"]) if isinstance(session["created_at"], str) else session["created_at"],
-        last_active=datetime.fromisoformat(session["last_active"]) if isinstance(session["last_active"], str) else session["last_active"],
-        total_transactions=tx_count,
-        nfts_owned=nft_count
+        created_at=session["created_at"],
+        last_active=session["last_active"],
+        total_transactions=session.get("total_transactions", 0),
+        nfts_owned=session.get("nfts_owned", 0)
     )
 
 @api_router.post("/auth/logout")
 async def logout_wallet(wallet: str = Depends(require_wallet)):
-    """Logout wallet session"""
+    """Logout wallet session and revoke every token issued for it"""
     await db.wallet_sessions.update_one(
         {"wallet_address": wallet},
-        {"$set": {"is_active": False}}
+        {"$set": {"is_active": False}, "$inc": {"token_version": 1}}
     )
+    await token_cache.revoke(wallet)
     return {"message": "Logged out successfully"}
 
 # NFT Routes
 @api_router.get("/nfts", response_model=List[NFT])
-async def get_nfts(limit: int = 20):
-    nfts = await db.nfts.find({}, {"_id": 0}).sort("purchase_date", -1).limit(limit).to_list(limit)
-    for nft in nfts:
-        if isinstance(nft['purchase_date'], str):
-            nft['purchase_date'] = datetime.fromisoformat(nft['purchase_date'])
-    return nfts
+async def get_nfts(response: Response, limit: int = 20, cursor: Optional[str] = None, status: Optional[str] = None):
+    """Newest NFTs first; the next page's cursor is in the X-Next-Cursor header"""
+    query = {"status": status} if status else {}
+    try:
+        nfts, next_cursor = await fetch_page(db.nfts, query, "purchase_date", cursor, limit, model_projection(NFT))
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return trusted_response(nfts, response)
+
+def lower_address(doc: dict, field: str) -> dict:
+    """Wallet addresses are stored lowercase, as in wallet_sessions"""
+    if doc.get(field):
+        doc[field] = doc[field].lower()
+    return doc
 
 @api_router.post("/nfts", response_model=NFT)
 async def create_nft(nft_input: NFTCreate):
-    nft_dict = nft_input.model_dump()
+    nft_dict = lower_address(nft_input.model_dump(), "owner_address")
     nft_obj = NFT(**nft_dict)
     doc = nft_obj.model_dump()
-    doc['purchase_date'] = doc['purchase_date'].isoformat()
     await db.nfts.insert_one(doc)
+    await statistics_counters.increment(nft_status_counter_inc(None, nft_obj.status))
+    await wallet_counters.increment(nft_owner_inc(None, nft_obj.owner_address))
+    gallery_index.apply(doc)
     return nft_obj
 
+@api_router.patch("/nfts/{nft_id}", response_model=NFT)
+async def update_nft(nft_id: str, update: NFTUpdate):
+    """Change status and/or price; keeps the order book and counters in step"""
+    fields = lower_address(update.model_dump(exclude_none=True), "owner_address")
+    if not fields:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+    before = await db.nfts.find_one_and_update({"id": nft_id}, {"$set": fields}, projection={"_id": 0})
+    if before is None:
+        raise HTTPException(status_code=404, detail="NFT not found")
+    nft = {**before, **fields}
+    await statistics_counters.increment(nft_status_counter_inc(before.get("status"), nft.get("status")))
+    await wallet_counters.increment(nft_owner_inc(before.get("owner_address"), nft.get("owner_address")))
+    order_book.apply(nft)
+    gallery_index.apply(nft)
+    return nft
+
 # Transaction Routes
 @api_router.get("/transactions", response_model=List[Transaction])
-async def get_transactions(limit: int = 50):
-    transactions = await db.transactions.find({}, {"_id": 0}).sort("timestamp", -1).limit(limit).to_list(limit)
-    for tx in transactions:
-        if isinstance(tx['timestamp'], str):
-            tx['timestamp'] = datetime.fromisoformat(tx['timestamp'])
-    return transactions
+async def get_transactions(
+    response: Response,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    tx_type: Optional[str] = Query(None, alias="type"),
+    nft_token_id: Optional[int] = None
+):
+    """Newest transactions first; the next page's cursor is in the X-Next-Cursor header"""
+    query = {}
+    if tx_type:
+        query["type"] = tx_type
+    if nft_token_id is not None:
+        query["nft_token_id"] = nft_token_id
+    try:
+        transactions, next_cursor = await fetch_page(db.transactions, query, "timestamp", cursor, limit, model_projection(Transaction))
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return trusted_response(transactions, response)
 
 @api_router.post("/transactions", response_model=Transaction)
 async def create_transaction(tx_input: TransactionCreate):
-    tx_dict = tx_input.model_dump()
+    tx_dict = lower_address(tx_input.model_dump(), "wallet_address")
     tx_obj = Transaction(**tx_dict)
     doc = tx_obj.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
     await db.transactions.insert_one(doc)
+    await statistics_counters.increment(transaction_counter_inc(tx_obj.type))
+    if tx_obj.wallet_address:
+        await wallet_counters.increment({tx_obj.wallet_address: {"total_transactions": 1}})
     return tx_obj
 
+# Bulk Ingestion Routes
+def bulk_doc(item: BaseModel, time_field: str) -> dict:
+    """Mongo document for a validated bulk row"""
+    doc = lower_address(lower_address(item.model_dump(exclude_none=True), "wallet_address"), "owner_address")
+    doc['id'] = str(uuid.uuid4())
+    when = doc.get(time_field) or datetime.now(timezone.utc)
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    doc[time_field] = when.astimezone(timezone.utc)
+    return doc
+
+async def bulk_ingest(request: Request, collection: str, model, time_field: str, counted_fields: tuple, update_counters):
+    """Insert the body's rows and ``await update_counters(rows)`` for each stored row not yet counted"""
+    body = await request.body()
+    try:
+        # Parsing and validating up to MAX_BULK_ROWS rows would stall the event loop
+        rows, errors = await asyncio.to_thread(parse_bulk_body, body, request.headers.get("content-type", ""))
+    except BulkBodyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    valid, invalid = await asyncio.to_thread(validate_rows, rows, model)
+    docs = [(index, {**bulk_doc(item, time_field), COUNTERS_PENDING: True}) for index, item in valid]
+    inserted, duplicates, write_errors = await insert_unordered(db[collection], docs)
+    await count_once(db[collection], docs, inserted, duplicates, counted_fields, update_counters)
+    return docs, inserted, BulkInsertResult(
+        received=len(rows) + len(errors),
+        inserted=len(inserted),
+        duplicates=sorted(duplicates),
+        errors=sorted(errors + invalid + write_errors, key=lambda e: e["index"])
+    )
+
+async def count_transactions(rows: List[dict]):
+    inc, wallet_incs = {}, {}
+    for doc in rows:
+        for field, value in transaction_counter_inc(doc["type"]).items():
+            inc[field] = inc.get(field, 0) + value
+        add_wallet_inc(wallet_incs, doc.get("wallet_address"), "total_transactions")
+    await statistics_counters.increment(inc)
+    await wallet_counters.increment(wallet_incs)
+
+async def count_nfts(rows: List[dict]):
+    wallet_incs = {}
+    for doc in rows:
+        add_wallet_inc(wallet_incs, doc.get("owner_address"), "nfts_owned")
+    await statistics_counters.increment({"nfts_owned": sum(1 for doc in rows if doc["status"] == "owned")})
+    await wallet_counters.increment(wallet_incs)
+
+@api_router.post("/transactions/bulk", response_model=BulkInsertResult)
+async def create_transactions_bulk(request: Request):
+    """Ingest a JSON array or NDJSON body of transactions"""
+    _, _, result = await bulk_ingest(
+        request, "transactions", TransactionBulkItem, "timestamp", ("type", "wallet_address"), count_transactions
+    )
+    return result
+
+@api_router.post("/nfts/bulk", response_model=BulkInsertResult)
+async def create_nfts_bulk(request: Request):
+    """Ingest a JSON array or NDJSON body of NFTs"""
+    docs, inserted, result = await bulk_ingest(
+        request, "nfts", NFTBulkItem, "purchase_date", ("status", "owner_address"), count_nfts
+    )
+    inserted = set(inserted)
+    for index, doc in docs:
+        if index in inserted:
+            gallery_index.apply(doc)
+            if doc["status"] == "listed":
+                order_book.apply(doc)
+    return result
+
+# Export Routes
+def export_response(collection: str, query: dict, time_field: str, format: str) -> StreamingResponse:
+    cursor = export_cursor(db[collection], query, time_field)
+    if format == "csv":
+        chunks = stream_csv(cursor, EXPORT_COLUMNS[collection])
+    else:
+        chunks = stream_ndjson(cursor)
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{collection}.{format}"'}
+    )
+
+@api_router.get("/export/transactions")
+async def export_transactions(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    tx_type: Optional[str] = Query(None, alias="type")
+):
+    """Stream all transactions in [from, to), oldest first"""
+    query = time_range_filter("timestamp", start, end)
+    if tx_type:
+        query["type"] = tx_type
+    return export_response("transactions", query, "timestamp", format)
+
+@api_router.get("/export/nfts")
+async def export_nfts(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    status: Optional[str] = None
+):
+    """Stream all NFTs purchased in [from, to), oldest first"""
+    query = time_range_filter("purchase_date", start, end)
+    if status:
+        query["status"] = status
+    return export_response("nfts", query, "purchase_date", format)
+
+# Order Book Route
+@api_router.get("/orderbook", response_model=OrderBookResponse)
+async def get_orderbook(
+    levels: int = Query(20, ge=1, le=MAX_ORDERBOOK_LEVELS),
+    best: int = Query(10, ge=0, le=MAX_ORDERBOOK_LEVELS),
+    below: Optional[float] = None,
+    price: Optional[float] = None
+):
+    """Listed NFTs: price levels, cheapest listings (optionally under ``below``) and depth at ``price``"""
+    depth = None
+    if price is not None:
+        at_level, at_or_below = order_book.depth_at(price)
+        depth = {"price": price, "at_level": at_level, "at_or_below": at_or_below}
+    return OrderBookResponse(
+        version=order_book.version,
+        floor=order_book.floor(),
+        listed=len(order_book),
+        levels=order_book.levels(levels),
+        best=order_book.best(best, below=below),
+        depth=depth
+    )
+
+# Gallery Route
+def parse_csv_param(value: Optional[str]) -> Optional[List[str]]:
+    return list(dict.fromkeys(v.strip() for v in value.split(',') if v.strip())) if value else None
+
+@api_router.get("/gallery", response_model=GalleryResponse)
+async def get_gallery(
+    status: Optional[str] = None,
+    owner: Optional[str] = None,
+    token_ids: Optional[str] = None,
+    q: Optional[str] = Query(None, max_length=20),
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    burn_candidate: Optional[bool] = None,
+    sort: Literal["price", "-price", "token_id", "-token_id", "newest", "oldest"] = "price",
+    offset: int = Query(0, ge=0),
+    limit: int = Query(24, ge=1, le=MAX_GALLERY_PAGE)
+):
+    """Filter, sort and page every NFT from the in-memory gallery index"""
+    raw_ids = parse_csv_param(token_ids)
+    token_id_list: Optional[List[int]] = None
+    if raw_ids is not None:
+        if len(raw_ids) > MAX_GALLERY_TOKEN_IDS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_GALLERY_TOKEN_IDS} token_ids per request")
+        try:
+            token_id_list = [int(token_id) for token_id in raw_ids]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="token_ids must be integers")
+    snapshot = await strategy_state_cache.get()
+    floor = snapshot.data.get("market", {}).get("floor_price_eth")
+    total, items = gallery_index.query(
+        floor=floor,
+        status=parse_csv_param(status),
+        owner=owner.lower() if owner else None,
+        token_ids=token_id_list,
+        search=q.strip() if q else None,
+        min_price=min_price,
+        max_price=max_price,
+        burn_candidate=burn_candidate,
+        sort=sort,
+        offset=offset,
+        limit=limit
+    )
+    return GalleryResponse(version=gallery_index.version, floor=floor, total=total, offset=offset, items=items)
+
 # Statistics Route
 @api_router.get("/statistics", response_model=Statistics)
 async def get_statistics():
-    # Mock data for now
-    nft_count = await db.nfts.count_documents({"status": "owned"})
-    buyback_count = await db.transactions.count_documents({"type": "buy"})
-    burn_count = await db.transactions.count_documents({"type": "burn"})
+    counts = await statistics_counters.get()
     
+    # Market fields are still mock data
     return Statistics(
         nft_floor_price=42.5,
         token_price=0.0245,
         market_cap=24500000,
         total_volume_24h=1850000,
-        total_nfts_owned=nft_count,
-        total_buybacks=buyback_count,
-        total_burned=burn_count,
+        total_nfts_owned=counts["nfts_owned"],
+        total_buybacks=counts["buybacks"],
+        total_burned=counts["burns"],
         treasury_balance=125000
     )
 
@@ -399,9 +911,11 @@ async def calculate_yield(calc_input: CalculatorInput):
     else:
         price_multiplier = 1.0
     
+    base_multiplier = (calc_input.current_supply / supply_after) ** 0.5 if supply_after > 0 else 1.0
+    
     price_scenarios = {
         "conservative": round(calc_input.nft_price, 2),
-        "base": round(calc_input.nft_price * ((calc_input.current_supply / supply_after) ** 0.5), 2),
+        "base": round(calc_input.nft_price * base_multiplier, 2),
         "aggressive": round(calc_input.nft_price * price_multiplier, 2)
     }
     
@@ -417,102 +931,216 @@ async def calculate_yield(calc_input: CalculatorInput):
         price_scenarios=price_scenarios
     )
 
+@api_router.post("/calculator/batch", response_model=CalculatorColumns)
+async def calculate_yield_batch(batch: CalculatorBatchInput):
+    """Evaluate many scenarios in one vectorized pass; same formulas as /calculator"""
+    # 100k scenarios take a noticeable slice of a second: keep it off the event loop
+    columns = await asyncio.to_thread(lambda: evaluate(columns_from_scenarios(batch.scenarios)))
+    return CalculatorColumns(count=len(batch.scenarios), columns=columns)
+
+@api_router.post("/calculator/sweep", response_model=CalculatorColumns)
+async def calculate_yield_sweep(sweep: CalculatorSweepInput):
+    """Evaluate the cartesian grid over the given axes; other inputs come from base"""
+    axes = {}
+    for field, spec in sweep.axes.items():
+        if field not in INPUT_FIELDS:
+            raise HTTPException(status_code=400, detail=f"Unknown calculator input: {field}")
+        values = np.linspace(spec.start, spec.stop, spec.num).tolist() if isinstance(spec, SweepRange) else spec
+        if not values:
+            raise HTTPException(status_code=400, detail=f"Axis {field} has no values")
+        axes[field] = values
+    if any(v <= 0 for v in axes.get("nft_price", [])) or any(v < 1 for v in axes.get("current_supply", [])):
+        raise HTTPException(status_code=400, detail="nft_price and current_supply must be positive")
+
+    def run_sweep() -> CalculatorColumns:
+        inputs = sweep_columns(sweep.base, axes)
+        return CalculatorColumns(
+            count=len(inputs["nft_price"]),
+            inputs={field: inputs[field].tolist() for field in axes},
+            columns=evaluate(inputs)
+        )
+
+    try:
+        # Grid building, evaluation and list conversion all run off the event loop
+        return await asyncio.to_thread(run_sweep)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.post("/calculator/simulate", response_model=SimulationResult)
+async def simulate_yield(sim_input: SimulationInput):
+    """Monte Carlo percentile bands using the strategy state's distribution split"""
+    if any(not 0 <= q <= 100 for q in sim_input.percentiles):
+        raise HTTPException(status_code=400, detail="Percentiles must be between 0 and 100")
+    state = (await strategy_state_cache.get()).data
+    supply = state["nft_supply"]
+    params = SimulationParams(
+        nft_price=sim_input.nft_price or state["market"]["floor_price_eth"],
+        current_supply=sim_input.current_supply or supply["total_minted"] - supply["burned"],
+        time_horizon=sim_input.time_horizon,
+        daily_volume=sim_input.daily_volume,
+        volume_volatility=sim_input.volume_volatility,
+        price_drift=sim_input.price_drift,
+        price_volatility=sim_input.price_volatility,
+        execution_probability=sim_input.execution_probability,
+        fee_percentage=sim_input.fee_percentage,
+        buyback_nft_percentage=state["distribution"]["buyback_nft_pct"],
+        burn_percentage=sim_input.burn_percentage,
+        impact_strength=sim_input.impact_strength,
+    )
+    seed = sim_input.seed if sim_input.seed is not None else new_seed()
+    bands = await simulate(params, sim_input.paths, seed, sim_input.percentiles, executor=simulation_executor)
+    return SimulationResult(
+        paths=sim_input.paths,
+        seed=seed,
+        distribution=state["distribution"],
+        days=band_days(params.time_horizon),
+        bands=bands
+    )
+
 # CoinGecko Integration
 @api_router.get("/crypto/price/{coin_id}")
 async def get_crypto_price(coin_id: str):
     try:
-        data = cg.get_price(
-            ids=coin_id,
-            vs_currencies='usd',
-            include_24hr_change=True,
-            include_market_cap=True,
-            include_24hr_vol=True
-        )
-        
-        if coin_id not in data:
-            raise HTTPException(status_code=404, detail="Cryptocurrency not found")
-        
-        return {
-            "coin_id": coin_id,
-            "price_usd": data[coin_id]['usd'],
-            "price_change_24h": data[coin_id].get('usd_24h_change', 0),
-            "market_cap": data[coin_id].get('usd_market_cap', 0),
-            "volume_24h": data[coin_id].get('usd_24h_vol', 0),
-            "last_updated": datetime.now(timezone.utc).isoformat()
-        }
-    except Exception as e:
+        quote = await price_service.get_price(coin_id)
+    except PriceServiceError as e:
+        raise HTTPException(status_code=500, detail=f"API Error: {str(e)}")
+    
+    if quote is None:
+        raise HTTPException(status_code=404, detail="Cryptocurrency not found")
+    
+    return quote
+
+@api_router.get("/crypto/prices")
+async def get_crypto_prices(ids: Optional[str] = None):
+    """Get quotes for several coins from the in-process price snapshot"""
+    coin_ids = list(dict.fromkeys(c.strip() for c in ids.split(',') if c.strip())) if ids else price_refresher.tracked
+    if len(coin_ids) > MAX_PRICE_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_PRICE_IDS} ids per request")
+    
+    try:
+        quotes = await price_service.get_prices(coin_ids)
+    except PriceServiceError as e:
         raise HTTPException(status_code=500, detail=f"API Error: {str(e)}")
+    
+    # Coins people ask for get picked up by the background refresher
+    price_refresher.track(coin_id for coin_id, quote in quotes.items() if quote is not None)
+    
+    return {
+        "prices": {coin_id: quote for coin_id, quote in quotes.items() if quote is not None},
+        "not_found": [coin_id for coin_id, quote in quotes.items() if quote is None],
+        "last_refresh_at": price_refresher.status()["last_refresh_at"]
+    }
+
+@api_router.get("/crypto/prices/status")
+async def get_crypto_prices_status():
+    """Background price refresher health"""
+    return price_refresher.status()
 
 # Strategy State Route for Mini-App
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
 @api_router.get("/strategy/state", response_model=StrategyState)
-async def get_strategy_state():
-    """Get full strategy state from MongoDB or return default"""
+async def get_strategy_state(
+    format: Literal["rows", "columnar"] = "rows",
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None)
+):
+    """Get full strategy state from the cached snapshot (MongoDB or default)"""
     try:
-        # Try to get from database
-        state = await db.strategy_state.find_one({}, {"_id": 0})
-        
-        if state:
-            return StrategyState(**state)
-        
-        # Return default state if not in DB
-        import time
-        return StrategyState(
-            timestamp=int(time.time()),
-            treasury={
-                "eth_balance": 24.73,
-                "target_eth_per_buyback": 3.0
-            },
-            nft_supply={
-                "total_minted": 5000,
-                "burned": 312,
-                "strategy_owned": 148,
-                "market_circulating": 4540
-            },
-            activity={
-                "nft_bought_total": 460,
-                "nft_sold_total": 312,
-                "eth_spent_on_buybacks": 128.4,
-                "eth_received_from_sales": 96.1
-            },
-            market={
-                "floor_price_eth": 1.24,
-                "strategy_avg_buy_price": 1.05,
-                "strategy_avg_sell_price": 1.18
-            },
-            liquidity={
-                "eth_in_lp": 42.0,
-                "token_in_lp": 120000
-            },
-            distribution={
-                "buyback_nft_pct": 40,
-                "buyback_token_pct": 30,
-                "liquidity_pct": 20,
-                "dev_pct": 10
-            },
-            orderbook=[
-                {"price": 1.1, "count": 4},
-                {"price": 1.15, "count": 7},
-                {"price": 1.2, "count": 12}
-            ],
-            history=[
-                {"date": "2024-12-01", "floor": 0.92, "strategy_buy": 0.88, "burned_total": 180, "buyback_event": True},
-                {"date": "2024-12-08", "floor": 0.98, "strategy_buy": 0.92, "burned_total": 200, "buyback_event": False},
-                {"date": "2024-12-15", "floor": 1.05, "strategy_buy": 0.96, "burned_total": 240, "buyback_event": False},
-                {"date": "2024-12-22", "floor": 1.15, "strategy_buy": 1.00, "burned_total": 280, "buyback_event": True},
-                {"date": "2024-12-29", "floor": 1.24, "strategy_buy": 1.05, "burned_total": 312, "buyback_event": False}
-            ],
-            nfts=[
-                {"token_id": 124, "price_eth": 1.12, "owner": "strategy", "status": "available", "burn_candidate": False, "image": "https://images.unsplash.com/photo-1764437358350-e324534072d7?w=400"},
-                {"token_id": 128, "price_eth": 1.08, "owner": "market", "status": "available", "burn_candidate": True, "image": "https://images.unsplash.com/photo-1759270463164-dcd9af6fc77c?w=400"},
-                {"token_id": 135, "price_eth": 1.22, "owner": "strategy", "status": "available", "burn_candidate": False, "image": "https://images.unsplash.com/photo-1763920999620-f76ea1aeb3ac?w=400"},
-                {"token_id": 142, "price_eth": 1.15, "owner": "market", "status": "available", "burn_candidate": False, "image": "https://images.unsplash.com/photo-1759270463255-70ef839296bd?w=400"},
-                {"token_id": 156, "price_eth": 1.18, "owner": "strategy", "status": "listed", "burn_candidate": False, "image": "https://images.unsplash.com/photo-1764437358350-e324534072d7?w=400"},
-                {"token_id": 189, "price_eth": 1.09, "owner": "market", "status": "available", "burn_candidate": True, "image": "https://images.unsplash.com/photo-1759270463164-dcd9af6fc77c?w=400"}
-            ]
-        )
+        snapshot = await strategy_state_cache.get()
     except Exception as e:
         logger.error(f"Error fetching strategy state: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    
+    # Each representation has its own ETag; compressed bodies are built once per snapshot
+    etag = snapshot.etag if format == "rows" else snapshot.etag[:-1] + '-columnar"'
+    headers = {
+        "ETag": etag,
+        "X-State-Version": str(snapshot.version),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding"
+    }
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    if format == "columnar":
+        body = snapshot.variant("columnar", lambda: encode_state(columnar_state(snapshot.data)))
+    else:
+        body = snapshot.body
+    encoding = choose_encoding(accept_encoding) if COMPRESSION_ENABLED and len(body) >= COMPRESSION_MIN_SIZE else None
+    if encoding:
+        body = snapshot.variant((format, encoding), lambda: compress(body, encoding))
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@api_router.get("/strategy/history")
+async def get_strategy_history(
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    resolution: Literal["auto", "raw", "hourly", "daily", "weekly"] = "auto",
+    max_points: int = Query(DEFAULT_MAX_POINTS, ge=3, le=MAX_HISTORY_POINTS)
+):
+    """History from the time series rollups, LTTB-downsampled to max_points"""
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(days=90)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="from must be before to")
+    if resolution == "auto":
+        resolution = pick_resolution(start, end, max_points)
+    points = await query_history(db, start, end, resolution, max_points)
+    return trusted_response({"resolution": resolution, "from": start, "to": end, "points": points})
+
+@api_router.get("/strategy/stream")
+async def stream_strategy_state(request: Request):
+    """Server-Sent Events: full state and prices first, then deltas"""
+    subscription = await stream_hub.subscribe()
+    
+    async def event_stream():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event, full = await asyncio.wait_for(subscription.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield event.sse(full)
+        finally:
+            stream_hub.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.websocket("/strategy/ws")
+async def strategy_state_websocket(websocket: WebSocket):
+    """WebSocket variant of /strategy/stream (same JSON payloads)"""
+    await websocket.accept()
+    subscription = await stream_hub.subscribe()
+    try:
+        while True:
+            event, full = await subscription.get()
+            await websocket.send_text(event.payload(full))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        stream_hub.unsubscribe(subscription)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus text exposition of request, Mongo, CoinGecko and auth latencies"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -523,8 +1151,23 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-State-Version", "X-Next-Cursor"],
 )
 
+# Inside the profiler and metrics, so their timings include compressing the body
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
+if PROFILING_ENABLED:
+    if Profiler is None:
+        logging.getLogger(__name__).warning("PROFILING_ENABLED is set but pyinstrument is not installed")
+    else:
+        app.add_middleware(ProfilerMiddleware)
+
+# Outermost, so the timing covers CORS and the profiler too; streams would only measure their lifetime
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, histogram=http_request_seconds, exclude={"/metrics", "/api/strategy/stream"})
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -534,4 +1177,94 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    # Buffered last_active writes go out before the client closes
+    await activity_buffer.stop()
+    client.close()
+
+@app.on_event("startup")
+async def create_indexes():
+    """Create indexes in the background; diagnostics mode blocks and fails startup on COLLSCANs"""
+    if os.environ.get('MONGO_INDEX_DIAGNOSTICS', '').lower() in ('1', 'true', 'yes'):
+        await ensure_indexes(db, strict=True)
+        await check_query_plans(db)
+    else:
+        app.state.index_task = asyncio.create_task(ensure_indexes(db))
+
+@app.on_event("startup")
+async def start_history_sampler():
+    app.state.history_task = asyncio.create_task(ensure_collections(db))
+    history_sampler.start()
+
+@app.on_event("shutdown")
+async def shutdown_history_sampler():
+    await history_sampler.stop()
+
+@app.on_event("startup")
+async def warm_up_signature_verifier():
+    try:
+        await signature_verifier.warm_up()
+    except Exception as e:
+        logger.error(f"Signature pool warm-up failed: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_signature_verifier():
+    signature_verifier.close()
+
+@app.on_event("startup")
+async def start_activity_buffer():
+    activity_buffer.start()
+
+@app.on_event("startup")
+async def start_order_book():
+    order_book_loader.start()
+
+@app.on_event("shutdown")
+async def shutdown_order_book():
+    await order_book_loader.stop()
+
+@app.on_event("startup")
+async def start_gallery_index():
+    gallery_loader.start()
+
+@app.on_event("shutdown")
+async def shutdown_gallery_index():
+    await gallery_loader.stop()
+
+@app.on_event("startup")
+async def start_shared_cache():
+    shared_cache.start()
+
+@app.on_event("startup")
+async def start_price_refresher():
+    price_refresher.start()
+
+@app.on_event("startup")
+async def start_stream_hub():
+    await stream_hub.start()
+
+@app.on_event("shutdown")
+async def shutdown_stream_hub():
+    await stream_hub.stop()
+
+@app.on_event("startup")
+async def start_simulation_pool():
+    global simulation_executor
+    if SIMULATION_WORKERS > 0:
+        # spawn: forking a process with a running event loop and Mongo client is unsafe
+        simulation_executor = ProcessPoolExecutor(SIMULATION_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+@app.on_event("shutdown")
+async def shutdown_simulation_pool():
+    if simulation_executor is not None:
+        simulation_executor.shutdown(cancel_futures=True)
+
+@app.on_event("shutdown")
+async def shutdown_price_service():
+    await price_refresher.stop()
+    await price_service.close()
+
+# Last, after the price refresher and the stream hub can no longer write to it
+@app.on_event("shutdown")
+async def shutdown_shared_cache():
+    await shared_cache.stop()
+    shared_cache.close()
@@ -0,0 +1,281 @@
+"""Two-tier cache shared by the workers on one host.
+
+``SharedCache`` keeps an in-process LRU with per-entry TTLs in front of an
+optional ``SqliteStore``: a SQLite file (WAL mode) that every worker on the
+host opens, so one worker's Mongo read or CoinGecko fetch serves the others.
+Values are JSON. Keys live in namespaces, and ``invalidate(namespace)`` bumps
+the namespace's generation in the file; entries stored under an older
+generation are ignored by every tier. Other workers pick the bump up from a
+poll every ``sync_interval`` seconds, so they can serve a stale local entry
+for at most that long after an invalidation. Without a store the cache is
+local to the worker.
+
+SQLite calls run on one dedicated thread so a locked file never blocks the
+event loop.
+"""
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+# Expired rows are deleted on every this many writes
+PURGE_EVERY = 500
+
+
+class SqliteStore:
+    """Entries and namespace generations in one SQLite file; every method is blocking"""
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, generation INTEGER NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_generations (namespace TEXT PRIMARY KEY, generation INTEGER NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, namespace: str, keys: Iterable[str], now: float) -> Dict[str, Tuple[str, float, int]]:
+        """key -> (JSON value, expires_at, generation) for live entries of the current generation"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        rows = self._connection().execute(
+            "SELECT e.key, e.value, e.expires_at, e.generation FROM cache_entries e "
+            "LEFT JOIN cache_generations g ON g.namespace = e.namespace "
+            f"WHERE e.namespace = ? AND e.key IN ({','.join('?' * len(keys))}) "
+            "AND e.expires_at > ? AND e.generation = COALESCE(g.generation, 0)",
+            [namespace, *keys, now],
+        ).fetchall()
+        return {key: (value, expires_at, generation) for key, value, expires_at, generation in rows}
+
+    def set_many(self, namespace: str, items: Dict[str, str], expires_at: float, generation: int):
+        """Store JSON values, unless the namespace was invalidated after ``generation`` was read"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT generation FROM cache_generations WHERE namespace = ?", (namespace,)).fetchone()
+            if (row[0] if row else 0) == generation:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, generation) VALUES (?, ?, ?, ?, ?)",
+                    [(namespace, key, value, expires_at, generation) for key, value in items.items()],
+                )
+            self._writes += 1
+            if self._writes % PURGE_EVERY == 0:
+                conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def bump(self, namespace: str) -> int:
+        """Invalidate ``namespace``; returns its new generation"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            generation = conn.execute(
+                "INSERT INTO cache_generations (namespace, generation) VALUES (?, 1) "
+                "ON CONFLICT (namespace) DO UPDATE SET generation = generation + 1 RETURNING generation",
+                (namespace,),
+            ).fetchone()[0]
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND generation < ?", (namespace, generation))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return generation
+
+    def generations(self) -> Dict[str, int]:
+        return dict(self._connection().execute("SELECT namespace, generation FROM cache_generations").fetchall())
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class SharedCache:
+    """In-process LRU + TTL tier in front of an optional ``SqliteStore`` shared by workers"""
+
+    def __init__(self, store: Optional[SqliteStore] = None, max_entries: int = 1024, sync_interval: float = 1.0,
+                 clock: Callable[[], float] = time.time):
+        self.store = store
+        self.max_entries = max_entries
+        self.sync_interval = sync_interval
+        self._clock = clock  # wall clock: expiry times are compared across processes
+        self._local: "OrderedDict[Tuple[str, str], Tuple[object, float, int]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def get(self, namespace: str, key: str, default=None):
+        value = (await self.get_many(namespace, [key])).get(key, _MISSING)
+        return default if value is _MISSING else value
+
+    async def get_many(self, namespace: str, keys: Iterable[str]) -> Dict[str, object]:
+        """Cached values for the keys that have one; local tier first, then the shared store"""
+        found, missing = {}, []
+        for key in keys:
+            value = self._get_local(namespace, key)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing and self.store is not None:
+            try:
+                rows = await self._run(self.store.get_many, namespace, missing, self._clock())
+            except sqlite3.Error as e:
+                logger.warning(f"Shared cache read failed: {e}")
+                rows = {}
+            for key, (raw, expires_at, stored_generation) in rows.items():
+                if stored_generation < self.generation(namespace):
+                    continue  # invalidated here while the read was in flight
+                if stored_generation > self.generation(namespace):
+                    self._adopt(namespace, stored_generation)  # another worker invalidated since the last sync
+                value = json.loads(raw)
+                self._set_local(namespace, key, value, expires_at, stored_generation)
+                found[key] = value
+        return found
+
+    async def set(self, namespace: str, key: str, value, ttl: float, generation: Optional[int] = None):
+        await self.set_many(namespace, {key: value}, ttl, generation)
+
+    async def set_many(self, namespace: str, items: Dict[str, object], ttl: float, generation: Optional[int] = None):
+        """Store in both tiers; pass the ``generation()`` read before loading so stale loads are dropped"""
+        if generation is None:
+            generation = self.generation(namespace)
+        if generation != self.generation(namespace) or not items:
+            return
+        expires_at = self._clock() + ttl
+        for key, value in items.items():
+            self._set_local(namespace, key, value, expires_at, generation)
+        if self.store is not None:
+            encoded = {key: json.dumps(value, separators=(",", ":")) for key, value in items.items()}
+            try:
+                await self._run(self.store.set_many, namespace, encoded, expires_at, generation)
+            except sqlite3.Error as e:
+                logger.warning(f"Shared cache write failed: {e}")
+
+    async def get_or_load(self, namespace: str, key: str, load: Callable[[], Awaitable[object]], ttl: float):
+        """Cached value, or ``await load()`` stored for ``ttl`` seconds; concurrent misses share one load"""
+        value = await self.get(namespace, key, _MISSING)
+        if value is not _MISSING:
+            return value
+        inflight = self._inflight.get((namespace, key))
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._load(namespace, key, load, ttl))
+            self._inflight[(namespace, key)] = inflight
+            inflight.add_done_callback(lambda f: self._inflight.pop((namespace, key), None))
+        return await asyncio.shield(inflight)
+
+    async def _load(self, namespace: str, key: str, load, ttl: float):
+        generation = self.generation(namespace)
+        value = await load()
+        await self.set(namespace, key, value, ttl, generation)
+        return value
+
+    def clear(self):
+        """Drop this worker's local tier"""
+        self._local.clear()
+
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    async def invalidate(self, namespace: str):
+        """Drop ``namespace`` in this worker now and in the others within ``sync_interval``"""
+        # Ahead of the store's bump, so nothing cached before this call is served meanwhile
+        self._generations[namespace] = self.generation(namespace) + 1
+        self._drop_local(namespace)
+        if self.store is not None:
+            try:
+                generation = await self._run(self.store.bump, namespace)
+            except sqlite3.Error as e:
+                logger.warning(f"Shared cache invalidation failed: {e}")
+                return
+            self._generations[namespace] = max(self.generation(namespace), generation)
+
+    async def sync(self):
+        """Adopt generations bumped by other workers"""
+        if self.store is None:
+            return
+        for namespace, generation in (await self._run(self.store.generations)).items():
+            if generation > self.generation(namespace):
+                self._adopt(namespace, generation)
+
+    def start(self):
+        if self.store is not None and self._task is None:
+            self._task = asyncio.create_task(self._run_sync())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def close(self):
+        """Close the store's connection; the next use reopens it"""
+        if self._executor is not None:
+            self._executor.submit(self.store.close)
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _run_sync(self):
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.warning(f"Shared cache sync failed: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    def _run(self, fn, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix="shared-cache")
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _get_local(self, namespace: str, key: str):
+        entry = self._local.get((namespace, key))
+        if entry is None:
+            return _MISSING
+        value, expires_at, generation = entry
+        if expires_at <= self._clock() or generation != self.generation(namespace):
+            del self._local[(namespace, key)]
+            return _MISSING
+        self._local.move_to_end((namespace, key))
+        return value
+
+    def _set_local(self, namespace: str, key: str, value, expires_at: float, generation: int):
+        self._local[(namespace, key)] = (value, expires_at, generation)
+        self._local.move_to_end((namespace, key))
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    def _adopt(self, namespace: str, generation: int):
+        self._generations[namespace] = generation
+        self._drop_local(namespace)
+
+    def _drop_local(self, namespace: str):
+        for cache_key in [cache_key for cache_key in self._local if cache_key[0] == namespace]:
+            del self._local[cache_key]
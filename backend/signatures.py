@@ -0,0 +1,98 @@
+"""Wallet signature recovery off the event loop.
+
+``Account.recover_message`` is a CPU-bound secp256k1 recovery (several ms in
+pure Python). ``SignatureVerifier`` runs it in a small thread or process
+pool, admits at most ``max_workers`` recoveries at a time and rejects new
+ones once ``max_pending`` are running or waiting, so a login burst gets fast
+503s instead of stalling every other request.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+
+class VerifierOverloaded(Exception):
+    """Raised when too many signature recoveries are already queued"""
+
+
+def recover_address(message: str, signature: str) -> str:
+    """Address that signed ``message`` (EIP-191 personal_sign)"""
+    return Account.recover_message(encode_defunct(text=message), signature=signature)
+
+
+def _warm_up() -> bool:
+    # A throwaway recovery loads the curve code and its tables in the worker
+    account = Account.create()
+    message = encode_defunct(text="warm-up")
+    Account.recover_message(message, signature=Account.sign_message(message, account.key).signature)
+    return True
+
+
+class SignatureVerifier:
+    def __init__(self, max_workers: int = 2, max_pending: int = 64, use_processes: bool = True):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _ensure_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                # spawn: forking a process with a running event loop and Mongo client is unsafe
+                self._executor = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="signature")
+            self._slots = asyncio.Semaphore(self.max_workers)
+        return self._executor
+
+    async def warm_up(self):
+        """Start every worker and run one recovery in each"""
+        executor = self._ensure_executor()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(executor, _warm_up) for _ in range(self.max_workers)))
+
+    async def recover(self, message: str, signature: str) -> str:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise VerifierOverloaded(f"{self.pending} signature checks already pending")
+        executor = self._ensure_executor()
+        self.pending += 1
+        try:
+            # Waiting here rather than in the executor's queue keeps the backlog visible and bounded
+            async with self._slots:
+                address = await asyncio.get_running_loop().run_in_executor(executor, recover_address, message, signature)
+            self.completed += 1
+            return address
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool on the next call instead of failing every login
+            if self._executor is executor:
+                self.close()
+            raise
+        finally:
+            self.pending -= 1
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._slots = None
+
+    def status(self) -> dict:
+        return {
+            "pool": "process" if self.use_processes else "thread",
+            "workers": self.max_workers,
+            "running": min(self.pending, self.max_workers),
+            "queued": max(0, self.pending - self.max_workers),
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,128 @@
+"""Monte Carlo simulation of the buyback/burn loop.
+
+Every path draws daily volume (lognormal around ``daily_volume``), a
+geometric random walk for the market floor and whether the buyback executes
+that day. Executed buybacks spend the accumulated NFT budget on whole NFTs at
+the current floor and burn ``burn_percentage`` of them; the floor carries the
+same ``(supply_0 / supply) ** k`` impact as /api/calculator.
+
+Paths are simulated in fixed chunks of CHUNK_PATHS, each with its own child
+of ``SeedSequence(seed)``, so a seed gives the same bands whether chunks run
+in this process or in a process pool.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+CHUNK_PATHS = 10_000
+MAX_PATHS = 100_000
+MAX_BAND_POINTS = 50
+METRICS = ("floor_price", "supply", "nfts_burned", "treasury_inflow")
+
+
+@dataclass(frozen=True)
+class SimulationParams:
+    nft_price: float
+    current_supply: int
+    time_horizon: int
+    daily_volume: float
+    volume_volatility: float
+    price_drift: float
+    price_volatility: float
+    execution_probability: float
+    fee_percentage: float
+    buyback_nft_percentage: float
+    burn_percentage: float
+    impact_strength: float
+
+
+def band_days(time_horizon: int) -> List[int]:
+    """Days (1-based) at which the bands are sampled"""
+    points = min(time_horizon, MAX_BAND_POINTS)
+    return np.unique(np.rint(np.linspace(1, time_horizon, points)).astype(np.int64)).tolist()
+
+
+def simulate_chunk(params: SimulationParams, seed: np.random.SeedSequence, paths: int) -> Dict[str, np.ndarray]:
+    """Simulate ``paths`` paths; returns one (len(band_days), paths) float32 array per metric"""
+    rng = np.random.default_rng(seed)
+    days = band_days(params.time_horizon)
+    recorded = {metric: np.empty((len(days), paths), dtype=np.float32) for metric in METRICS}
+
+    initial_supply = float(params.current_supply)
+    fee = params.fee_percentage / 100
+    nft_share = params.buyback_nft_percentage / 100
+    burn_share = params.burn_percentage / 100
+    sigma_v = params.volume_volatility
+    sigma_p = params.price_volatility
+
+    log_market = np.zeros(paths)
+    supply = np.full(paths, initial_supply)
+    budget = np.zeros(paths)
+    burned = np.zeros(paths)
+    inflow_total = np.zeros(paths)
+
+    row = 0
+    for day in range(1, params.time_horizon + 1):
+        # Mean-preserving lognormal volume; log-drift corrected so E[market] grows by price_drift
+        volume = params.daily_volume * rng.lognormal(-sigma_v ** 2 / 2, sigma_v, paths)
+        log_market += rng.normal(params.price_drift - sigma_p ** 2 / 2, sigma_p, paths)
+        executed = rng.random(paths) < params.execution_probability
+
+        inflow = volume * fee
+        inflow_total += inflow
+        budget += inflow * nft_share
+
+        floor_price = params.nft_price * np.exp(log_market) * (initial_supply / supply) ** params.impact_strength
+        bought = np.where(executed, np.floor(budget / floor_price), 0.0)
+        budget -= bought * floor_price
+        # Never burn the last NFT; the impact term needs a positive supply
+        burn = np.minimum(bought * burn_share, supply - 1)
+        burned += burn
+        supply -= burn
+
+        if day == days[row]:
+            recorded["floor_price"][row] = params.nft_price * np.exp(log_market) * (initial_supply / supply) ** params.impact_strength
+            recorded["supply"][row] = supply
+            recorded["nfts_burned"][row] = burned
+            recorded["treasury_inflow"][row] = inflow_total
+            row += 1
+    return recorded
+
+
+def _chunks(paths: int, seed: int) -> List[tuple]:
+    sizes = [min(CHUNK_PATHS, paths - start) for start in range(0, paths, CHUNK_PATHS)]
+    return list(zip(np.random.SeedSequence(seed).spawn(len(sizes)), sizes))
+
+
+def _bands(chunks: List[Dict[str, np.ndarray]], percentiles: Sequence[float]) -> Dict[str, Dict[str, list]]:
+    bands = {}
+    for metric in METRICS:
+        values = np.concatenate([chunk[metric] for chunk in chunks], axis=1)
+        quantiles = np.percentile(values, percentiles, axis=1)
+        bands[metric] = {f"p{q:g}": np.round(quantiles[i].astype(np.float64), 6).tolist() for i, q in enumerate(percentiles)}
+    return bands
+
+
+def _simulate_serial(params: SimulationParams, paths: int, seed: int, percentiles: Sequence[float]):
+    return _bands([simulate_chunk(params, child, size) for child, size in _chunks(paths, seed)], percentiles)
+
+
+async def simulate(params: SimulationParams, paths: int, seed: int, percentiles: Sequence[float], executor=None) -> Dict[str, Dict[str, list]]:
+    """Percentile bands per metric; chunks go to ``executor`` (e.g. a process pool) when given"""
+    if paths > MAX_PATHS:
+        raise ValueError(f"At most {MAX_PATHS} paths per simulation")
+    if executor is None:
+        return await asyncio.to_thread(_simulate_serial, params, paths, seed, percentiles)
+    loop = asyncio.get_running_loop()
+    chunks = await asyncio.gather(*(
+        loop.run_in_executor(executor, simulate_chunk, params, child, size)
+        for child, size in _chunks(paths, seed)
+    ))
+    return await asyncio.to_thread(_bands, chunks, percentiles)
+
+
+def new_seed() -> int:
+    """Fresh 63-bit seed, returned to clients so a run can be replayed"""
+    return int(np.random.SeedSequence().generate_state(1, dtype=np.uint64)[0] >> 1)
@@ -0,0 +1,226 @@
+"""In-memory, versioned snapshot of the mini-app strategy state"""
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, List, Optional
+
+# Served when no strategy_state document exists yet
+DEFAULT_STRATEGY_STATE = {
+    "treasury": {
+        "eth_balance": 24.73,
+        "target_eth_per_buyback": 3.0
+    },
+    "nft_supply": {
+        "total_minted": 5000,
+        "burned": 312,
+        "strategy_owned": 148,
+        "market_circulating": 4540
+    },
+    "activity": {
+        "nft_bought_total": 460,
+        "nft_sold_total": 312,
+        "eth_spent_on_buybacks": 128.4,
+        "eth_received_from_sales": 96.1
+    },
+    "market": {
+        "floor_price_eth": 1.24,
+        "strategy_avg_buy_price": 1.05,
+        "strategy_avg_sell_price": 1.18
+    },
+    "liquidity": {
+        "eth_in_lp": 42.0,
+        "token_in_lp": 120000
+    },
+    "distribution": {
+        "buyback_nft_pct": 40,
+        "buyback_token_pct": 30,
+        "liquidity_pct": 20,
+        "dev_pct": 10
+    },
+    "orderbook": [
+        {"price": 1.1, "count": 4},
+        {"price": 1.15, "count": 7},
+        {"price": 1.2, "count": 12}
+    ],
+    "history": [
+        {"date": "2024-12-01", "floor": 0.92, "strategy_buy": 0.88, "burned_total": 180, "buyback_event": True},
+        {"date": "2024-12-08", "floor": 0.98, "strategy_buy": 0.92, "burned_total": 200, "buyback_event": False},
+        {"date": "2024-12-15", "floor": 1.05, "strategy_buy": 0.96, "burned_total": 240, "buyback_event": False},
+        {"date": "2024-12-22", "floor": 1.15, "strategy_buy": 1.00, "burned_total": 280, "buyback_event": True},
+        {"date": "2024-12-29", "floor": 1.24, "strategy_buy": 1.05, "burned_total": 312, "buyback_event": False}
+    ],
+    "nfts": [
+        {"token_id": 124, "price_eth": 1.12, "owner": "strategy", "status": "available", "burn_candidate": False, "image": "https://images.unsplash.com/photo-1764437358350-e324534072d7?w=400"},
+        {"token_id": 128, "price_eth": 1.08, "owner": "market", "status": "available", "burn_candidate": True, "image": "https://images.unsplash.com/photo-1759270463164-dcd9af6fc77c?w=400"},
+        {"token_id": 135, "price_eth": 1.22, "owner": "strategy", "status": "available", "burn_candidate": False, "image": "https://images.unsplash.com/photo-1763920999620-f76ea1aeb3ac?w=400"},
+        {"token_id": 142, "price_eth": 1.15, "owner": "market", "status": "available", "burn_candidate": False, "image": "https://images.unsplash.com/photo-1759270463255-70ef839296bd?w=400"},
+        {"token_id": 156, "price_eth": 1.18, "owner": "strategy", "status": "listed", "burn_candidate": False, "image": "https://images.unsplash.com/photo-1764437358350-e324534072d7?w=400"},
+        {"token_id": 189, "price_eth": 1.09, "owner": "market", "status": "available", "burn_candidate": True, "image": "https://images.unsplash.com/photo-1759270463164-dcd9af6fc77c?w=400"}
+    ]
+}
+
+
+# Shared-cache namespaces: the snapshot is dropped by update(), its version numbering never is
+STATE_CACHE_NAMESPACE = "strategy_state"
+STATE_VERSION_NAMESPACE = "strategy_state_version"
+STATE_VERSION_TTL = 30 * 86400
+
+# Arrays of row objects that ?format=columnar sends as one array per key
+COLUMNAR_FIELDS = ("nfts", "history", "orderbook")
+
+
+def to_columns(rows: List[dict]) -> Dict[str, list]:
+    """One array per key (in first-seen order), with null where a row lacks the key"""
+    keys = {}
+    for row in rows:
+        keys.update(dict.fromkeys(row))
+    return {key: [row.get(key) for row in rows] for key in keys}
+
+
+def columnar_state(data: dict) -> dict:
+    return {**data, **{name: to_columns(data[name]) for name in COLUMNAR_FIELDS if name in data}}
+
+
+def encode_state(data: dict) -> bytes:
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+@dataclass(frozen=True)
+class StateSnapshot:
+    """Validated strategy state, pre-serialized for the wire"""
+    version: int
+    etag: str
+    data: dict
+    body: bytes
+    _variants: dict = field(default_factory=dict, compare=False, repr=False)
+
+    def variant(self, key: Hashable, build: Callable[[], bytes]) -> bytes:
+        """Another encoding of this snapshot (columnar, compressed), built on first use"""
+        body = self._variants.get(key)
+        if body is None:
+            body = self._variants[key] = build()
+        return body
+
+
+class StrategyStateCache:
+    """Caches the serialized strategy state document.
+
+    The snapshot is reloaded from Mongo at most every ``max_age`` seconds, or
+    on the next read after ``invalidate()``. ``version`` only increases when
+    the serialized content actually changes; the ETag is derived from the
+    content so it is stable across workers and restarts.
+
+    With a ``shared`` cache (see shared_cache.py), a reload first takes the
+    snapshot another worker read from Mongo less than ``max_age`` ago, and
+    versions are numbered in the shared cache so every worker serves the same
+    version for the same content. ``invalidate()`` still goes to Mongo.
+    """
+
+    def __init__(self, collection, validate: Callable[[dict], dict], max_age: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic, shared=None):
+        self.collection = collection
+        self.validate = validate
+        self.max_age = max_age
+        self.shared = shared
+        self._clock = clock
+        self._snapshot: Optional[StateSnapshot] = None
+        self._loaded_at = 0.0
+        self._stale = True
+        self._skip_shared = False
+        self._default: Optional[dict] = None
+        self._loading: Optional[asyncio.Future] = None
+        self._listeners: List[Callable[[], None]] = []
+
+    async def get(self) -> StateSnapshot:
+        if self._snapshot is not None and not self._stale and self._clock() - self._loaded_at < self.max_age:
+            return self._snapshot
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._load())
+            self._loading.add_done_callback(self._on_load_done)
+        return await asyncio.shield(self._loading)
+
+    def invalidate(self):
+        """Force the next read to reload from Mongo"""
+        self._stale = True
+        self._skip_shared = True
+
+    def add_listener(self, callback: Callable[[], None]):
+        """Call ``callback`` after every write made through update()"""
+        self._listeners.append(callback)
+
+    async def update(self, fields: dict):
+        """Write top-level state fields and invalidate the snapshot"""
+        await self.collection.update_one({}, {"$set": fields}, upsert=True)
+        self.invalidate()
+        if self.shared is not None:
+            await self.shared.invalidate(STATE_CACHE_NAMESPACE)
+        for callback in self._listeners:
+            callback()
+
+    def _on_load_done(self, future: asyncio.Future):
+        self._loading = None
+        if not future.cancelled():
+            future.exception()  # surfaced to the awaiting callers
+
+    async def _load(self) -> StateSnapshot:
+        # Anything written after this point must trigger another reload
+        self._stale = False
+        skip_shared, self._skip_shared = self._skip_shared, False
+        try:
+            cached = None
+            if self.shared is not None and not skip_shared:
+                cached = await self.shared.get(STATE_CACHE_NAMESPACE, "current")
+            if cached is None:
+                generation = self.shared.generation(STATE_CACHE_NAMESPACE) if self.shared is not None else 0
+                doc = await self.collection.find_one({}, {"_id": 0})
+                if doc is None:
+                    doc = self._default_state()
+                data = self.validate(doc)
+        except Exception:
+            self._stale = True
+            self._skip_shared = skip_shared
+            raise
+
+        if cached is not None:
+            data, etag, version = cached["data"], cached["etag"], cached["version"]
+            # Expire when the worker that read Mongo would have
+            loaded_at = self._clock() - max(0.0, time.time() - cached["loaded_at"])
+            body = None
+        else:
+            body = encode_state(data)
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            version = await self._next_version(etag)
+            loaded_at = self._clock()
+            if self.shared is not None:
+                current = {"version": version, "etag": etag, "data": data, "loaded_at": time.time()}
+                await self.shared.set(STATE_CACHE_NAMESPACE, "current", current, self.max_age, generation)
+
+        previous = self._snapshot
+        if previous is not None and previous.etag == etag and previous.version == version:
+            snapshot = previous
+        else:
+            snapshot = StateSnapshot(version=version, etag=etag, data=data, body=body or encode_state(data))
+        self._snapshot = snapshot
+        self._loaded_at = loaded_at
+        return snapshot
+
+    async def _next_version(self, etag: str) -> int:
+        """Version for content ``etag``: unchanged content keeps its version"""
+        previous = self._snapshot
+        version = previous.version + (previous.etag != etag) if previous is not None else 1
+        if self.shared is None:
+            return version
+        last = await self.shared.get(STATE_VERSION_NAMESPACE, "last")
+        if last is not None:
+            version = max(version, last["version"] + (last["etag"] != etag))
+        if last != {"version": version, "etag": etag}:
+            await self.shared.set(STATE_VERSION_NAMESPACE, "last", {"version": version, "etag": etag}, STATE_VERSION_TTL)
+        return version
+
+    def _default_state(self) -> dict:
+        # Built once so the default payload (and its ETag) stays stable
+        if self._default is None:
+            self._default = {"timestamp": int(time.time()), **DEFAULT_STRATEGY_STATE}
+        return self._default
@@ -0,0 +1,238 @@
+"""Shared push fan-out of strategy state and price snapshots"""
+import asyncio
+import json
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from pymongo.errors import PyMongoError
+
+from strategy_state import StateSnapshot, StrategyStateCache
+
+logger = logging.getLogger(__name__)
+
+# Quote fields that count as a price change (last_updated moves on every refresh)
+PRICE_FIELDS = ("price_usd", "price_change_24h", "market_cap", "volume_24h")
+
+
+# ============ Change notifiers ============
+class LocalChangeNotifier:
+    """In-process change signal; writers call notify(), the hub waits on it"""
+
+    def __init__(self):
+        self._event = asyncio.Event()
+
+    def notify(self):
+        self._event.set()
+
+    async def wait(self):
+        await self._event.wait()
+        self._event.clear()
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class PollingChangeNotifier(LocalChangeNotifier):
+    """Wakes on notify() or every ``interval`` seconds, whichever comes first"""
+
+    def __init__(self, interval: float = 2.0):
+        super().__init__()
+        self.interval = interval
+
+    async def wait(self):
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout=self.interval)
+        except asyncio.TimeoutError:
+            pass
+        self._event.clear()
+
+
+class ChangeStreamNotifier(PollingChangeNotifier):
+    """Notifies from a Mongo change stream on ``collection``.
+
+    Change streams need a replica set; on a standalone mongod this falls back
+    to polling every ``interval`` seconds.
+    """
+
+    def __init__(self, collection, interval: float = 2.0):
+        super().__init__(interval)
+        self.collection = collection
+        self._poll_interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self):
+        try:
+            async with self.collection.watch() as stream:
+                # Only rely on the stream once it is actually open
+                self.interval = max(self.interval, 60.0)
+                async for _ in stream:
+                    self.notify()
+        except PyMongoError as e:
+            self.interval = self._poll_interval
+            logger.info(f"Change streams unavailable ({e}); polling every {self.interval}s")
+
+
+# ============ Fan-out ============
+class StreamEvent:
+    """One published update; the wire payload is encoded once for all subscribers"""
+
+    def __init__(self, kind: str, version: int, data: dict, changes: dict):
+        self.kind = kind
+        self.version = version
+        self.data = data
+        self.changes = changes
+        self._encoded: Dict[bool, str] = {}
+
+    def payload(self, full: bool) -> str:
+        if full not in self._encoded:
+            message = {"event": self.kind, "version": self.version, "full": full}
+            if full:
+                message["data"] = self.data
+            else:
+                message["changes"] = self.changes
+            self._encoded[full] = json.dumps(message, separators=(",", ":"))
+        return self._encoded[full]
+
+    def sse(self, full: bool) -> str:
+        return f"event: {self.kind}\nid: {self.kind}-{self.version}\ndata: {self.payload(full)}\n\n"
+
+
+class Subscription:
+    """Bounded per-client queue of (event, full) pairs"""
+
+    def __init__(self, maxsize: int):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(maxsize, 2))
+        self.dropped = 0
+
+    def offer(self, event: StreamEvent, full: bool = False) -> bool:
+        try:
+            self._queue.put_nowait((event, full))
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def reset(self, events: List[StreamEvent]):
+        """Drop the backlog of a slow client and queue full snapshots instead"""
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self.dropped += 1
+        for event in events:
+            self._queue.put_nowait((event, True))
+
+    async def get(self) -> Tuple[StreamEvent, bool]:
+        return await self._queue.get()
+
+
+class StrategyStreamHub:
+    """Publishes strategy state versions and price snapshots to all subscribers.
+
+    State is re-read through the shared StrategyStateCache when the notifier
+    fires, so one Mongo read serves every connected client. Subscribers get
+    full snapshots first and deltas (changed top-level keys / coins) after
+    that. A subscriber that falls ``queue_size`` events behind has its backlog
+    replaced by the latest full snapshots.
+    """
+
+    def __init__(self, state_cache: StrategyStateCache, notifier: LocalChangeNotifier, queue_size: int = 16):
+        self.state_cache = state_cache
+        self.notifier = notifier
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscription] = set()
+        self._latest: Dict[str, StreamEvent] = {}
+        self._state: Optional[StateSnapshot] = None
+        self._prices: Dict[str, dict] = {}
+        self._prices_version = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    async def start(self):
+        await self.notifier.start()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.notifier.stop()
+
+    async def _run(self):
+        while True:
+            await self.notifier.wait()
+            if not self._subscribers:
+                continue
+            try:
+                await self.refresh_state()
+            except Exception as e:
+                logger.error(f"Error refreshing streamed strategy state: {e}")
+
+    async def refresh_state(self):
+        """Reload the state snapshot and publish it if the version moved"""
+        self.state_cache.invalidate()
+        snapshot = await self.state_cache.get()
+        previous = self._state
+        if previous is not None and previous.version == snapshot.version:
+            return
+        self._state = snapshot
+        if previous is None:
+            changes = snapshot.data
+        else:
+            changes = {key: value for key, value in snapshot.data.items() if previous.data.get(key) != value}
+        self._publish(StreamEvent("state", snapshot.version, snapshot.data, changes))
+
+    def publish_prices(self, quotes: Dict[str, Optional[dict]]):
+        """Publish the coins whose quotes changed since the last snapshot"""
+        changes = {}
+        for coin_id, quote in quotes.items():
+            if quote is None:
+                continue
+            previous = self._prices.get(coin_id)
+            if previous is None or any(previous.get(f) != quote.get(f) for f in PRICE_FIELDS):
+                changes[coin_id] = quote
+        if not changes:
+            return
+        self._prices = {**self._prices, **changes}
+        self._prices_version += 1
+        self._publish(StreamEvent("prices", self._prices_version, self._prices, changes))
+
+    def _publish(self, event: StreamEvent):
+        self._latest[event.kind] = event
+        for subscription in list(self._subscribers):
+            if not subscription.offer(event):
+                subscription.reset(list(self._latest.values()))
+
+    async def subscribe(self) -> Subscription:
+        # While nobody is subscribed the hub stops following changes
+        if self._state is None or not self._subscribers:
+            await self.refresh_state()
+        subscription = Subscription(self.queue_size)
+        for event in self._latest.values():
+            subscription.offer(event, full=True)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
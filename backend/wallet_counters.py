@@ -0,0 +1,130 @@
+"""Per-wallet profile counters kept on ``wallet_sessions``.
+
+``total_transactions`` counts transactions with the wallet's
+``wallet_address`` and ``nfts_owned`` counts NFTs whose ``owner_address`` is
+the wallet. Writers apply ``$inc`` as they insert or reassign documents, so
+``GET /api/auth/me`` reads one document. Increments upsert: a wallet can own
+NFTs before it first logs in, and its counters are waiting when it does.
+
+``reconcile`` recounts from the collections and rewrites only the counters
+that drifted. Run ``python wallet_counters.py`` from the backend directory
+after deploying (sessions created earlier have no counters) and whenever
+documents were changed outside the API. Writes that land while it runs can
+be overwritten by a count taken just before them; the next run corrects that.
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+WALLET_COUNTER_FIELDS = ("total_transactions", "nfts_owned")
+RECONCILE_BATCH = 1000
+
+
+def add_wallet_inc(incs: Dict[str, Dict[str, int]], wallet: Optional[str], field: str, amount: int = 1):
+    """Accumulate ``amount`` on ``wallet``'s ``field`` (no-op without a wallet)"""
+    if wallet and amount:
+        fields = incs.setdefault(wallet, {})
+        fields[field] = fields.get(field, 0) + amount
+
+
+def nft_owner_inc(old_owner: Optional[str], new_owner: Optional[str]) -> Dict[str, Dict[str, int]]:
+    """Per-wallet $inc for an NFT created with, or moved between, owners"""
+    incs: Dict[str, Dict[str, int]] = {}
+    if old_owner != new_owner:
+        add_wallet_inc(incs, old_owner, "nfts_owned", -1)
+        add_wallet_inc(incs, new_owner, "nfts_owned", 1)
+    return incs
+
+
+class WalletCounters:
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def increment(self, incs: Dict[str, Dict[str, int]]):
+        """Apply per-wallet increments in one unordered bulk write"""
+        requests = []
+        for wallet, fields in incs.items():
+            fields = {field: value for field, value in fields.items() if value}
+            if fields:
+                # A wallet that never logged in gets an inactive placeholder session
+                requests.append(UpdateOne(
+                    {"wallet_address": wallet},
+                    {"$inc": fields, "$setOnInsert": {"is_active": False}},
+                    upsert=True,
+                ))
+        if requests:
+            await self.collection.bulk_write(requests, ordered=False)
+
+    async def reconcile(self, db, wallets: Optional[List[str]] = None) -> int:
+        """Recount from transactions and nfts; returns how many sessions were corrected"""
+        tx_match = {"wallet_address": {"$in": wallets} if wallets is not None else {"$type": "string"}}
+        nft_match = {"owner_address": {"$in": wallets} if wallets is not None else {"$type": "string"}}
+        tx_rows, nft_rows = await asyncio.gather(
+            db.transactions.aggregate([
+                {"$match": tx_match},
+                {"$group": {"_id": "$wallet_address", "count": {"$sum": 1}}},
+            ]).to_list(None),
+            db.nfts.aggregate([
+                {"$match": nft_match},
+                {"$group": {"_id": "$owner_address", "count": {"$sum": 1}}},
+            ]).to_list(None),
+        )
+        actual: Dict[str, Dict[str, int]] = {}
+        for row in tx_rows:
+            actual.setdefault(row["_id"], {})["total_transactions"] = row["count"]
+        for row in nft_rows:
+            actual.setdefault(row["_id"], {})["nfts_owned"] = row["count"]
+
+        requests = []
+        seen = set()
+        # Sessions first: fixes counters that drifted, including ones that should now be zero
+        query = {"wallet_address": {"$in": wallets}} if wallets is not None else {}
+        cursor = self.collection.find(query, {"_id": 0, "wallet_address": 1, **{f: 1 for f in WALLET_COUNTER_FIELDS}})
+        async for session in cursor:
+            wallet = session["wallet_address"]
+            seen.add(wallet)
+            expected = {field: actual.get(wallet, {}).get(field, 0) for field in WALLET_COUNTER_FIELDS}
+            if any(session.get(field) != value for field, value in expected.items()):
+                requests.append(UpdateOne({"wallet_address": wallet}, {"$set": expected}))
+        # Then wallets that own documents but have no session yet
+        for wallet, fields in actual.items():
+            if wallet not in seen:
+                expected = {field: fields.get(field, 0) for field in WALLET_COUNTER_FIELDS}
+                requests.append(UpdateOne(
+                    {"wallet_address": wallet},
+                    {"$set": expected, "$setOnInsert": {"is_active": False}},
+                    upsert=True,
+                ))
+
+        for start in range(0, len(requests), RECONCILE_BATCH):
+            await self.collection.bulk_write(requests[start:start + RECONCILE_BATCH], ordered=False)
+        return len(requests)
+
+
+async def _main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Rebuild drifted per-wallet counters on wallet_sessions")
+    parser.add_argument("--wallet", action="append", help="only these wallets (repeatable)")
+    args = parser.parse_args(argv)
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    db = client[os.environ['DB_NAME']]
+    try:
+        wallets = [wallet.lower() for wallet in args.wallet] if args.wallet else None
+        fixed = await WalletCounters(db.wallet_sessions).reconcile(db, wallets)
+        print(f"Corrected counters on {fixed} wallet sessions")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main()))
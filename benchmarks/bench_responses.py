@@ -0,0 +1,147 @@
+"""Per-request cost of the default vs the FAST_RESPONSES response path.
+
+Serves /api/transactions and /api/nfts in-process from a collection stub that
+returns a ready page of documents, so the timings isolate what the response
+path costs (Mongo time is the same in both modes). Also times the
+serialization step on its own: response_model validation + json vs orjson.
+
+    python benchmarks/bench_responses.py [--requests 300] [--page 200]
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "forma_benchmark")
+
+import orjson  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+import server  # noqa: E402
+
+
+def make_docs(count: int):
+    now = datetime.now(timezone.utc)
+    transactions = [{
+        "id": str(uuid.uuid4()),
+        "type": ("buy", "sell", "burn")[i % 3],
+        "nft_token_id": 5000 + i % 500,
+        "amount": 1,
+        "price": 1.0 + (i % 100) / 100,
+        "timestamp": now - timedelta(minutes=i),
+        "description": f"NFT #{5000 + i % 500} acquired via buyback",
+    } for i in range(count)]
+    nfts = [{
+        "id": str(uuid.uuid4()),
+        "token_id": 5000 + i,
+        "name": f"Forma #{5000 + i}",
+        "image_url": "https://images.unsplash.com/photo-1764437358350-e324534072d7",
+        "purchase_price": 1.05,
+        "current_price": 1.12,
+        "purchase_date": now - timedelta(minutes=i),
+        "status": "owned",
+    } for i in range(count)]
+    return {"transactions": transactions, "nfts": nfts}
+
+
+class PageCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length):
+        return [dict(doc) for doc in self.docs[:length]]
+
+
+class PageCollection:
+    """find() returns the newest documents already in page order"""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query=None, projection=None):
+        return PageCursor(self.docs)
+
+
+class PageDatabase:
+    def __init__(self, docs):
+        self.transactions = PageCollection(docs["transactions"])
+        self.nfts = PageCollection(docs["nfts"])
+
+    def __getitem__(self, name):
+        return getattr(self, name)
+
+
+def time_requests(client: TestClient, path: str, requests: int) -> List[float]:
+    client.get(path)  # warm-up
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(path)
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200
+    return samples
+
+
+def time_serialization(docs: List[dict], model, rounds: int):
+    adapter = TypeAdapter(List[model])
+    start = time.perf_counter()
+    for _ in range(rounds):
+        # What FastAPI does for response_model: validate, dump to JSON-able python, json.dumps
+        json.dumps(adapter.dump_python(adapter.validate_python(docs), mode="json")).encode()
+    validated = (time.perf_counter() - start) / rounds
+    start = time.perf_counter()
+    for _ in range(rounds):
+        orjson.dumps(docs)
+    fast = (time.perf_counter() - start) / rounds
+    return validated, fast
+
+
+def ms(seconds: float) -> str:
+    return f"{seconds * 1000:8.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--page", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    docs = make_docs(args.page)
+    server.db = PageDatabase(docs)
+    client = TestClient(server.app)
+
+    print(f"{'route':34} {'default p50':>12} {'fast p50':>12} {'saved':>8}")
+    for path, collection, model in (
+        (f"/api/transactions?limit={args.page}", "transactions", server.Transaction),
+        (f"/api/nfts?limit={args.page}", "nfts", server.NFT),
+    ):
+        server.FAST_RESPONSES = False
+        default = statistics.median(time_requests(client, path, args.requests))
+        server.FAST_RESPONSES = True
+        fast = statistics.median(time_requests(client, path, args.requests))
+        print(f"{path:34} {ms(default):>12} {ms(fast):>12} {(1 - fast / default) * 100:7.1f}%")
+
+        validated, encoded = time_serialization(docs[collection], model, args.requests)
+        print(f"{'  serialization only':34} {ms(validated):>12} {ms(encoded):>12} {(1 - encoded / validated) * 100:7.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,526 @@
+"""Concurrent load test over every /api route, in process.
+
+Boots ``server.app`` (startup and shutdown hooks included) against
+mongomock-motor, or a throwaway database on a real mongod with
+``--mongo-url``, with CoinGecko replaced by a local stub. After seeding, each
+route is driven on its own by ``--concurrency`` clients, then all routes
+together in one shuffled mix. Reports p50/p95/p99 latency and requests per
+second per route and can save the results as a JSON baseline or compare
+against one.
+
+    python benchmarks/loadtest.py --save benchmarks/baseline.json
+    python benchmarks/loadtest.py --compare benchmarks/baseline.json
+
+The load generator shares the app's event loop, so latencies include client
+overhead; with mongomock they are dominated by its pure-Python queries.
+Compare runs on the same machine and backend, not against production.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import secrets
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "forma_loadtest")
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+from eth_account import Account  # noqa: E402
+from eth_account.messages import encode_defunct  # noqa: E402
+from fastapi.routing import APIRoute, APIWebSocketRoute  # noqa: E402
+
+import server  # noqa: E402
+from history import bucket_start  # noqa: E402
+from price_service import PriceService  # noqa: E402
+
+# Long-lived connections have no per-request latency to measure
+SKIPPED = {
+    "GET /api/strategy/stream": "server-sent event stream",
+    "WEBSOCKET /api/strategy/ws": "websocket",
+}
+
+STUB_QUOTES = {
+    "bitcoin": 67000.0,
+    "ethereum": 3400.0,
+    "solana": 150.0,
+}
+
+Call = Tuple[str, str, dict]  # method, url, httpx request kwargs
+SCENARIOS: Dict[str, Callable] = {}
+
+
+def scenario(key: str):
+    """Register ``async fn(ctx, n) -> List[Call]`` as the request generator for a route"""
+    def register(fn):
+        SCENARIOS[key] = fn
+        return fn
+    return register
+
+
+def route_keys() -> List[str]:
+    keys = []
+    for route in server.api_router.routes:
+        if isinstance(route, APIWebSocketRoute):
+            keys.append(f"WEBSOCKET {route.path}")
+        elif isinstance(route, APIRoute):
+            keys.extend(f"{method} {route.path}" for method in sorted(route.methods))
+    return keys
+
+
+# ============ Stubs and seed data ============
+def coingecko_stub(latency: float):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if latency:
+            await asyncio.sleep(latency)
+        ids = request.url.params.get("ids", "").split(",")
+        return httpx.Response(200, json={
+            coin_id: {"usd": price, "usd_24h_change": 1.5, "usd_market_cap": price * 1e7, "usd_24h_vol": price * 1e5}
+            for coin_id, price in STUB_QUOTES.items() if coin_id in ids
+        })
+    return handler
+
+
+class LoadContext:
+    """Seeded ids and the client used to prepare requests"""
+
+    def __init__(self, client: httpx.AsyncClient, db, rng: random.Random):
+        self.client = client
+        self.db = db
+        self.rng = rng
+        self.now = datetime.now(timezone.utc)
+        self.nft_ids: List[str] = []
+
+    async def seed(self, nfts: int, transactions: int, history_days: int):
+        statuses = ("owned", "owned", "listed", "sold")
+        docs = [{
+            "id": str(uuid.uuid4()),
+            "token_id": 5000 + i,
+            "name": f"Forma #{5000 + i}",
+            "image_url": "https://images.unsplash.com/photo-1764437358350-e324534072d7",
+            "purchase_price": round(self.rng.uniform(0.8, 1.2), 4),
+            "current_price": round(self.rng.uniform(0.9, 2.0), 2),
+            "purchase_date": self.now - timedelta(minutes=i * 7),
+            "status": statuses[i % len(statuses)],
+        } for i in range(nfts)]
+        if docs:
+            await self.db.nfts.insert_many(docs)
+        self.nft_ids = [doc["id"] for doc in docs]
+
+        kinds = ("buy", "buy", "sell", "burn")
+        docs = [{
+            "id": str(uuid.uuid4()),
+            "type": kinds[i % len(kinds)],
+            "nft_token_id": 5000 + self.rng.randrange(max(nfts, 1)),
+            "amount": 1,
+            "price": round(self.rng.uniform(0.9, 2.0), 4),
+            "timestamp": self.now - timedelta(minutes=i * 3),
+            "description": "seeded",
+        } for i in range(transactions)]
+        if docs:
+            await self.db.transactions.insert_many(docs)
+
+        start = bucket_start(self.now - timedelta(days=history_days), "hourly")
+        docs = [{
+            "_id": start + timedelta(hours=i),
+            "ts": start + timedelta(hours=i),
+            "floor": round(1.0 + 0.2 * np.sin(i / 24), 4),
+            "strategy_buy": 1.0,
+            "burned_total": i // 6,
+            "samples": 12,
+        } for i in range(history_days * 24)]
+        if docs:
+            await self.db.strategy_history_hourly.insert_many(docs)
+
+    async def sessions(self, n: int) -> List[str]:
+        """Tokens for ``n`` fresh active wallet sessions"""
+        wallets = [f"0x{secrets.token_hex(20)}" for _ in range(n)]
+        await self.db.wallet_sessions.insert_many([
+            {"wallet_address": wallet, "created_at": self.now, "last_active": self.now, "is_active": True}
+            for wallet in wallets
+        ])
+        return [server.create_jwt_token(wallet) for wallet in wallets]
+
+
+# ============ Scenarios ============
+@scenario("GET /api/")
+async def _root(ctx, n):
+    return [("GET", "/api/", {})] * n
+
+
+@scenario("POST /api/auth/nonce")
+async def _nonce(ctx, n):
+    return [("POST", "/api/auth/nonce", {"json": {"wallet_address": f"0x{secrets.token_hex(20)}"}}) for _ in range(n)]
+
+
+@scenario("POST /api/auth/verify")
+async def _verify(ctx, n):
+    # Each login needs its own issued nonce, so issue and sign them up front
+    calls = []
+    for _ in range(n):
+        account = Account.create()
+        response = await ctx.client.post("/api/auth/nonce", json={"wallet_address": account.address})
+        message = response.json()["message"]
+        signature = Account.sign_message(encode_defunct(text=message), account.key).signature.hex()
+        calls.append(("POST", "/api/auth/verify", {"json": {
+            "wallet_address": account.address, "message": message, "signature": signature,
+        }}))
+    return calls
+
+
+@scenario("GET /api/auth/verify/status")
+async def _verify_status(ctx, n):
+    return [("GET", "/api/auth/verify/status", {})] * n
+
+
+@scenario("GET /api/auth/me")
+async def _me(ctx, n):
+    # A few wallets polling repeatedly, like open app tabs
+    tokens = await ctx.sessions(min(n, 32))
+    return [("GET", "/api/auth/me", {"headers": {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}}) for i in range(n)]
+
+
+@scenario("POST /api/auth/logout")
+async def _logout(ctx, n):
+    tokens = await ctx.sessions(n)
+    return [("POST", "/api/auth/logout", {"headers": {"Authorization": f"Bearer {token}"}}) for token in tokens]
+
+
+@scenario("GET /api/nfts")
+async def _nfts(ctx, n):
+    return [("GET", "/api/nfts", {"params": {"limit": 50, **({"status": "listed"} if i % 2 else {})}}) for i in range(n)]
+
+
+@scenario("POST /api/nfts")
+async def _create_nft(ctx, n):
+    return [("POST", "/api/nfts", {"json": {
+        "token_id": 90000 + i, "name": f"Forma #{90000 + i}", "image_url": "https://example.com/nft.png",
+        "purchase_price": 1.0, "current_price": 1.1,
+    }}) for i in range(n)]
+
+
+@scenario("PATCH /api/nfts/{nft_id}")
+async def _update_nft(ctx, n):
+    return [("PATCH", f"/api/nfts/{ctx.rng.choice(ctx.nft_ids)}", {"json": {
+        "status": "listed", "current_price": round(ctx.rng.uniform(0.9, 2.0), 2),
+    }}) for _ in range(n)]
+
+
+@scenario("GET /api/transactions")
+async def _transactions(ctx, n):
+    return [("GET", "/api/transactions", {"params": {"limit": 50, **({"type": "buy"} if i % 2 else {})}}) for i in range(n)]
+
+
+@scenario("POST /api/transactions")
+async def _create_transaction(ctx, n):
+    return [("POST", "/api/transactions", {"json": {
+        "type": "buy", "nft_token_id": 5000, "amount": 1, "price": 1.05, "description": "load test",
+    }}) for _ in range(n)]
+
+
+@scenario("POST /api/transactions/bulk")
+async def _transactions_bulk(ctx, n):
+    rows = [{"type": "buy", "amount": 1, "price": 1.05, "description": "bulk"} for _ in range(50)]
+    return [("POST", "/api/transactions/bulk", {"json": rows})] * n
+
+
+@scenario("POST /api/nfts/bulk")
+async def _nfts_bulk(ctx, n):
+    rows = [{
+        "token_id": 95000 + i, "name": f"Forma #{95000 + i}", "image_url": "https://example.com/nft.png",
+        "purchase_price": 1.0, "current_price": 1.2, "status": "listed",
+    } for i in range(50)]
+    return [("POST", "/api/nfts/bulk", {"json": rows})] * n
+
+
+@scenario("GET /api/export/transactions")
+async def _export_transactions(ctx, n):
+    start = (ctx.now - timedelta(hours=6)).isoformat()
+    return [("GET", "/api/export/transactions", {"params": {"from": start, "format": ("ndjson", "csv")[i % 2]}}) for i in range(n)]
+
+
+@scenario("GET /api/export/nfts")
+async def _export_nfts(ctx, n):
+    start = (ctx.now - timedelta(hours=12)).isoformat()
+    return [("GET", "/api/export/nfts", {"params": {"from": start, "format": ("ndjson", "csv")[i % 2]}}) for i in range(n)]
+
+
+@scenario("GET /api/orderbook")
+async def _orderbook(ctx, n):
+    return [("GET", "/api/orderbook", {"params": {"levels": 20, "best": 10, "price": 1.5}})] * n
+
+
+@scenario("GET /api/gallery")
+async def _gallery(ctx, n):
+    queries = [
+        {},
+        {"burn_candidate": "true", "sort": "-price"},
+        {"status": "listed", "sort": "newest", "offset": 24},
+        {"q": str(ctx.rng.randint(1, 99))},
+    ]
+    return [("GET", "/api/gallery", {"params": queries[i % len(queries)]}) for i in range(n)]
+
+
+@scenario("GET /api/statistics")
+async def _statistics(ctx, n):
+    return [("GET", "/api/statistics", {})] * n
+
+
+CALCULATOR_INPUT = {"nft_price": 1.2, "time_horizon": 90, "daily_volume": 50000}
+
+
+@scenario("POST /api/calculator")
+async def _calculator(ctx, n):
+    return [("POST", "/api/calculator", {"json": CALCULATOR_INPUT})] * n
+
+
+@scenario("POST /api/calculator/batch")
+async def _calculator_batch(ctx, n):
+    scenarios = [{**CALCULATOR_INPUT, "daily_volume": 1000.0 * (i + 1)} for i in range(100)]
+    return [("POST", "/api/calculator/batch", {"json": {"scenarios": scenarios}})] * n
+
+
+@scenario("POST /api/calculator/sweep")
+async def _calculator_sweep(ctx, n):
+    body = {"base": CALCULATOR_INPUT, "axes": {
+        "daily_volume": {"start": 1000, "stop": 100000, "num": 50},
+        "burn_percentage": [50, 70, 90],
+    }}
+    return [("POST", "/api/calculator/sweep", {"json": body})] * n
+
+
+@scenario("POST /api/calculator/simulate")
+async def _calculator_simulate(ctx, n):
+    return [("POST", "/api/calculator/simulate", {"json": {
+        "time_horizon": 90, "daily_volume": 50000, "paths": 2000, "seed": i,
+    }}) for i in range(n)]
+
+
+@scenario("GET /api/crypto/price/{coin_id}")
+async def _crypto_price(ctx, n):
+    return [("GET", f"/api/crypto/price/{coin_id}", {}) for coin_id in (list(STUB_QUOTES) * n)[:n]]
+
+
+@scenario("GET /api/crypto/prices")
+async def _crypto_prices(ctx, n):
+    return [("GET", "/api/crypto/prices", {"params": {"ids": ",".join(STUB_QUOTES)}})] * n
+
+
+@scenario("GET /api/crypto/prices/status")
+async def _crypto_prices_status(ctx, n):
+    return [("GET", "/api/crypto/prices/status", {})] * n
+
+
+@scenario("GET /api/strategy/state")
+async def _strategy_state(ctx, n):
+    etag = (await ctx.client.get("/api/strategy/state")).headers.get("ETag")
+    # Half the polls come from clients that already hold the current version
+    return [("GET", "/api/strategy/state", {"headers": {"If-None-Match": etag} if i % 2 and etag else {}}) for i in range(n)]
+
+
+@scenario("GET /api/strategy/history")
+async def _strategy_history(ctx, n):
+    return [("GET", "/api/strategy/history", {"params": {"max_points": (100, 500)[i % 2]}}) for i in range(n)]
+
+
+# ============ Running and reporting ============
+async def drive(client: httpx.AsyncClient, calls: List[Tuple[str, Call]], concurrency: int):
+    """Send ``calls`` with ``concurrency`` workers; returns per-route latencies, errors and wall time"""
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    queue = iter(calls)
+
+    async def worker():
+        for key, (method, url, kwargs) in queue:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.setdefault(key, []).append(time.perf_counter() - start)
+            if failed:
+                errors[key] = errors.get(key, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def summarize(samples: List[float], errors: int, elapsed: float) -> dict:
+    p50, p95, p99 = np.percentile(np.asarray(samples) * 1000, [50, 95, 99])
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "rps": round(len(samples) / elapsed, 1),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+    }
+
+
+def print_table(title: str, rows: Dict[str, dict]):
+    print(f"\n{title}")
+    print(f"{'route':38} {'reqs':>6} {'err':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for key, row in rows.items():
+        print(f"{key:38} {row['requests']:6} {row['errors']:5} {row['rps']:9.1f} "
+              f"{row['p50_ms']:9.2f} {row['p95_ms']:9.2f} {row['p99_ms']:9.2f}")
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """Rows whose p95 grew, or whose throughput fell, by more than ``threshold`` percent.
+
+    p95 changes smaller than ``min_delta_ms`` are noise on sub-millisecond
+    routes and never count. The mixed phase is only comparable when both runs
+    mixed the same routes; its per-route rows have no throughput of their own.
+    """
+    regressions = []
+    print(f"\nAgainst baseline from {baseline['meta']['started_at']} (threshold {threshold:g}%)")
+    print(f"{'route':38} {'p95 ms':>17} {'change':>8} {'req/s':>17} {'change':>8}")
+    rows = [(key, row, baseline["routes"].get(key), True) for key, row in results["routes"].items()]
+    if set(results["mixed"]) == set(baseline["mixed"]):
+        rows += [(f"mixed: {key}", row, baseline["mixed"][key], key == "all") for key, row in results["mixed"].items()]
+    else:
+        print("(mixed phase skipped: the baseline mixed a different set of routes)")
+    for label, row, old, has_rps in rows:
+        if not old:
+            continue
+        p95_change = (row["p95_ms"] / old["p95_ms"] - 1) * 100 if old["p95_ms"] else 0.0
+        slower = p95_change > threshold and row["p95_ms"] - old["p95_ms"] > min_delta_ms
+        line = f"{label:38} {old['p95_ms']:8.2f}>{row['p95_ms']:8.2f} {p95_change:+7.1f}%"
+        if has_rps:
+            rps_change = (row["rps"] / old["rps"] - 1) * 100 if old["rps"] else 0.0
+            slower = slower or rps_change < -threshold
+            line += f" {old['rps']:8.1f}>{row['rps']:8.1f} {rps_change:+7.1f}%"
+        if slower:
+            regressions.append(label)
+            line = f"{line:84}  REGRESSION"
+        print(line)
+    return regressions
+
+
+async def open_database(args):
+    if args.mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(args.mongo_url, tz_aware=True)
+        await client.drop_database(args.db_name)
+        return client[args.db_name], "mongod"
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        raise SystemExit("mongomock-motor is not installed: pip install mongomock-motor, or pass --mongo-url")
+    # mongomock ignores partialFilterExpression (the bulk idempotency index would reject
+    # every row without a key), lacks $dateTrunc for the history rollups and has no
+    # change streams (the notifier then polls, as on a standalone mongod)
+    async def skip(*args, **kwargs):
+        pass
+    server.ensure_indexes = skip
+    server.state_notifier._watch = skip
+    server.history_sampler.interval = 0
+    return AsyncMongoMockClient(tz_aware=True)[args.db_name], "mongomock"
+
+
+async def run(args) -> dict:
+    db, backend = await open_database(args)
+    server.use_database(db)
+    server.price_service = PriceService(transport=httpx.MockTransport(coingecko_stub(args.upstream_latency / 1000)))
+    server.price_refresher.service = server.price_service
+
+    keys = [key for key in route_keys() if key not in SKIPPED]
+    missing = [key for key in keys if key not in SCENARIOS]
+    if missing:
+        raise SystemExit(f"No load scenario for: {', '.join(missing)}")
+    if args.routes:
+        keys = [key for key in keys if any(part in key for part in args.routes)]
+
+    rng = random.Random(args.seed)
+    await server.app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            ctx = LoadContext(client, db, rng)
+            await ctx.seed(args.nfts, args.transactions, args.history_days)
+            if getattr(server.app.state, "index_task", None) is not None:
+                await server.app.state.index_task
+
+            routes = {}
+            for key in keys:
+                calls = [(key, call) for call in await SCENARIOS[key](ctx, args.warmup + args.requests)]
+                await drive(client, calls[:args.warmup], args.concurrency)
+                latencies, errors, elapsed = await drive(client, calls[args.warmup:], args.concurrency)
+                routes[key] = summarize(latencies[key], errors.get(key, 0), elapsed)
+
+            calls = [(key, call) for key in keys for call in await SCENARIOS[key](ctx, args.requests)]
+            rng.shuffle(calls)
+            latencies, errors, elapsed = await drive(client, calls, args.concurrency)
+            mixed = {"all": summarize([s for samples in latencies.values() for s in samples], sum(errors.values()), elapsed)}
+            mixed.update({key: summarize(latencies[key], errors.get(key, 0), elapsed) for key in keys})
+    finally:
+        await server.app.router.shutdown()
+
+    return {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "backend": backend,
+            "fast_responses": server.FAST_RESPONSES,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "skipped": SKIPPED,
+            **{name: getattr(args, name) for name in (
+                "requests", "warmup", "concurrency", "nfts", "transactions", "history_days", "upstream_latency", "seed",
+            )},
+        },
+        "routes": routes,
+        "mixed": mixed,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100, help="timed requests per route")
+    parser.add_argument("--warmup", type=int, default=10, help="untimed requests per route first")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--nfts", type=int, default=1000, help="seeded NFTs")
+    parser.add_argument("--transactions", type=int, default=2000, help="seeded transactions")
+    parser.add_argument("--history-days", type=int, default=90, help="days of hourly history rollups")
+    parser.add_argument("--upstream-latency", type=float, default=0.0, help="CoinGecko stub latency (ms)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--routes", nargs="*", help="only routes containing one of these substrings")
+    parser.add_argument("--mongo-url", help="use this mongod instead of mongomock; --db-name is dropped first")
+    parser.add_argument("--db-name", default="forma_loadtest")
+    parser.add_argument("--save", type=Path, help="write the results as JSON")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0, help="regression threshold in percent")
+    parser.add_argument("--min-delta", type=float, default=1.0, help="ignore p95 changes below this many ms")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    for name in ("httpx", "server"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    results = asyncio.run(run(args))
+    print_table(f"Per route ({args.concurrency} concurrent, {results['meta']['backend']})", results["routes"])
+    print_table("Mixed", results["mixed"])
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nSaved {args.save}")
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.threshold, args.min_delta)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
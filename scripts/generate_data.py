@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""Generate a production-sized synthetic dataset for Forma Strategy.
+
+Writes NFTs, transactions, wallet sessions, the strategy_metrics time series
+(plus rollups) and a strategy_state document that agrees with them. Every
+day, NFT and wallet is drawn from its own seeded stream, so the same
+``--seed`` and ``--end`` give the same documents whatever the batch size or
+insert concurrency. Batches are streamed into ``insert_many`` with up to
+``--concurrency`` inserts in flight; indexes are built after the load.
+
+    python scripts/generate_data.py --transactions 5000000 --nfts 200000 --wallets 300000 --years 3 --drop
+
+Without ``--drop`` the script refuses to write into a database that already
+holds NFTs or transactions.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+sys.path.insert(0, str(ROOT_DIR))
+
+from pymongo.errors import PyMongoError  # noqa: E402
+
+from counters import StatisticsCounters  # noqa: E402
+from history import METRICS_COLLECTION, ROLLUPS, ensure_collections, rollup  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+from strategy_state import DEFAULT_STRATEGY_STATE  # noqa: E402
+from wallet_counters import WalletCounters  # noqa: E402
+
+TX_TYPES = ("buy", "sell", "burn")
+TX_TYPE_P = (0.55, 0.3, 0.15)
+NFT_STATUSES = ("owned", "listed", "sold")
+NFT_STATUS_P = (0.45, 0.15, 0.4)
+SELL_PREMIUM = 1.2  # strategy sells above floor
+MARKET_VOLUME_MULTIPLE = 100  # market volume per strategy trade, in floor units
+FEE_RATE = 0.01  # share of market volume flowing into the treasury
+STATE_HISTORY_DAYS = 30
+
+NFT_IMAGES = [
+    "https://images.unsplash.com/photo-1764437358350-e324534072d7?crop=entropy&cs=srgb&fm=jpg&q=85",
+    "https://images.unsplash.com/photo-1759270463164-dcd9af6fc77c?crop=entropy&cs=srgb&fm=jpg&q=85",
+    "https://images.unsplash.com/photo-1763920999620-f76ea1aeb3ac?crop=entropy&cs=srgb&fm=jpg&q=85",
+    "https://images.unsplash.com/photo-1759270463255-70ef839296bd?crop=entropy&cs=srgb&fm=jpg&q=85",
+]
+
+# Seed stream ids; each entity draws from default_rng([seed, stream, index])
+_FLOOR, _DAY, _NFTS, _WALLETS, _SESSIONS, _POINTS = range(6)
+
+
+@dataclass
+class GeneratorConfig:
+    transactions: int = 1_000_000
+    nfts: int = 100_000
+    wallets: int = 100_000
+    days: int = 730
+    seed: int = 42
+    end: Optional[datetime] = None  # exclusive; defaults to today's midnight UTC
+    points_per_day: int = 24
+
+
+def _uuids(rng: np.random.Generator, count: int) -> List[str]:
+    raw = rng.bytes(16 * count)
+    return [str(uuid.UUID(bytes=raw[i:i + 16], version=4)) for i in range(0, 16 * count, 16)]
+
+
+def _batches(docs: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Dataset:
+    """Deterministic synthetic data; generators yield plain documents"""
+
+    def __init__(self, config: GeneratorConfig):
+        self.config = config
+        end = config.end or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.start = end - timedelta(days=config.days)
+
+        rng = np.random.default_rng([config.seed, _FLOOR])
+        self.floors = np.round(0.5 * np.exp(np.cumsum(rng.normal(0.0008, 0.03, config.days))), 4)
+        # Busier on higher floors, with day-to-day noise
+        weights = self.floors * rng.lognormal(0.0, 0.3, config.days)
+        self.day_counts = rng.multinomial(config.transactions, weights / weights.sum())
+
+        raw = np.random.default_rng([config.seed, _WALLETS]).bytes(20 * config.wallets)
+        self.wallets = ["0x" + raw[i:i + 20].hex() for i in range(0, 20 * config.wallets, 20)]
+
+        rng = np.random.default_rng([config.seed, _NFTS])
+        n = config.nfts
+        self.nft_days = rng.integers(0, config.days, n)
+        self.nft_seconds = rng.integers(0, 86400, n)
+        self.nft_purchase = np.round(self.floors[self.nft_days] * rng.lognormal(0.0, 0.05, n), 4)
+        self.nft_current = np.round(self.floors[-1] * rng.lognormal(0.0, 0.08, n), 2)
+        self.nft_status = rng.choice(len(NFT_STATUSES), n, p=NFT_STATUS_P)
+        self.nft_owner = rng.integers(0, max(config.wallets, 1), n)
+        self.nft_images = rng.integers(0, len(NFT_IMAGES), n)
+        self.nft_ids = _uuids(rng, n)
+
+    def day_start(self, day: int) -> datetime:
+        return self.start + timedelta(days=int(day))
+
+    def _day(self, day: int, ids: bool = True) -> dict:
+        """The day's transactions as arrays, in timestamp order; ids are drawn last so skipping them changes nothing else"""
+        n = int(self.day_counts[day])
+        rng = np.random.default_rng([self.config.seed, _DAY, day])
+        types = rng.choice(len(TX_TYPES), n, p=TX_TYPE_P)
+        noise = rng.lognormal(0.0, 0.05, n)
+        price = np.round(self.floors[day] * np.where(types == 1, SELL_PREMIUM, 1.0) * noise, 4)
+        return {
+            "types": types,
+            "price": price,
+            "seconds": np.sort(rng.integers(0, 86400, n)),
+            "tokens": rng.integers(1, max(self.config.nfts, 1) + 1, n),
+            "wallets": rng.integers(0, max(self.config.wallets, 1), n),
+            "ids": _uuids(rng, n) if ids else None,
+        }
+
+    def transactions(self) -> Iterator[dict]:
+        descriptions = {
+            "buy": "NFT #{} acquired via buyback",
+            "sell": f"NFT #{{}} sold at {SELL_PREMIUM}x",
+            "burn": "NFT #{} burned from treasury",
+        }
+        for day in range(self.config.days):
+            arrays = self._day(day)
+            start = self.day_start(day)
+            # Plain lists: indexing numpy arrays per document is several times slower
+            columns = zip(
+                arrays["ids"], arrays["types"].tolist(), arrays["tokens"].tolist(), arrays["price"].tolist(),
+                arrays["seconds"].tolist(), arrays["wallets"].tolist(),
+            )
+            for tx_id, kind, token, price, seconds, wallet in columns:
+                kind = TX_TYPES[kind]
+                doc = {
+                    "id": tx_id,
+                    "type": kind,
+                    "nft_token_id": token,
+                    "amount": 1,
+                    "price": price,
+                    "timestamp": start + timedelta(seconds=seconds),
+                    "description": descriptions[kind].format(token),
+                }
+                if kind != "burn" and self.wallets:
+                    doc["wallet_address"] = self.wallets[wallet]
+                yield doc
+
+    def daily_totals(self) -> Dict[str, np.ndarray]:
+        """Per-day buys, sells, burns and ETH flows, matching transactions()"""
+        days = self.config.days
+        totals = {name: np.zeros(days) for name in ("buys", "sells", "burns", "spent", "received")}
+        for day in range(days):
+            arrays = self._day(day, ids=False)
+            types, price = arrays["types"], arrays["price"]
+            totals["buys"][day] = np.count_nonzero(types == 0)
+            totals["sells"][day] = np.count_nonzero(types == 1)
+            totals["burns"][day] = np.count_nonzero(types == 2)
+            totals["spent"][day] = price[types == 0].sum()
+            totals["received"][day] = price[types == 1].sum()
+        totals["inflow"] = self.day_counts * self.floors * MARKET_VOLUME_MULTIPLE * FEE_RATE
+        return totals
+
+    def nfts(self) -> Iterator[dict]:
+        for i in range(self.config.nfts):
+            status = NFT_STATUSES[self.nft_status[i]]
+            doc = {
+                "id": self.nft_ids[i],
+                "token_id": i + 1,
+                "name": f"Forma #{i + 1}",
+                "image_url": NFT_IMAGES[self.nft_images[i]],
+                "purchase_price": float(self.nft_purchase[i]),
+                "current_price": float(self.nft_current[i]),
+                "purchase_date": self.day_start(self.nft_days[i]) + timedelta(seconds=int(self.nft_seconds[i])),
+                "status": status,
+            }
+            if status == "sold" and self.wallets:
+                doc["owner_address"] = self.wallets[self.nft_owner[i]]
+            yield doc
+
+    def wallet_sessions(self) -> Iterator[dict]:
+        rng = np.random.default_rng([self.config.seed, _SESSIONS])
+        span = self.config.days * 86400
+        created = rng.integers(0, span, len(self.wallets))
+        active = created + (rng.random(len(self.wallets)) * (span - created)).astype(np.int64)
+        is_active = rng.random(len(self.wallets)) < 0.7
+        for i, wallet in enumerate(self.wallets):
+            yield {
+                "wallet_address": wallet,
+                "created_at": self.start + timedelta(seconds=int(created[i])),
+                "last_active": self.start + timedelta(seconds=int(active[i])),
+                "is_active": bool(is_active[i]),
+                "token_version": 0,
+            }
+
+    def metric_points(self, totals: Dict[str, np.ndarray]) -> Iterator[dict]:
+        """``points_per_day`` strategy_metrics points per day, floor jittered around the daily value"""
+        per_day = self.config.points_per_day
+        step = timedelta(days=1) / per_day
+        burned = np.cumsum(totals["burns"])
+        treasury = np.cumsum(totals["inflow"] - totals["spent"] + totals["received"])
+        rng = np.random.default_rng([self.config.seed, _POINTS])
+        for day in range(self.config.days):
+            jitter = rng.lognormal(0.0, 0.01, per_day)
+            avg_buy = totals["spent"][day] / totals["buys"][day] if totals["buys"][day] else None
+            start = self.day_start(day)
+            for j in range(per_day):
+                yield {
+                    "ts": start + j * step,
+                    "floor": round(float(self.floors[day] * jitter[j]), 4),
+                    "strategy_buy": round(float(avg_buy), 4) if avg_buy is not None else None,
+                    "burned_total": int(burned[day]),
+                    "treasury_eth": round(float(treasury[day]), 4),
+                    "buyback_event": bool(totals["buys"][day]),
+                }
+
+    def strategy_state(self, totals: Dict[str, np.ndarray]) -> dict:
+        """State document consistent with the generated NFTs and transactions"""
+        buys, sells, burned = (int(totals[name].sum()) for name in ("buys", "sells", "burns"))
+        spent, received = float(totals["spent"].sum()), float(totals["received"].sum())
+        held = np.isin(self.nft_status, (0, 1))
+        strategy_owned = int(np.count_nonzero(held))
+        # As many NFTs in market hands as the strategy has ever held, plus the burned ones
+        total_minted = 2 * self.config.nfts + burned
+        floor = float(self.floors[-1])
+
+        listed = self.nft_current[self.nft_status == 1]
+        levels, counts = np.unique(np.round(listed / 0.05) * 0.05, return_counts=True)
+        cumulative_burned = np.cumsum(totals["burns"])
+        history = []
+        for day in range(max(0, self.config.days - STATE_HISTORY_DAYS), self.config.days):
+            history.append({
+                "date": self.day_start(day).date().isoformat(),
+                "floor": float(self.floors[day]),
+                "strategy_buy": round(float(totals["spent"][day] / totals["buys"][day]), 4) if totals["buys"][day] else float(self.floors[day]),
+                "burned_total": int(cumulative_burned[day]),
+                "buyback_event": bool(totals["buys"][day]),
+            })
+
+        return {
+            "timestamp": int(self.day_start(self.config.days).timestamp()),
+            "treasury": {
+                "eth_balance": round(float(totals["inflow"].sum()) - spent + received, 4),
+                "target_eth_per_buyback": DEFAULT_STRATEGY_STATE["treasury"]["target_eth_per_buyback"],
+            },
+            "nft_supply": {
+                "total_minted": total_minted,
+                "burned": burned,
+                "strategy_owned": strategy_owned,
+                "market_circulating": total_minted - burned - strategy_owned,
+            },
+            "activity": {
+                "nft_bought_total": buys,
+                "nft_sold_total": sells,
+                "eth_spent_on_buybacks": round(spent, 4),
+                "eth_received_from_sales": round(received, 4),
+            },
+            "market": {
+                "floor_price_eth": floor,
+                "strategy_avg_buy_price": round(spent / buys, 4) if buys else floor,
+                "strategy_avg_sell_price": round(received / sells, 4) if sells else floor,
+            },
+            "liquidity": dict(DEFAULT_STRATEGY_STATE["liquidity"]),
+            "distribution": dict(DEFAULT_STRATEGY_STATE["distribution"]),
+            "orderbook": [{"price": round(float(p), 2), "count": int(c)} for p, c in zip(levels[:10], counts[:10])],
+            "history": history,
+            "nfts": [{
+                "token_id": int(i) + 1,
+                "price_eth": float(self.nft_current[i]),
+                "owner": "strategy",
+                "status": "listed" if self.nft_status[i] == 1 else "available",
+                "burn_candidate": bool(self.nft_current[i] < floor),
+                "image": NFT_IMAGES[self.nft_images[i]],
+            } for i in np.flatnonzero(held)[:6]],
+        }
+
+
+# ============ Loading ============
+async def insert_batches(collection, batches: Iterator[List[dict]], concurrency: int) -> int:
+    """insert_many each batch with at most ``concurrency`` inserts in flight"""
+    slots = asyncio.Semaphore(concurrency)
+    pending = set()
+    inserted = 0
+    started = time.perf_counter()
+
+    async def insert(batch):
+        nonlocal inserted
+        try:
+            await collection.insert_many(batch, ordered=False)
+            inserted += len(batch)
+        finally:
+            slots.release()
+
+    for number, batch in enumerate(batches, 1):
+        await slots.acquire()
+        task = asyncio.create_task(insert(batch))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        if number % 50 == 0:
+            print(f"  {collection.name}: {inserted} inserted ({inserted / (time.perf_counter() - started):.0f}/s)")
+            # Surface a failed insert now rather than after generating everything
+            for done in [task for task in pending if task.done()]:
+                done.result()
+    await asyncio.gather(*pending)
+    print(f"  {collection.name}: {inserted} inserted in {time.perf_counter() - started:.1f}s")
+    return inserted
+
+
+GENERATED_COLLECTIONS = [
+    "nfts", "transactions", "wallet_sessions", "wallet_nonces", "strategy_state", "counters",
+    "backtest_checkpoints", "strategy_history",
+]
+
+
+async def generate(db, dataset: Dataset, batch_size: int = 10000, concurrency: int = 4):
+    print(f"Generating {dataset.config.nfts} NFTs, {dataset.config.transactions} transactions, "
+          f"{dataset.config.wallets} wallets over {dataset.config.days} days (seed {dataset.config.seed})")
+    await insert_batches(db.nfts, _batches(dataset.nfts(), batch_size), concurrency)
+    await insert_batches(db.transactions, _batches(dataset.transactions(), batch_size), concurrency)
+    await insert_batches(db.wallet_sessions, _batches(dataset.wallet_sessions(), batch_size), concurrency)
+
+    totals = dataset.daily_totals()
+    await ensure_collections(db)
+    await insert_batches(db[METRICS_COLLECTION], _batches(dataset.metric_points(totals), batch_size), concurrency)
+    try:
+        await rollup(db)
+    except PyMongoError as e:
+        print(f"  rollups skipped ({e}); run python history.py --rollup on MongoDB 5.0+")
+    for collection, _ in ROLLUPS.values():
+        print(f"  {collection}: {await db[collection].estimated_document_count()} buckets")
+
+    await db.strategy_state.replace_one({}, dataset.strategy_state(totals), upsert=True)
+    await StatisticsCounters(db).rebuild()
+    print(f"  wallet counters set on {await WalletCounters(db.wallet_sessions).reconcile(db)} sessions")
+    print("Building indexes...")
+    await ensure_indexes(db)
+
+
+async def _main(argv: Optional[List[str]] = None) -> int:
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic Forma Strategy dataset")
+    parser.add_argument("--transactions", type=int, default=1_000_000)
+    parser.add_argument("--nfts", type=int, default=100_000)
+    parser.add_argument("--wallets", type=int, default=100_000)
+    parser.add_argument("--years", type=float, default=2.0, help="history span ending at --end")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="end date (UTC), default today")
+    parser.add_argument("--points-per-day", type=int, default=24, help="strategy_metrics points per day")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=4, help="insert_many calls in flight")
+    parser.add_argument("--drop", action="store_true", help="drop the generated collections first")
+    args = parser.parse_args(argv)
+
+    end = args.end
+    if end is not None:
+        end = (end if end.tzinfo else end.replace(tzinfo=timezone.utc)).astimezone(timezone.utc)
+    dataset = Dataset(GeneratorConfig(
+        transactions=args.transactions,
+        nfts=args.nfts,
+        wallets=args.wallets,
+        days=max(1, round(args.years * 365)),
+        seed=args.seed,
+        end=end,
+        points_per_day=args.points_per_day,
+    ))
+
+    load_dotenv(ROOT_DIR / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], tz_aware=True)
+    db = client[os.environ['DB_NAME']]
+    try:
+        if args.drop:
+            for name in GENERATED_COLLECTIONS + [METRICS_COLLECTION] + [c for c, _ in ROLLUPS.values()]:
+                await db.drop_collection(name)
+        elif await db.nfts.find_one({}, {"_id": 1}) or await db.transactions.find_one({}, {"_id": 1}):
+            print(f"{os.environ['DB_NAME']} already has data; pass --drop to replace it")
+            return 1
+        started = time.perf_counter()
+        await generate(db, dataset, batch_size=args.batch_size, concurrency=args.concurrency)
+        print(f"Done in {time.perf_counter() - started:.1f}s")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main()))
@@ -26,6 +26,8 @@ db = client[db_name]
 print("Clearing existing data...")
 db.nfts.delete_many({})
 db.transactions.delete_many({})
+# /api/statistics recounts from the new data on its next read
+db.counters.delete_one({"_id": "statistics"})
 
 # Mock NFT images
 nft_images = [
@@ -46,7 +48,7 @@ for i in range(1, 25):
         "image_url": random.choice(nft_images),
         "purchase_price": round(random.uniform(40.0, 45.0), 2),
         "current_price": round(random.uniform(42.0, 48.0), 2),
-        "purchase_date": (datetime.now(timezone.utc) - timedelta(days=random.randint(1, 60))).isoformat(),
+        "purchase_date": datetime.now(timezone.utc) - timedelta(days=random.randint(1, 60)),
         "status": "owned"
     }
     nfts.append(nft)
@@ -72,7 +74,7 @@ for i in range(1, 51):
         "nft_token_id": 5000 + random.randint(1, 24) if tx_type in ["buy", "sell"] else None,
         "amount": round(random.uniform(1, 10000), 2) if tx_type == "burn" else 1,
         "price": round(random.uniform(0.020, 0.030), 4) if tx_type == "burn" else round(random.uniform(40.0, 50.0), 2),
-        "timestamp": (datetime.now(timezone.utc) - timedelta(hours=random.randint(1, 720))).isoformat(),
+        "timestamp": datetime.now(timezone.utc) - timedelta(hours=random.randint(1, 720)),
         "description": descriptions[tx_type](random.randint(1, 24)) if tx_type != "burn" else descriptions[tx_type]()
     }
     transactions.append(tx)
@@ -0,0 +1,67 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from auth_cache import ActivityBuffer, VerifiedTokenCache
+from shared_cache import SharedCache
+
+
+class FakeSessionCollection:
+    def __init__(self):
+        self.writes = []
+
+    async def bulk_write(self, requests, ordered=True):
+        self.writes.append(requests)
+
+
+def test_token_cache_ttl_exp_and_lru():
+    now = [1000.0]
+    cache = VerifiedTokenCache(maxsize=2, ttl=30, clock=lambda: now[0])
+    cache.put("a", "0xa", expires_at=2000)
+    cache.put("b", "0xb", expires_at=1010)  # JWT expires before the TTL
+    assert cache.get("a") == "0xa"
+
+    cache.put("c", "0xc", expires_at=2000)  # evicts b, the least recently used
+    assert cache.get("b") is None and len(cache) == 2
+
+    now[0] = 1031
+    assert cache.get("a") is None
+
+
+def test_token_cache_evicts_wallet_on_logout():
+    cache = VerifiedTokenCache()
+    cache.put("t1", "0xa", expires_at=float("inf"))
+    cache.put("t2", "0xa", expires_at=float("inf"))
+    cache.put("t3", "0xb", expires_at=float("inf"))
+
+    cache.evict_wallet("0xa")
+
+    assert cache.get("t1") is None and cache.get("t2") is None
+    assert cache.get("t3") == "0xb"
+
+
+def test_token_verified_before_a_logout_is_not_served():
+    shared = SharedCache()
+    cache = VerifiedTokenCache(shared=shared)
+    generation = cache.generation()  # read before the session lookup
+    asyncio.run(cache.revoke("0xb"))  # some wallet logs out meanwhile
+    cache.put("t1", "0xa", expires_at=float("inf"), generation=generation)
+    cache.put("t2", "0xa", expires_at=float("inf"))
+
+    assert cache.get("t1") is None
+    assert cache.get("t2") == "0xa"
+
+
+def test_activity_buffer_coalesces_per_wallet():
+    collection = FakeSessionCollection()
+    buffer = ActivityBuffer(collection)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for i in range(100):
+        buffer.touch("0xa", start + timedelta(seconds=i))
+    buffer.touch("0xb", start)
+
+    asyncio.run(buffer.flush())
+    asyncio.run(buffer.flush())  # nothing pending, no write
+
+    assert len(collection.writes) == 1
+    updates = {op._filter["wallet_address"]: op._doc["$max"]["last_active"] for op in collection.writes[0]}
+    assert updates == {"0xa": start + timedelta(seconds=99), "0xb": start}
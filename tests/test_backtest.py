@@ -0,0 +1,99 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backtest import Backtester
+from history import query_history
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+START = datetime(2024, 12, 1, 10, tzinfo=timezone.utc)
+
+
+def tx(i, kind, amount, price, hours):
+    return {
+        "id": f"tx-{i:04d}",
+        "type": kind,
+        "amount": amount,
+        "price": price,
+        "timestamp": START + timedelta(hours=hours),
+        "description": "",
+    }
+
+
+async def history(db):
+    return await db.strategy_history.find({}, {"_id": 0}).sort("date", 1).to_list(None)
+
+
+def test_replays_daily_balances():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient(tz_aware=True)["backtest"]
+        await db.transactions.insert_many([
+            tx(1, "buy", 1, 1.0, 0),
+            tx(2, "buy", 2, 1.5, 1),
+            tx(3, "burn", 1, 0.02, 2),
+            tx(4, "sell", 1, 2.0, 30),
+        ])
+        state = await Backtester(db).run(initial_treasury=10.0)
+        return state, await history(db)
+
+    state, rows = asyncio.run(scenario())
+
+    assert state.treasury_eth == pytest.approx(10.0 - 1.0 - 3.0 + 2.0)
+    assert (state.owned, state.burned, state.events) == (2, 1, 4)
+    assert [row["date"] for row in rows] == ["2024-12-01", "2024-12-02"]
+    assert rows[0]["strategy_buy"] == pytest.approx(4.0 / 3)
+    assert rows[0]["buyback_event"] and not rows[1]["buyback_event"]
+    assert rows[1]["floor"] == 2.0 and rows[1]["burned_total"] == 1
+
+
+def test_resumes_from_checkpoint():
+    events = [tx(i, ["buy", "sell", "burn"][i % 3], 1 + i % 2, 1.0 + i / 100, i * 5) for i in range(60)]
+
+    async def scenario():
+        full = mongomock_motor.AsyncMongoMockClient(tz_aware=True)["full"]
+        await full.transactions.insert_many([dict(e) for e in events])
+        expected = await Backtester(full).run()
+
+        db = mongomock_motor.AsyncMongoMockClient(tz_aware=True)["incremental"]
+        backtester = Backtester(db, checkpoint_every=7)
+        await db.transactions.insert_many([dict(e) for e in events[:25]])
+        await backtester.run()
+        await db.transactions.insert_many([dict(e) for e in events[25:]])
+        resumed = await backtester.run()
+        return expected, resumed, await history(full), await history(db)
+
+    expected, resumed, expected_rows, rows = asyncio.run(scenario())
+
+    assert resumed.events == 60
+    assert resumed.treasury_eth == pytest.approx(expected.treasury_eth)
+    assert rows == expected_rows
+
+
+def test_history_serves_backtest_days_before_the_first_sample():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient(tz_aware=True)["backtest_history"]
+        await db.transactions.insert_many([
+            tx(1, "buy", 1, 1.0, 0),     # Sunday 2024-12-01
+            tx(2, "buy", 1, 2.0, 24),    # Monday
+            tx(3, "sell", 1, 3.0, 48),   # Tuesday
+            tx(4, "buy", 1, 4.0, 72),    # Wednesday, also sampled
+        ])
+        await Backtester(db).run(initial_treasury=10.0)
+        sampled = datetime(2024, 12, 4, tzinfo=timezone.utc)
+        week = datetime(2024, 12, 2, tzinfo=timezone.utc)
+        await db.strategy_history_daily.insert_one({"_id": sampled, "ts": sampled, "floor": 9.0, "samples": 1})
+        await db.strategy_history_weekly.insert_one({"_id": week, "ts": week, "floor": 9.0, "samples": 1})
+        start, end = datetime(2024, 11, 30, tzinfo=timezone.utc), datetime(2024, 12, 6, tzinfo=timezone.utc)
+        daily = await query_history(db, start, end, "daily", 100)
+        weekly = await query_history(db, start, end, "weekly", 100)
+        return daily, weekly
+
+    daily, weekly = asyncio.run(scenario())
+
+    assert [(point["ts"].day, point["floor"]) for point in daily] == [(1, 1.0), (2, 2.0), (3, 3.0), (4, 9.0)]
+    assert daily[0]["treasury_eth"] == 9.0 and daily[2]["owned"] == 1
+    # The sampled week comes from the rollup; the week before it from the backtest
+    assert [(point["ts"].day, point["floor"]) for point in weekly] == [(25, 1.0), (2, 9.0)]
+    assert weekly[0]["floor_min"] == weekly[0]["floor_max"] == 1.0
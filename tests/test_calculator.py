@@ -0,0 +1,65 @@
+import asyncio
+import random
+
+import pytest
+
+from calculator import MAX_SCENARIOS, columns_from_scenarios, evaluate, sweep_columns
+from server import CalculatorInput, calculate_yield
+
+
+def scalar_columns(scenarios):
+    results = [asyncio.run(calculate_yield(s)) for s in scenarios]
+    columns = {
+        field: [getattr(r, field) for r in results]
+        for field in ("treasury_inflow", "buyback_nft_budget", "buyback_token_budget", "nfts_buyable",
+                      "nfts_burned", "supply_after", "supply_reduction_percent", "value_per_nft")
+    }
+    for name in ("conservative", "base", "aggressive"):
+        columns[f"price_{name}"] = [r.price_scenarios[name] for r in results]
+    return columns
+
+
+def random_scenario(rng):
+    return CalculatorInput(
+        nft_price=round(rng.uniform(0.01, 5), rng.choice([2, 3, 6])),
+        time_horizon=rng.randint(1, 730),
+        daily_volume=round(rng.uniform(0, 500), 2),
+        fee_percentage=rng.choice([0.5, 1.0, 2.5, rng.uniform(0, 10)]),
+        buyback_nft_percentage=rng.uniform(0, 100),
+        buyback_token_percentage=rng.uniform(0, 100),
+        current_supply=rng.choice([1, 10, 1000, 10000, rng.randint(1, 50000)]),
+        burn_percentage=rng.uniform(0, 100),
+        impact_strength=rng.uniform(0, 1),
+    )
+
+
+def test_batch_matches_scalar_endpoint():
+    rng = random.Random(7)
+    scenarios = [random_scenario(rng) for _ in range(2000)]
+    # Budgets large enough to burn the whole supply hit the supply_after <= 0 guard
+    scenarios.append(CalculatorInput(nft_price=0.01, time_horizon=365, daily_volume=1000, current_supply=10))
+    scenarios.append(CalculatorInput(nft_price=0.1, time_horizon=30, daily_volume=100, fee_percentage=50,
+                                     buyback_nft_percentage=100, burn_percentage=100, current_supply=150))
+
+    batch = evaluate(columns_from_scenarios(scenarios))
+
+    assert any(after <= 0 for after in batch["supply_after"])
+    assert batch == scalar_columns(scenarios)
+
+
+def test_sweep_grid_order_and_limit():
+    base = CalculatorInput(nft_price=1.0, time_horizon=30, daily_volume=100)
+    columns = sweep_columns(base, {"nft_price": [1.0, 2.0], "time_horizon": [10, 20, 30]})
+
+    assert columns["nft_price"].tolist() == [1.0, 1.0, 1.0, 2.0, 2.0, 2.0]
+    assert columns["time_horizon"].tolist() == [10, 20, 30, 10, 20, 30]
+    assert columns["daily_volume"].tolist() == [100.0] * 6
+
+    # The scalar endpoint's model rejects these, so the sweep does too
+    for values in ([30.7], [30.0, float("inf")]):
+        with pytest.raises(ValueError, match="whole numbers"):
+            sweep_columns(base, {"time_horizon": values})
+    assert sweep_columns(base, {"current_supply": [1000.0]})["current_supply"].tolist() == [1000]
+
+    with pytest.raises(ValueError):
+        sweep_columns(base, {"daily_volume": list(range(1000)), "time_horizon": list(range(MAX_SCENARIOS // 1000 + 1))})
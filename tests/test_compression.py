@@ -0,0 +1,92 @@
+import gzip
+import json
+import zlib
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from compression import CompressionMiddleware, choose_encoding
+from strategy_state import columnar_state, to_columns
+
+
+def test_choose_encoding_honours_q_values_and_server_preference():
+    both = ("br", "gzip")
+    assert choose_encoding("gzip, deflate, br", both) == "br"
+    assert choose_encoding("gzip, deflate, br", ("gzip",)) == "gzip"
+    assert choose_encoding("br;q=0.5, gzip", both) == "gzip"
+    assert choose_encoding("br;q=0, gzip;q=0", both) is None
+    assert choose_encoding("*;q=0.1", both) == "br"
+    assert choose_encoding("identity", both) is None
+    assert choose_encoding(None, both) is None
+
+
+def app_with(minimum_size=100):
+    app = FastAPI()
+    big = json.dumps([{"image": "https://images.unsplash.com/photo-1764437358350?w=400"}] * 50)
+
+    @app.get("/big")
+    async def get_big():
+        return Response(big, media_type="application/json")
+
+    @app.get("/small")
+    async def get_small():
+        return PlainTextResponse("ok")
+
+    @app.get("/export")
+    async def get_export():
+        return StreamingResponse((f"row {i}\n" * 20 for i in range(5)), media_type="text/csv")
+
+    @app.get("/events")
+    async def get_events():
+        return StreamingResponse(iter(["data: x\n\n" * 100]), media_type="text/event-stream")
+
+    @app.get("/encoded")
+    async def get_encoded():
+        return Response(gzip.compress(big.encode()), media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size)
+    return TestClient(app), big
+
+
+def test_middleware_compresses_large_bodies_only():
+    client, big = app_with()
+
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip" and response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(big) / 5
+    assert response.text == big  # httpx decodes it
+
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
+    assert "content-encoding" not in client.get("/events", headers={"Accept-Encoding": "gzip"}).headers
+    assert client.get("/encoded", headers={"Accept-Encoding": "gzip"}).text == big  # not compressed twice
+
+
+def test_middleware_streams_compressed_chunks():
+    client, _ = app_with()
+
+    with client.stream("GET", "/export", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip" and "content-length" not in response.headers
+    assert zlib.decompress(raw, 16 + zlib.MAX_WBITS).decode() == "".join(f"row {i}\n" * 20 for i in range(5))
+
+
+def test_middleware_brotli():
+    pytest.importorskip("brotli")
+    client, big = app_with()
+
+    response = client.get("/big", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert int(response.headers["content-length"]) < len(big) / 5
+    assert response.text == big  # httpx decodes br when brotli is installed
+
+
+def test_columnar_state_states_keys_once():
+    rows = [{"date": "2024-12-01", "floor": 0.9, "buyback_event": True}, {"date": "2024-12-08", "floor": 1.0}]
+    assert to_columns(rows) == {"date": ["2024-12-01", "2024-12-08"], "floor": [0.9, 1.0], "buyback_event": [True, None]}
+    assert to_columns([]) == {}
+
+    state = columnar_state({"timestamp": 1, "history": rows, "orderbook": [], "nfts": [{"token_id": 1}]})
+    assert state == {"timestamp": 1, "history": to_columns(rows), "orderbook": {}, "nfts": {"token_id": [1]}}
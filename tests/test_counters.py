@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from counters import StatisticsCounters, nft_status_counter_inc, transaction_counter_inc
+from shared_cache import SharedCache
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+def seeded_db():
+    db = mongomock_motor.AsyncMongoMockClient(tz_aware=True)["counters_test"]
+
+    async def seed():
+        await db.transactions.insert_many([{"type": "buy"}, {"type": "buy"}, {"type": "burn"}, {"type": "sell"}])
+        await db.nfts.insert_many([{"status": "owned"}, {"status": "owned"}, {"status": "listed"}])
+
+    asyncio.run(seed())
+    return db
+
+
+def test_first_read_rebuilds_then_increments_apply():
+    db = seeded_db()
+    counters = StatisticsCounters(db)
+
+    async def scenario():
+        first = await counters.get()
+        await db.transactions.insert_one({"type": "burn"})
+        await counters.increment(transaction_counter_inc("burn"))
+        await counters.increment(nft_status_counter_inc("owned", "listed"))
+        await counters.increment(transaction_counter_inc("sell"))  # counts nothing
+        return first, await counters.get()
+
+    first, after = asyncio.run(scenario())
+    assert first == {"nfts_owned": 2, "buybacks": 2, "burns": 1}
+    assert after == {"nfts_owned": 1, "buybacks": 2, "burns": 2}
+
+
+def test_increment_before_the_first_rebuild_is_not_double_counted():
+    db = seeded_db()
+    counters = StatisticsCounters(db)
+
+    async def scenario():
+        await db.transactions.insert_one({"type": "buy"})
+        await counters.increment(transaction_counter_inc("buy"))  # creates an unbuilt document
+        return await counters.get()
+
+    assert asyncio.run(scenario())["buybacks"] == 3
+
+
+def test_increment_during_rebuild_is_kept():
+    db = seeded_db()
+    counters = StatisticsCounters(db)
+    count = counters._count
+    raced = []
+
+    async def count_with_concurrent_write():
+        doc = await count()
+        if not raced:
+            # A buy recorded after the aggregation read the transactions
+            raced.append(True)
+            await db.transactions.insert_one({"type": "buy"})
+            await counters.increment(transaction_counter_inc("buy"))
+        return doc
+
+    counters._count = count_with_concurrent_write
+
+    async def scenario():
+        rebuilt = await counters.rebuild()
+        return rebuilt, await counters.get()
+
+    rebuilt, stored = asyncio.run(scenario())
+    assert rebuilt["buybacks"] == stored["buybacks"] == 3
+
+
+def test_cached_reads_are_invalidated_by_increments():
+    db = seeded_db()
+    counters = StatisticsCounters(db, cache=SharedCache(), ttl=60)
+
+    async def scenario():
+        first = await counters.get()
+        await db.counters.update_one({"_id": "statistics"}, {"$set": {"burns": 10}})  # behind the API's back
+        cached = await counters.get()
+        await counters.increment({"burns": 1})
+        return first, cached, await counters.get()
+
+    first, cached, after = asyncio.run(scenario())
+    assert first["burns"] == cached["burns"] == 1
+    assert after["burns"] == 11
@@ -0,0 +1,69 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from export import EXPORT_COLUMNS, export_cursor, stream_csv, stream_ndjson, time_range_filter
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def transactions(count):
+    return [
+        {"id": f"tx-{i}", "type": "buy", "amount": 1, "price": 1.5, "timestamp": START + timedelta(hours=i),
+         "description": f'bought "FORMA #{i}", floor sweep\nline two', "wallet_address": None}
+        for i in range(count)
+    ]
+
+
+def export(docs, stream, query=None, **kwargs):
+    async def scenario():
+        collection = mongomock_motor.AsyncMongoMockClient(tz_aware=True)["export_test"]["transactions"]
+        if docs:
+            await collection.insert_many([dict(doc) for doc in reversed(docs)])
+        cursor = export_cursor(collection, query or {}, "timestamp")
+        return [chunk async for chunk in stream(cursor, **kwargs)]
+
+    return asyncio.run(scenario())
+
+
+def test_ndjson_streams_oldest_first_in_batches():
+    chunks = export(transactions(5), stream_ndjson, batch_size=2)
+
+    assert len(chunks) == 3  # 2 + 2 + 1 rows
+    rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    assert [row["id"] for row in rows] == [f"tx-{i}" for i in range(5)]
+    assert rows[1]["timestamp"] == "2025-01-01T01:00:00+00:00" and "_id" not in rows[0]
+
+
+def test_csv_escapes_quotes_commas_and_newlines():
+    docs = transactions(3)
+    chunks = export(docs, lambda cursor, **kw: stream_csv(cursor, EXPORT_COLUMNS["transactions"], **kw), batch_size=2)
+
+    assert len(chunks) == 2
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == EXPORT_COLUMNS["transactions"]
+    assert len(rows) == 4
+    assert rows[1][EXPORT_COLUMNS["transactions"].index("description")] == docs[0]["description"]
+    assert rows[1][-1] == ""  # None wallet
+
+
+def test_empty_export():
+    assert export([], stream_ndjson) == []
+    chunks = export([], lambda cursor: stream_csv(cursor, ["id", "type"]))
+    assert b"".join(chunks) == b"id,type\r\n"
+
+
+def test_time_range_is_start_inclusive_end_exclusive():
+    assert time_range_filter("timestamp", None, None) == {}
+    naive = time_range_filter("timestamp", datetime(2025, 1, 1, 1), None)
+    assert naive == {"timestamp": {"$gte": START + timedelta(hours=1)}}
+
+    query = time_range_filter("timestamp", START + timedelta(hours=1), START + timedelta(hours=3))
+    rows = [json.loads(line) for line in b"".join(export(transactions(5), stream_ndjson, query)).decode().splitlines()]
+    assert [row["id"] for row in rows] == ["tx-1", "tx-2"]
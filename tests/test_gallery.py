@@ -0,0 +1,101 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from gallery import GalleryIndex
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def nft(token_id, price, status="owned", owner=None, day=0):
+    return {"id": f"n{token_id}", "token_id": token_id, "name": f"FORMA #{token_id}", "image_url": "https://example.com/nft.png",
+            "current_price": price, "status": status, "owner_address": owner, "purchase_date": START + timedelta(days=day)}
+
+
+def token_ids(index, **query):
+    return [row["token_id"] for row in index.query(limit=100, **query)[1]]
+
+
+def test_filters_sorts_and_pages():
+    index = GalleryIndex()
+    index.load([
+        nft(1, 1.2, owner="0xa", day=3),
+        nft(2, 1.0, status="listed", day=1),
+        nft(12, 1.3, status="listed", owner="0xa", day=2),
+        nft(21, 1.24, status="sold", day=0),
+    ])
+
+    assert token_ids(index) == [2, 1, 21, 12]
+    assert token_ids(index, sort="-token_id") == [21, 12, 2, 1]
+    assert token_ids(index, sort="newest") == [1, 12, 2, 21]
+    assert token_ids(index, status=["listed", "sold"], sort="token_id") == [2, 12, 21]
+    assert token_ids(index, owner="0xa", status=["listed"]) == [12]
+    assert token_ids(index, token_ids=[21, 1, 99]) == [1, 21]
+    assert token_ids(index, search="2", sort="token_id") == [2, 21]  # token id prefix
+    assert token_ids(index, min_price=1.2, max_price=1.24) == [1, 21]
+
+    total, page = index.query(sort="token_id", offset=1, limit=2)
+    assert total == 4 and [row["token_id"] for row in page] == [2, 12]
+    assert set(page[0]) == {"id", "token_id", "name", "image", "price_eth", "status", "owner", "burn_candidate"}
+
+
+def test_burn_candidates_are_priced_below_the_floor():
+    index = GalleryIndex()
+    index.load([nft(1, 1.2), nft(2, 1.24), nft(3, 1.3), nft(4, 1.0)])
+
+    assert token_ids(index, floor=1.24, burn_candidate=True) == [4, 1]
+    assert token_ids(index, floor=1.24, burn_candidate=False, sort="-price") == [3, 2]
+    assert token_ids(index, floor=1.24, burn_candidate=True, max_price=1.1) == [4]
+    assert token_ids(index, burn_candidate=True) == []
+    assert [row["burn_candidate"] for row in index.query(floor=1.24)[1]] == [True, True, False, False]
+
+
+def brute_force(docs, floor=None, status=None, owner=None, token_ids=None, search=None, min_price=None, max_price=None,
+                burn_candidate=None, sort="price"):
+    field, descending = {"price": ("current_price", False), "-price": ("current_price", True),
+                         "token_id": ("token_id", False), "-token_id": ("token_id", True),
+                         "newest": ("purchase_date", True), "oldest": ("purchase_date", False)}[sort]
+    rows = [doc for doc in docs if (status is None or doc["status"] in status)
+            and (owner is None or doc["owner_address"] == owner)
+            and (token_ids is None or doc["token_id"] in token_ids)
+            and (search is None or str(doc["token_id"]).startswith(search))
+            and (min_price is None or doc["current_price"] >= min_price)
+            and (max_price is None or doc["current_price"] <= max_price)
+            and (burn_candidate is None or (doc["current_price"] < floor) == burn_candidate)]
+    return [doc["id"] for doc in sorted(rows, key=lambda doc: (doc[field], doc["id"]), reverse=descending)]
+
+
+def test_incremental_updates_match_a_full_rebuild():
+    rng = random.Random(5)
+    incremental = GalleryIndex()
+    docs = {}
+    for _ in range(2000):
+        token_id = rng.randrange(300)
+        if rng.random() < 0.1:
+            incremental.remove(f"n{token_id}")
+            docs.pop(f"n{token_id}", None)
+            continue
+        doc = nft(token_id, round(rng.uniform(0.8, 1.6), 2), status=rng.choice(["owned", "listed", "sold"]),
+                  owner=rng.choice([None, "0xa", "0xb"]), day=rng.randrange(30))
+        incremental.apply(doc)
+        docs[doc["id"]] = doc
+    rebuilt = GalleryIndex()
+    rebuilt.load(docs.values())
+
+    queries = [
+        {},
+        {"sort": "-price", "status": ["listed"]},
+        {"sort": "newest", "owner": "0xb", "min_price": 1.0},
+        {"sort": "token_id", "floor": 1.2, "burn_candidate": True},
+        {"sort": "oldest", "search": "1", "max_price": 1.4},
+        {"sort": "newest", "status": ["owned", "sold"], "floor": 1.2, "burn_candidate": False},
+        {"sort": "-price", "status": ["listed", "sold"], "min_price": 0.9, "max_price": 1.5},
+        {"token_ids": list(range(0, 300, 7)), "sort": "-token_id"},
+    ]
+    assert len(incremental) == len(docs)
+    for query in queries:
+        expected = brute_force(docs.values(), **query)
+        # Small pages walk the sort orders, large ones sort the matches
+        for offset, limit in ((0, 3), (7, 10), (0, 1000)):
+            total, rows = incremental.query(offset=offset, limit=limit, **query)
+            assert (total, rows) == rebuilt.query(offset=offset, limit=limit, **query)
+            assert total == len(expected) and [row["id"] for row in rows] == expected[offset:offset + limit]
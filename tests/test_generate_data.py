@@ -0,0 +1,60 @@
+import asyncio
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+from generate_data import Dataset, GeneratorConfig, _batches, insert_batches  # noqa: E402
+
+END = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def small(**overrides) -> Dataset:
+    config = dict(transactions=3000, nfts=200, wallets=50, days=30, seed=7, end=END, points_per_day=2)
+    config.update(overrides)
+    return Dataset(GeneratorConfig(**config))
+
+
+def test_same_seed_gives_same_documents():
+    assert list(small().transactions()) == list(small().transactions())
+    assert list(small().nfts()) == list(small().nfts())
+    assert list(small().transactions())[:5] != list(small(seed=8).transactions())[:5]
+
+
+def test_transactions_are_time_ordered_and_match_daily_totals():
+    dataset = small()
+    transactions = list(dataset.transactions())
+    assert len(transactions) == 3000
+    assert [tx["timestamp"] for tx in transactions] == sorted(tx["timestamp"] for tx in transactions)
+    assert transactions[0]["timestamp"] >= dataset.start and transactions[-1]["timestamp"] < END
+
+    totals = dataset.daily_totals()
+    assert totals["buys"].sum() == sum(tx["type"] == "buy" for tx in transactions)
+    assert totals["spent"].sum() == pytest.approx(sum(tx["price"] for tx in transactions if tx["type"] == "buy"))
+
+
+def test_strategy_state_agrees_with_generated_data():
+    import server
+
+    dataset = small()
+    totals = dataset.daily_totals()
+    state = server.StrategyState(**dataset.strategy_state(totals)).model_dump()
+    nfts = list(dataset.nfts())
+    assert state["nft_supply"]["strategy_owned"] == sum(nft["status"] in ("owned", "listed") for nft in nfts)
+    assert state["nft_supply"]["burned"] == sum(tx["type"] == "burn" for tx in dataset.transactions())
+    assert sum(level["count"] for level in state["orderbook"]) <= sum(nft["status"] == "listed" for nft in nfts)
+    assert state["history"][-1]["date"] == "2024-12-31"
+
+
+def test_insert_batches_writes_every_document():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    db = mongomock_motor.AsyncMongoMockClient(tz_aware=True)["generate_test"]
+    dataset = small()
+
+    inserted = asyncio.run(insert_batches(db.transactions, _batches(dataset.transactions(), 400), concurrency=3))
+
+    assert inserted == 3000
+    assert asyncio.run(db.transactions.count_documents({})) == 3000
@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import history
+from history import METRICS_COLLECTION, SAMPLER_LEASE_ID, HistorySampler, bucket_start, lttb, pick_resolution
+from strategy_state import StrategyStateCache
+
+from .test_strategy_state import FakeStateCollection
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    xs = list(range(1000))
+    ys = [0.0] * 1000
+    ys[123] = 50.0
+    ys[777] = -50.0
+
+    picked = lttb(xs, ys, 20)
+
+    assert len(picked) == 20
+    assert picked[0] == 0 and picked[-1] == 999
+    assert picked == sorted(set(picked))
+    assert 123 in picked and 777 in picked
+
+
+def test_lttb_returns_everything_under_threshold():
+    assert lttb([1, 2, 3], [1, 2, 3], 10) == [0, 1, 2]
+
+
+def test_pick_resolution_and_buckets():
+    end = datetime(2025, 3, 5, 13, 45, tzinfo=timezone.utc)  # a Wednesday
+
+    assert pick_resolution(end - timedelta(days=7), end, 500) == "hourly"
+    assert pick_resolution(end - timedelta(days=365), end, 100) == "daily"
+    assert pick_resolution(end - timedelta(days=3650), end, 100) == "weekly"
+    assert bucket_start(end, "hourly") == datetime(2025, 3, 5, 13, tzinfo=timezone.utc)
+    assert bucket_start(end, "weekly") == datetime(2025, 3, 3, tzinfo=timezone.utc)
+
+
+def test_only_the_lease_holder_samples(monkeypatch):
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    db = mongomock_motor.AsyncMongoMockClient(tz_aware=True)["history_test"]
+    rollups = []
+
+    async def fake_rollup(db, since=None):
+        rollups.append(since)
+
+    monkeypatch.setattr(history, "rollup", fake_rollup)
+    state = StrategyStateCache(FakeStateCollection(), validate=dict)
+    workers = [HistorySampler(db, state, interval=60) for _ in range(3)]
+
+    async def scenario():
+        for _ in range(2):
+            for worker in workers:
+                await worker.sample_once()
+        lease = await db.leases.find_one({"_id": SAMPLER_LEASE_ID})
+        # The holder goes away; its lease is expired on the next worker's tick
+        await db.leases.update_one({"_id": SAMPLER_LEASE_ID}, {"$set": {"expires_at": datetime(2000, 1, 1, tzinfo=timezone.utc)}})
+        await workers[1].sample_once()
+        await workers[2].sample_once()
+        return lease, await db[METRICS_COLLECTION].count_documents({})
+
+    lease, points = asyncio.run(scenario())
+    assert lease["holder"] == workers[0].holder
+    assert points == len(rollups) == 3
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from indexes import ROUTE_QUERIES, _plan_stages, check_query_plans
+
+INDEXED = {
+    "stage": "LIMIT",
+    "inputStage": {
+        "stage": "FETCH",
+        "inputStage": {"stage": "IXSCAN", "indexName": "timestamp_id", "keyPattern": {"timestamp": -1, "id": -1}},
+    },
+}
+# An $or whose second branch lost its index
+SCANNING = {
+    "stage": "SUBPLAN",
+    "inputStage": {
+        "stage": "FETCH",
+        "inputStage": {
+            "stage": "OR",
+            "inputStages": [
+                {"stage": "IXSCAN", "indexName": "_id_"},
+                {"stage": "COLLSCAN", "filter": {"idempotency_key": {"$in": ["k"]}}},
+            ],
+        },
+    },
+}
+
+
+def test_plan_stages_walks_nested_plans():
+    assert _plan_stages(INDEXED) == ["LIMIT", "FETCH", "IXSCAN"]
+    assert _plan_stages(SCANNING) == ["SUBPLAN", "FETCH", "OR", "IXSCAN", "COLLSCAN"]
+
+
+class FakeDb:
+    """Answers explain with ``plans[collection]``"""
+
+    def __init__(self, plans):
+        self.plans = plans
+
+    async def command(self, name, command, verbosity):
+        return {"queryPlanner": {"winningPlan": self.plans.get(command["find"], INDEXED)}}
+
+
+def test_check_query_plans_reports_a_collscan():
+    report = asyncio.run(check_query_plans(FakeDb({})))
+    assert len(report) == len(ROUTE_QUERIES) and not any(row["collscan"] for row in report)
+
+    with pytest.raises(RuntimeError, match="COLLSCAN"):
+        asyncio.run(check_query_plans(FakeDb({"wallet_nonces": SCANNING})))
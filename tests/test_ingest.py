@@ -0,0 +1,94 @@
+import asyncio
+import json
+
+import pytest
+from pydantic import BaseModel
+
+from ingest import BulkBodyError, parse_bulk_body, validate_rows
+
+
+class Row(BaseModel):
+    amount: float
+
+
+def test_parses_ndjson_and_json_arrays():
+    ndjson = b'{"amount": 1}\n\n{"amount": \n{"amount": 3}\n'
+    rows, errors = parse_bulk_body(ndjson, "application/x-ndjson")
+    assert rows == [(0, {"amount": 1}), (3, {"amount": 3})]
+    assert [error["index"] for error in errors] == [2]
+
+    rows, errors = parse_bulk_body(json.dumps([{"amount": 1}, {"amount": 2}]).encode(), "application/json")
+    assert rows == [(0, {"amount": 1}), (1, {"amount": 2})] and errors == []
+
+    with pytest.raises(BulkBodyError):
+        parse_bulk_body(b'{"amount": 1}', "application/json")  # an object, not an array
+    with pytest.raises(BulkBodyError):
+        parse_bulk_body(b"[1,", "application/json")
+
+
+def test_invalid_rows_are_reported_without_dropping_their_batch(monkeypatch):
+    monkeypatch.setattr("ingest.BULK_BATCH_SIZE", 2)
+    rows = list(enumerate([{"amount": 1}, {"amount": "x"}, {"amount": 3}, {}, {"amount": 5}]))
+
+    valid, errors = validate_rows(rows, Row)
+
+    assert [(index, item.amount) for index, item in valid] == [(0, 1.0), (2, 3.0), (4, 5.0)]
+    assert [error["index"] for error in errors] == [1, 3]
+    assert errors[0]["error"].startswith("amount: ")
+
+
+def test_bulk_routes_count_each_row_once(monkeypatch):
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    from fastapi.testclient import TestClient
+
+    import server
+    from indexes import ensure_indexes
+
+    db = mongomock_motor.AsyncMongoMockClient(tz_aware=True)["ingest_test"]
+    asyncio.run(ensure_indexes(db, strict=True))
+    server.use_database(db)
+    client = TestClient(server.app)  # no lifespan: nothing connects to a real mongod
+    ndjson = {"Content-Type": "application/x-ndjson"}
+
+    def tx(key, type="buy", **extra):
+        return {"type": type, "amount": 1, "price": 1.0, "description": "backfill", "idempotency_key": key, **extra}
+
+    def body(*rows):
+        return "\n".join(json.dumps(row) for row in rows)
+
+    # The counters update fails after the rows were inserted, so the request errors out
+    increment = server.statistics_counters.increment
+    failures = [RuntimeError("counters unavailable")]
+
+    async def failing_increment(inc):
+        if failures:
+            raise failures.pop()
+        await increment(inc)
+
+    monkeypatch.setattr(server.statistics_counters, "increment", failing_increment)
+    with pytest.raises(RuntimeError):
+        client.post("/api/transactions/bulk", content=body(tx("a"), tx("b", "burn")), headers=ndjson)
+
+    # The retry skips both rows as duplicates but still counts them, once
+    retry = client.post("/api/transactions/bulk", content=body(tx("a"), tx("b", "burn"), tx("c"), {"type": "buy"}),
+                        headers=ndjson).json()
+    assert (retry["received"], retry["inserted"], retry["duplicates"]) == (4, 1, [0, 1])
+    assert [error["index"] for error in retry["errors"]] == [3]
+    again = client.post("/api/transactions/bulk", content=body(tx("a"), tx("c")), headers=ndjson).json()
+    assert again["duplicates"] == [0, 1]
+
+    nfts = client.post("/api/nfts/bulk", json=[
+        {"token_id": 1, "name": "FORMA #1", "image_url": "x", "purchase_price": 1, "current_price": 1, "idempotency_key": "n1"},
+        {"token_id": 2, "name": "FORMA #2", "image_url": "x", "purchase_price": 1, "current_price": 1, "status": "listed"},
+        {"token_id": 3, "name": "FORMA #3", "image_url": "x", "purchase_price": 1, "current_price": 1, "status": "burned"},
+    ]).json()
+    assert (nfts["inserted"], [error["index"] for error in nfts["errors"]]) == (2, [2])
+
+    async def stored():
+        counters = await db.counters.find_one({"_id": "statistics"})
+        pending = await db.transactions.count_documents({"counters_pending": {"$exists": True}})
+        return counters, pending
+
+    counters, pending = asyncio.run(stored())
+    assert (counters["buybacks"], counters["burns"], counters["nfts_owned"]) == (2, 1, 1)
+    assert pending == 0
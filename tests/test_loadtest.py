@@ -0,0 +1,31 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+
+import loadtest  # noqa: E402
+
+
+def test_every_api_route_has_a_load_scenario():
+    keys = loadtest.route_keys()
+    assert "GET /api/nfts" in keys
+    assert [key for key in keys if key not in loadtest.SCENARIOS and key not in loadtest.SKIPPED] == []
+    assert set(loadtest.SCENARIOS) <= set(keys)
+
+
+def row(p95, rps):
+    return {"requests": 100, "errors": 0, "rps": rps, "p50_ms": p95 / 2, "p95_ms": p95, "p99_ms": p95}
+
+
+def test_compare_flags_slower_routes_and_ignores_sub_millisecond_noise():
+    baseline = {
+        "meta": {"started_at": "2024-01-01T00:00:00+00:00"},
+        "routes": {"GET /api/a": row(10.0, 500), "GET /api/b": row(0.4, 2000), "GET /api/c": row(10.0, 500)},
+        "mixed": {"all": row(20.0, 300)},
+    }
+    results = {
+        "routes": {"GET /api/a": row(15.0, 480), "GET /api/b": row(0.8, 1900), "GET /api/c": row(10.5, 300)},
+        "mixed": {"all": row(21.0, 290), "GET /api/a": row(30.0, 10)},
+    }
+    # Different mixed route sets are not compared at all
+    assert loadtest.compare(results, baseline, threshold=20, min_delta_ms=1.0) == ["GET /api/a", "GET /api/c"]
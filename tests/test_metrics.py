@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from metrics import MetricsMiddleware, MetricsRegistry, MongoCommandTimer
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("op_seconds", "Operation latency", ["op"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, op='say "hi"')
+
+    lines = registry.render().decode().splitlines()
+    assert lines[:2] == ["# HELP op_seconds Operation latency", "# TYPE op_seconds histogram"]
+    assert lines[2:] == [
+        'op_seconds_bucket{op="say \\"hi\\"",le="0.1"} 1',
+        'op_seconds_bucket{op="say \\"hi\\"",le="1"} 3',
+        'op_seconds_bucket{op="say \\"hi\\"",le="+Inf"} 4',
+        'op_seconds_sum{op="say \\"hi\\""} 4.05',
+        'op_seconds_count{op="say \\"hi\\""} 4',
+    ]
+
+
+def test_middleware_labels_requests_by_route_template():
+    histogram = MetricsRegistry().histogram("http_seconds", "latency", ["method", "route", "status"])
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    app.add_middleware(MetricsMiddleware, histogram=histogram, exclude={"/metrics"})
+    client = TestClient(app)
+    for path in ("/items/1", "/items/2", "/items/x", "/missing", "/metrics"):
+        client.get(path)
+
+    assert histogram.count(method="GET", route="/items/{item_id}", status=200) == 2
+    assert histogram.count(method="GET", route="/items/{item_id}", status=422) == 1
+    assert histogram.count(method="GET", route="unmatched", status=404) == 1
+    assert sum(series[2] for series in histogram._series.values()) == 4
+
+
+def test_mongo_timer_labels_by_collection_and_command():
+    histogram = MetricsRegistry().histogram("mongo_seconds", "latency", ["collection", "command", "outcome"])
+    timer = MongoCommandTimer(histogram)
+
+    def event(request_id, name, command=None, micros=1500):
+        return SimpleNamespace(connection_id=("localhost", 27017), request_id=request_id, command_name=name,
+                               command=command or {}, duration_micros=micros)
+
+    timer.started(event(1, "find", {"find": "nfts", "filter": {}}))
+    timer.started(event(2, "getMore", {"getMore": 123, "collection": "transactions"}))
+    timer.started(event(3, "endSessions", {"endSessions": [{}]}))
+    timer.succeeded(event(1, "find"))
+    timer.failed(event(2, "getMore"))
+    timer.succeeded(event(3, "endSessions"))
+
+    assert histogram.count(collection="nfts", command="find", outcome="ok") == 1
+    assert histogram.count(collection="transactions", command="getMore", outcome="error") == 1
+    assert histogram.count(collection="-", command="endSessions", outcome="ok") == 1
+    assert timer._collections == {}
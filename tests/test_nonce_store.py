@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from nonce_store import MemoryNonceStore, MongoNonceStore
+
+
+def exercise(store):
+    async def scenario():
+        await store.issue("0xa", "n1", "message 1")
+        await store.issue("0xa", "n2", "message 2")  # replaces n1
+        stale = await store.consume("0xa", "message 1")
+        first = await store.consume("0xa", "message 2")
+        replay = await store.consume("0xa", "message 2")
+        return stale, first, replay
+
+    return asyncio.run(scenario())
+
+
+def test_memory_store_is_single_use():
+    assert exercise(MemoryNonceStore()) == (False, True, False)
+
+
+def test_memory_store_expires():
+    now = [0.0]
+    store = MemoryNonceStore(ttl=10, clock=lambda: now[0])
+    asyncio.run(store.issue("0xa", "n", "m"))
+    now[0] = 11
+    assert asyncio.run(store.consume("0xa", "m")) is False
+    assert len(store) == 0
+
+
+def test_mongo_store_is_single_use_and_expires():
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    collection = mongomock_motor.AsyncMongoMockClient(tz_aware=True)["auth"]["wallet_nonces"]
+    assert exercise(MongoNonceStore(collection)) == (False, True, False)
+
+    expired = MongoNonceStore(collection, ttl=-1)
+    asyncio.run(expired.issue("0xb", "n", "m"))
+    assert asyncio.run(expired.consume("0xb", "m")) is False
@@ -0,0 +1,29 @@
+from orderbook import OrderBook
+
+
+def listing(nft_id, price, status="listed"):
+    return {"id": nft_id, "token_id": int(nft_id[1:]), "status": status, "current_price": price}
+
+
+def test_levels_floor_and_depth():
+    book = OrderBook(tick=0.05)
+    book.load([listing("n1", 1.2), listing("n2", 1.15), listing("n3", 1.17), listing("n4", 0.9, status="owned")])
+
+    assert len(book) == 3
+    assert book.floor() == 1.15
+    assert book.levels(10) == [{"price": 1.15, "count": 2}, {"price": 1.2, "count": 1}]
+    assert book.depth_at(1.17) == (2, 2)
+    assert [nft["id"] for nft in book.best(10, below=1.2)] == ["n2", "n3"]
+
+
+def test_incremental_updates():
+    book = OrderBook()
+    book.apply(listing("n1", 1.1))
+    book.apply(listing("n2", 1.0))
+    book.apply(listing("n2", 1.3))  # repriced
+    assert book.floor() == 1.1
+    assert book.levels(5) == [{"price": 1.1, "count": 1}, {"price": 1.3, "count": 1}]
+
+    book.apply(listing("n1", 1.1, status="sold"))
+    book.remove("n2")
+    assert len(book) == 0 and book.floor() is None and book.levels(5) == []
@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from pagination import InvalidCursor, MAX_PAGE_SIZE, clamp_page_size, decode_cursor, encode_cursor, keyset_filter
+
+
+def test_cursor_round_trips_strings_and_datetimes():
+    when = datetime(2024, 12, 1, 12, 30, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor("2024-12-01T12:30:00+00:00", "tx-1")) == ("2024-12-01T12:30:00+00:00", "tx-1")
+    assert decode_cursor(encode_cursor(when, "tx-2")) == (when, "tx-2")
+
+
+@pytest.mark.parametrize("cursor", ["garbage", "", "bm90IGpzb24", encode_cursor("x", "y")[:-3]])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_keyset_filter_breaks_ties_on_id():
+    cursor = encode_cursor("2024-12-01T00:00:00+00:00", "b")
+    assert keyset_filter("timestamp", cursor) == {"$or": [
+        {"timestamp": {"$lt": "2024-12-01T00:00:00+00:00"}},
+        {"timestamp": "2024-12-01T00:00:00+00:00", "id": {"$lt": "b"}},
+    ]}
+
+
+def test_page_size_is_clamped():
+    assert clamp_page_size(10_000) == MAX_PAGE_SIZE
+    assert clamp_page_size(0) == 1
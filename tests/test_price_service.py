@@ -0,0 +1,191 @@
+import asyncio
+
+import httpx
+import pytest
+
+from price_service import PriceRefresher, PriceService, PriceServiceError
+
+
+class StubCoinGecko:
+    """Local stand-in for the CoinGecko /simple/price endpoint"""
+
+    def __init__(self, prices, delay=0.0, status_code=200):
+        self.prices = prices
+        self.delay = delay
+        self.status_code = status_code
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.status_code != 200:
+            return httpx.Response(self.status_code, json={"error": "upstream"})
+        ids = request.url.params["ids"].split(",")
+        return httpx.Response(200, json={i: self.prices[i] for i in ids if i in self.prices})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_service(stub, clock=None, **kwargs):
+    return PriceService(
+        base_url="http://coingecko.test/api/v3",
+        transport=httpx.MockTransport(stub),
+        clock=clock or FakeClock(),
+        **kwargs,
+    )
+
+
+PRICES = {"bitcoin": {"usd": 65000.0, "usd_24h_change": 1.5, "usd_market_cap": 1.2e12, "usd_24h_vol": 3.1e10}}
+
+
+def test_quote_is_cached_within_ttl():
+    stub = StubCoinGecko(PRICES)
+    service = make_service(stub, ttl=60)
+
+    async def scenario():
+        first = await service.get_price("bitcoin")
+        second = await service.get_price("bitcoin")
+        await service.close()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first["price_usd"] == 65000.0
+    assert first["volume_24h"] == 3.1e10
+    assert second is first
+    assert len(stub.requests) == 1
+
+
+def test_concurrent_misses_share_one_request():
+    stub = StubCoinGecko(PRICES, delay=0.05)
+    service = make_service(stub)
+
+    async def scenario():
+        quotes = await asyncio.gather(*(service.get_price("bitcoin") for _ in range(20)))
+        await service.close()
+        return quotes
+
+    quotes = asyncio.run(scenario())
+    assert all(q["price_usd"] == 65000.0 for q in quotes)
+    assert len(stub.requests) == 1
+
+
+def test_stale_quote_is_served_while_revalidating():
+    stub = StubCoinGecko(dict(PRICES))
+    clock = FakeClock()
+    service = make_service(stub, clock=clock, ttl=60, stale_ttl=300)
+
+    async def scenario():
+        await service.get_price("bitcoin")
+        stub.prices["bitcoin"] = {"usd": 70000.0}
+        clock.now = 120
+        stale = await service.get_price("bitcoin")
+        await asyncio.sleep(0.01)  # let the background refresh land
+        fresh = await service.get_price("bitcoin")
+        await service.close()
+        return stale, fresh
+
+    stale, fresh = asyncio.run(scenario())
+    assert stale["price_usd"] == 65000.0
+    assert fresh["price_usd"] == 70000.0
+    assert len(stub.requests) == 2
+
+
+def test_expired_quote_blocks_on_refetch():
+    stub = StubCoinGecko(dict(PRICES))
+    clock = FakeClock()
+    service = make_service(stub, clock=clock, ttl=60, stale_ttl=300)
+
+    async def scenario():
+        await service.get_price("bitcoin")
+        stub.prices["bitcoin"] = {"usd": 70000.0}
+        clock.now = 1000
+        quote = await service.get_price("bitcoin")
+        await service.close()
+        return quote
+
+    assert asyncio.run(scenario())["price_usd"] == 70000.0
+
+
+def test_unknown_coin_returns_none_and_is_cached():
+    stub = StubCoinGecko(PRICES)
+    service = make_service(stub)
+
+    async def scenario():
+        results = [await service.get_price("not-a-coin") for _ in range(3)]
+        await service.close()
+        return results
+
+    assert asyncio.run(scenario()) == [None, None, None]
+    assert len(stub.requests) == 1
+
+
+def test_upstream_failure_raises_price_service_error():
+    stub = StubCoinGecko(PRICES, status_code=429)
+    service = make_service(stub)
+
+    async def scenario():
+        try:
+            await service.get_price("bitcoin")
+        finally:
+            await service.close()
+
+    with pytest.raises(PriceServiceError):
+        asyncio.run(scenario())
+
+
+def test_get_prices_batches_misses_into_one_request():
+    prices = dict(PRICES, ethereum={"usd": 3100.0}, solana={"usd": 150.0})
+    stub = StubCoinGecko(prices)
+    service = make_service(stub)
+
+    async def scenario():
+        await service.get_price("bitcoin")
+        quotes = await service.get_prices(["bitcoin", "ethereum", "solana", "nope"])
+        await service.close()
+        return quotes
+
+    quotes = asyncio.run(scenario())
+    assert list(quotes) == ["bitcoin", "ethereum", "solana", "nope"]
+    assert quotes["solana"]["price_usd"] == 150.0
+    assert quotes["nope"] is None
+    assert len(stub.requests) == 2
+    assert stub.requests[1].url.params["ids"] == "ethereum,solana,nope"
+
+
+def test_refresher_tracks_status_and_errors():
+    stub = StubCoinGecko(dict(PRICES))
+    service = make_service(stub)
+    refresher = PriceRefresher(service, ["bitcoin"], interval=3600)
+
+    async def scenario():
+        await refresher.refresh_once()
+        stub.status_code = 500
+        await refresher.refresh_once()
+        await service.close()
+
+    asyncio.run(scenario())
+    status = refresher.status()
+    assert status["refresh_count"] == 1
+    assert status["error_count"] == 1
+    assert status["consecutive_errors"] == 1
+    assert status["last_refresh_at"] is not None
+
+
+def test_on_fetch_reports_every_upstream_request():
+    fetches = []
+    service = make_service(StubCoinGecko(PRICES, status_code=503), on_fetch=lambda seconds, ok: fetches.append(ok))
+
+    async def scenario():
+        with pytest.raises(PriceServiceError):
+            await service.get_price("bitcoin")
+        await service.close()
+
+    asyncio.run(scenario())
+    assert fetches == [False]
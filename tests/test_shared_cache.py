@@ -0,0 +1,170 @@
+import asyncio
+
+import httpx
+
+from counters import StatisticsCounters
+from price_service import PriceService
+from shared_cache import SharedCache, SqliteStore
+from strategy_state import DEFAULT_STRATEGY_STATE, StrategyStateCache
+from .test_price_service import PRICES, FakeClock, StubCoinGecko
+from .test_strategy_state import FakeStateCollection
+
+
+def workers(tmp_path, count=2, **kwargs):
+    """Caches of ``count`` workers sharing one SQLite file"""
+    path = str(tmp_path / "cache.sqlite")
+    return [SharedCache(SqliteStore(path), **kwargs) for _ in range(count)]
+
+
+def test_local_tier_expires_and_evicts():
+    clock = FakeClock()
+    cache = SharedCache(max_entries=2, clock=clock)
+
+    async def scenario():
+        await cache.set("ns", "a", 1, ttl=10)
+        await cache.set("ns", "b", 2, ttl=10)
+        assert await cache.get("ns", "a") == 1  # a is now the most recently used
+        await cache.set("ns", "c", 3, ttl=10)
+        evicted = await cache.get_many("ns", ["a", "b", "c"])
+        clock.now = 10
+        expired = await cache.get("ns", "a", "missing")
+        return evicted, expired
+
+    assert asyncio.run(scenario()) == ({"a": 1, "c": 3}, "missing")
+
+
+def test_invalidation_reaches_other_workers(tmp_path):
+    first, second = workers(tmp_path)
+
+    async def scenario():
+        await first.set("ns", "key", {"value": 1}, ttl=60)
+        shared = await second.get("ns", "key")
+        # A load that started before the invalidation must not be stored
+        generation = first.generation("ns")
+        await first.invalidate("ns")
+        await first.set("ns", "key", {"value": 2}, ttl=60, generation=generation)
+        before_sync = await second.get("ns", "key")
+        await second.sync()
+        after_sync = await second.get("ns", "key")
+        await second.set("ns", "key", {"value": 3}, ttl=60)
+        reloaded = await first.get("ns", "key")
+        return shared, before_sync, after_sync, reloaded
+
+    try:
+        shared, before_sync, after_sync, reloaded = asyncio.run(scenario())
+    finally:
+        first.close()
+        second.close()
+    assert shared == {"value": 1}
+    assert before_sync == {"value": 1}  # served from the local tier until the next sync
+    assert after_sync is None
+    assert reloaded == {"value": 3}
+
+
+def test_concurrent_misses_share_one_load(tmp_path):
+    (cache,) = workers(tmp_path, count=1)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return len(loads)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_load("ns", "key", load, ttl=60) for _ in range(10)))
+
+    try:
+        assert asyncio.run(scenario()) == [1] * 10
+    finally:
+        cache.close()
+    assert len(loads) == 1
+
+
+def test_workers_share_state_snapshot_and_versions(tmp_path):
+    collection = FakeStateCollection({"timestamp": 1, **DEFAULT_STRATEGY_STATE})
+    shared = workers(tmp_path)
+    now = [0.0]
+    first, second = (StrategyStateCache(collection, validate=dict, max_age=5, clock=lambda: now[0], shared=s)
+                     for s in shared)
+
+    async def scenario():
+        a1 = await first.get()
+        b1 = await second.get()
+        await first.update({"treasury": {"eth_balance": 30.0, "target_eth_per_buyback": 3.0}})
+        await shared[1].sync()
+        now[0] = 10
+        b2 = await second.get()
+        a2 = await first.get()
+        return a1, b1, a2, b2
+
+    try:
+        a1, b1, a2, b2 = asyncio.run(scenario())
+    finally:
+        for cache in shared:
+            cache.close()
+    assert (b1.version, b1.etag) == (a1.version, a1.etag) == (1, a1.etag)
+    assert (a2.version, a2.etag) == (b2.version, b2.etag) == (2, b2.etag)
+    assert a2.etag != a1.etag
+    assert collection.reads == 3  # the second worker's first read came from the shared cache
+
+
+def test_workers_share_price_quotes(tmp_path):
+    stub = StubCoinGecko(PRICES)
+    shared = workers(tmp_path)
+    services = [
+        PriceService(base_url="http://coingecko.test/api/v3", transport=httpx.MockTransport(stub), clock=FakeClock(),
+                     ttl=60, shared=cache)
+        for cache in shared
+    ]
+
+    async def scenario():
+        quotes = [await service.get_price("bitcoin") for service in services]
+        for service in services:
+            await service.close()
+        return quotes
+
+    try:
+        quotes = asyncio.run(scenario())
+    finally:
+        for cache in shared:
+            cache.close()
+    assert [quote["price_usd"] for quote in quotes] == [65000.0, 65000.0]
+    assert len(stub.requests) == 1
+
+
+class FakeCountersCollection:
+    def __init__(self, doc):
+        self.doc = doc
+        self.reads = 0
+
+    async def find_one(self, query):
+        self.reads += 1
+        return dict(self.doc)
+
+    async def update_one(self, query, update, upsert=False):
+        for field, value in update["$inc"].items():
+            self.doc[field] += value
+
+
+def test_statistics_are_cached_until_an_increment(tmp_path):
+    class FakeDb:
+        counters = FakeCountersCollection({"_id": "statistics", "nfts_owned": 3, "buybacks": 2, "burns": 1, "seq": 0,
+                                          "built": True})
+
+    first, second = workers(tmp_path)
+    writer, reader = StatisticsCounters(FakeDb, cache=first), StatisticsCounters(FakeDb, cache=second)
+
+    async def scenario():
+        before = [await reader.get(), await writer.get()]
+        await writer.increment({"buybacks": 1})
+        await second.sync()
+        return before, await reader.get()
+
+    try:
+        before, after = asyncio.run(scenario())
+    finally:
+        first.close()
+        second.close()
+    assert [doc["buybacks"] for doc in before] == [2, 2]
+    assert after["buybacks"] == 3
+    assert FakeDb.counters.reads == 2
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+from signatures import SignatureVerifier, VerifierOverloaded
+
+
+def signed(text):
+    account = Account.create()
+    signature = Account.sign_message(encode_defunct(text=text), account.key).signature.hex()
+    return account.address, "0x" + signature.removeprefix("0x")
+
+
+def test_recovers_in_pool_and_rejects_over_limit():
+    address, signature = signed("hello")
+    verifier = SignatureVerifier(max_workers=1, max_pending=1, use_processes=False)
+
+    async def scenario():
+        return await asyncio.gather(*(verifier.recover("hello", signature) for _ in range(3)), return_exceptions=True)
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        verifier.close()
+
+    assert results[0] == address
+    assert all(isinstance(result, VerifierOverloaded) for result in results[1:])
+    assert verifier.status()["rejected"] == 2 and verifier.pending == 0
+
+
+def test_bad_signature_raises():
+    verifier = SignatureVerifier(max_workers=1, use_processes=False)
+    try:
+        with pytest.raises(Exception):
+            asyncio.run(verifier.recover("hello", "0xdead"))
+    finally:
+        verifier.close()
+    assert verifier.pending == 0
@@ -0,0 +1,31 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+from simulation import CHUNK_PATHS, SimulationParams, band_days, simulate
+
+PARAMS = SimulationParams(
+    nft_price=1.2, current_supply=4688, time_horizon=90, daily_volume=400,
+    volume_volatility=0.5, price_drift=0.001, price_volatility=0.05, execution_probability=0.7,
+    fee_percentage=1.0, buyback_nft_percentage=40, burn_percentage=70, impact_strength=0.5,
+)
+
+
+def test_same_seed_same_bands_in_process_pool():
+    paths = CHUNK_PATHS + 500  # two uneven chunks
+    serial = asyncio.run(simulate(PARAMS, paths, 42, [5, 50, 95]))
+    with ProcessPoolExecutor(2) as pool:
+        pooled = asyncio.run(simulate(PARAMS, paths, 42, [5, 50, 95], executor=pool))
+
+    assert serial == pooled
+    assert serial != asyncio.run(simulate(PARAMS, paths, 43, [5, 50, 95]))
+
+
+def test_bands_are_ordered_and_burns_reduce_supply():
+    bands = asyncio.run(simulate(PARAMS, 2000, 1, [5, 50, 95]))
+
+    assert len(bands["supply"]["p50"]) == len(band_days(PARAMS.time_horizon))
+    for metric in bands.values():
+        for low, mid, high in zip(metric["p5"], metric["p50"], metric["p95"]):
+            assert low <= mid <= high
+    assert bands["supply"]["p50"][-1] < PARAMS.current_supply
+    assert bands["nfts_burned"]["p50"][-1] > 0
@@ -0,0 +1,71 @@
+import asyncio
+
+from strategy_state import DEFAULT_STRATEGY_STATE, StrategyStateCache
+
+
+class FakeStateCollection:
+    """Minimal async stand-in for db.strategy_state"""
+
+    def __init__(self, doc=None):
+        self.doc = doc
+        self.reads = 0
+
+    async def find_one(self, *args, **kwargs):
+        self.reads += 1
+        await asyncio.sleep(0)
+        return dict(self.doc) if self.doc is not None else None
+
+    async def update_one(self, query, update, upsert=False):
+        self.doc = {**(self.doc or {}), **update["$set"]}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_snapshot_is_reused_until_max_age():
+    collection = FakeStateCollection()
+    now = [0.0]
+    cache = StrategyStateCache(collection, validate=dict, max_age=5, clock=lambda: now[0])
+
+    async def scenario():
+        first = await cache.get()
+        second = await cache.get()
+        now[0] = 10
+        third = await cache.get()
+        return first, second, third
+
+    first, second, third = run(scenario())
+    assert first is second
+    # Reloaded, but the content didn't change so neither did the version
+    assert third is first
+    assert collection.reads == 2
+    assert first.data["treasury"] == DEFAULT_STRATEGY_STATE["treasury"]
+
+
+def test_concurrent_reads_share_one_load():
+    collection = FakeStateCollection()
+    cache = StrategyStateCache(collection, validate=dict)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get() for _ in range(10)))
+
+    snapshots = run(scenario())
+    assert len({id(s) for s in snapshots}) == 1
+    assert collection.reads == 1
+
+
+def test_update_bumps_version_and_etag():
+    collection = FakeStateCollection({"timestamp": 1, **DEFAULT_STRATEGY_STATE})
+    cache = StrategyStateCache(collection, validate=dict, max_age=60)
+
+    async def scenario():
+        before = await cache.get()
+        await cache.update({"treasury": {"eth_balance": 30.0, "target_eth_per_buyback": 3.0}})
+        after = await cache.get()
+        return before, after
+
+    before, after = run(scenario())
+    assert after.version == before.version + 1
+    assert after.etag != before.etag
+    assert b'"eth_balance":30.0' in after.body
@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+from strategy_state import DEFAULT_STRATEGY_STATE, StrategyStateCache
+from strategy_stream import LocalChangeNotifier, StrategyStreamHub
+from .test_strategy_state import FakeStateCollection
+
+
+def make_hub(queue_size=16):
+    collection = FakeStateCollection({"timestamp": 1, **DEFAULT_STRATEGY_STATE})
+    cache = StrategyStateCache(collection, validate=dict, max_age=60)
+    notifier = LocalChangeNotifier()
+    cache.add_listener(notifier.notify)
+    return collection, cache, StrategyStreamHub(cache, notifier, queue_size=queue_size)
+
+
+def decode(item):
+    event, full = item
+    return json.loads(event.payload(full))
+
+
+def test_subscribers_get_full_state_then_deltas_from_one_read():
+    collection, cache, hub = make_hub()
+
+    async def scenario():
+        await hub.start()
+        subscriptions = [await hub.subscribe() for _ in range(50)]
+        initial = [decode(await s.get()) for s in subscriptions]
+        reads_before = collection.reads
+
+        await cache.update({"treasury": {"eth_balance": 30.0, "target_eth_per_buyback": 3.0}})
+        deltas = [decode(await asyncio.wait_for(s.get(), 1)) for s in subscriptions]
+        await hub.stop()
+        return initial, deltas, collection.reads - reads_before
+
+    initial, deltas, reads = asyncio.run(scenario())
+    assert all(m["full"] and m["data"]["nft_supply"]["total_minted"] == 5000 for m in initial)
+    assert reads == 1
+    assert deltas[0] == {
+        "event": "state",
+        "version": initial[0]["version"] + 1,
+        "full": False,
+        "changes": {"treasury": {"eth_balance": 30.0, "target_eth_per_buyback": 3.0}},
+    }
+
+
+def test_price_deltas_only_carry_changed_coins():
+    _, _, hub = make_hub()
+
+    async def scenario():
+        subscription = await hub.subscribe()
+        await subscription.get()  # initial state
+        hub.publish_prices({"bitcoin": {"price_usd": 1.0}, "ethereum": {"price_usd": 2.0}})
+        hub.publish_prices({"bitcoin": {"price_usd": 1.0}, "ethereum": {"price_usd": 3.0}})
+        hub.publish_prices({"bitcoin": {"price_usd": 1.0}, "ethereum": {"price_usd": 3.0}})
+        return [decode(await subscription.get()) for _ in range(2)], subscription
+
+    (first, second), subscription = asyncio.run(scenario())
+    assert first["changes"] == {"bitcoin": {"price_usd": 1.0}, "ethereum": {"price_usd": 2.0}}
+    assert second["changes"] == {"ethereum": {"price_usd": 3.0}}
+    assert subscription._queue.empty()
+
+
+def test_slow_subscriber_is_resynced_with_full_snapshots():
+    _, _, hub = make_hub(queue_size=2)
+
+    async def scenario():
+        subscription = await hub.subscribe()
+        for price in range(10):
+            hub.publish_prices({"bitcoin": {"price_usd": float(price)}})
+        messages = []
+        while not subscription._queue.empty():
+            messages.append(decode(await subscription.get()))
+        return messages, subscription
+
+    messages, subscription = asyncio.run(scenario())
+    assert subscription.dropped > 0
+    assert all(m["full"] for m in messages)
+    assert messages[-1]["data"]["bitcoin"]["price_usd"] == 9.0
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from fastapi import HTTPException
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+import server  # noqa: E402
+from auth_cache import VerifiedTokenCache  # noqa: E402
+from signatures import VerifierOverloaded  # noqa: E402
+from .test_shared_cache import workers  # noqa: E402
+
+
+def test_login_retried_after_overload_still_succeeds(monkeypatch):
+    account = Account.create()
+    server.use_database(mongomock_motor.AsyncMongoMockClient(tz_aware=True)["auth_test"])
+    recover = server.signature_verifier.recover
+    calls = []
+
+    async def overloaded_once(message, signature):
+        calls.append(signature)
+        if len(calls) == 1:
+            raise VerifierOverloaded("busy")
+        return await recover(message, signature)
+
+    monkeypatch.setattr(server.signature_verifier, "recover", overloaded_once)
+
+    async def verify(message, signature):
+        request = server.WalletVerifyRequest(wallet_address=account.address, signature=signature, message=message)
+        try:
+            return await server.verify_wallet_signature(request)
+        except HTTPException as e:
+            return e.status_code
+
+    async def scenario():
+        issued = await server.get_auth_nonce(server.WalletConnectRequest(wallet_address=account.address))
+        message = issued["message"]
+        signature = Account.sign_message(encode_defunct(text=message), account.key).signature.hex()
+        signature = "0x" + signature.removeprefix("0x")
+        return [
+            await verify(message, signature),  # 503: the pool is full
+            await verify(message, "0xdead"),  # malformed signature
+            await verify(message, signature),
+            await verify(message, signature),  # replay
+        ]
+
+    overloaded, malformed, login, replay = asyncio.run(scenario())
+    assert (overloaded, malformed, replay) == (503, 401, 400)
+    assert login.wallet_address == account.address.lower()
+
+
+def test_logout_revokes_cached_tokens_on_other_workers(monkeypatch, tmp_path):
+    db = mongomock_motor.AsyncMongoMockClient(tz_aware=True)["auth_test"]
+    server.use_database(db)
+    wallet = "0xabc"
+    token = server.create_jwt_token(wallet)
+    shared = workers(tmp_path)
+    first, second = (VerifiedTokenCache(shared=cache) for cache in shared)
+
+    async def check(cache):
+        monkeypatch.setattr(server, "token_cache", cache)
+        return await server.check_token(token)
+
+    async def scenario():
+        await db.wallet_sessions.insert_one({"wallet_address": wallet, "is_active": True, "token_version": 0})
+        results = [await check(second), await check(second), await check(first)]
+        await server.logout_wallet(wallet)  # handled by the first worker
+        await shared[1].sync()
+        return results + [await check(second)]
+
+    try:
+        verified, cached, first_worker, after_logout = asyncio.run(scenario())
+    finally:
+        for cache in shared:
+            cache.close()
+    assert (verified, cached, first_worker) == ((wallet, "verified"), (wallet, "cached"), (wallet, "verified"))
+    assert after_logout == (None, "revoked")
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from wallet_counters import WalletCounters, add_wallet_inc, nft_owner_inc
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+def test_owner_change_moves_one_nft_between_wallets():
+    assert nft_owner_inc(None, "0xa") == {"0xa": {"nfts_owned": 1}}
+    assert nft_owner_inc("0xa", "0xb") == {"0xa": {"nfts_owned": -1}, "0xb": {"nfts_owned": 1}}
+    assert nft_owner_inc("0xa", "0xa") == {}
+
+    incs = {}
+    for wallet in ("0xa", None, "0xa", "0xb"):
+        add_wallet_inc(incs, wallet, "total_transactions")
+    assert incs == {"0xa": {"total_transactions": 2}, "0xb": {"total_transactions": 1}}
+
+
+def test_increment_upserts_an_inactive_placeholder_session():
+    async def scenario():
+        sessions = mongomock_motor.AsyncMongoMockClient()["wallets"]["wallet_sessions"]
+        await sessions.insert_one({"wallet_address": "0xa", "is_active": True, "total_transactions": 2})
+        await WalletCounters(sessions).increment({"0xa": {"total_transactions": 1}, "0xb": {"nfts_owned": 1, "total_transactions": 0}})
+        return [doc async for doc in sessions.find({}, {"_id": 0}).sort("wallet_address", 1)]
+
+    assert asyncio.run(scenario()) == [
+        {"wallet_address": "0xa", "is_active": True, "total_transactions": 3},
+        {"wallet_address": "0xb", "is_active": False, "nfts_owned": 1},
+    ]
+
+
+def test_reconcile_rewrites_only_drifted_counters():
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient()["wallets"]
+        await db.transactions.insert_many([{"wallet_address": "0xa"}, {"wallet_address": "0xa"}, {"wallet_address": None}])
+        await db.nfts.insert_many([{"owner_address": "0xa"}, {"owner_address": "0xc"}])
+        await db.wallet_sessions.insert_many([
+            {"wallet_address": "0xa", "is_active": True, "total_transactions": 5, "nfts_owned": 1},
+            {"wallet_address": "0xb", "is_active": True, "total_transactions": 1, "nfts_owned": 0},
+            {"wallet_address": "0xd", "is_active": True, "total_transactions": 0, "nfts_owned": 0},
+        ])
+        counters = WalletCounters(db.wallet_sessions)
+        fixed = await counters.reconcile(db)
+        again = await counters.reconcile(db)
+        docs = {doc["wallet_address"]: doc async for doc in db.wallet_sessions.find({}, {"_id": 0})}
+        return fixed, again, docs
+
+    fixed, again, docs = asyncio.run(scenario())
+    assert (fixed, again) == (3, 0)  # 0xa drifted, 0xb should be zero, 0xc had no session
+    assert docs["0xa"]["total_transactions"] == 2 and docs["0xa"]["nfts_owned"] == 1
+    assert docs["0xb"]["total_transactions"] == 0
+    assert docs["0xc"] == {"wallet_address": "0xc", "total_transactions": 0, "nfts_owned": 1, "is_active": False}